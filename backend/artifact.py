@@ -0,0 +1,384 @@
+"""
+Artifact Module
+Model file format with memory-mappable array blocks and lazily loaded sections
+
+Layout:
+    magic (8 bytes) | header length (8 bytes) | JSON header
+    | pickled sections | 64-byte aligned array blocks
+
+Each section is a pickle in which NumPy arrays above a size threshold are
+replaced by references to array blocks. Uncompressed blocks are mapped
+copy-on-write straight from the file, so reading them is constant-time and
+processes share their pages through the OS cache. Whether the loaded model
+keeps the mapped arrays depends on the estimator: MLP weights, SVM support
+vectors and large linear coefficients do, but scikit-learn's tree models
+(decision trees, forests, gradient boosting) copy their node arrays when
+unpickled, so those are private to each process.
+The header records a SHA-256 of everything after it, so truncated or
+corrupted files are detected on load.
+"""
+
+import io
+import os
+import bz2
+import json
+import hashlib
+import lzma
+import mmap
+import time
+import zlib
+import pickle
+import struct
+import warnings
+
+import numpy as np
+
+
+MAGIC = b'TRAINIT\x01'
+
+# 2 added the body checksum; format 1 files still load, unverified
+FORMAT_VERSION = 2
+
+# Blocks start on cache-line boundaries so mapped arrays are well aligned
+ALIGNMENT = 64
+
+# Arrays smaller than this stay inside the pickle
+MIN_BLOCK_BYTES = 4096
+
+# Large blocks are written and verified in pieces of this size
+CHUNK_BYTES = 16 * 1024 ** 2
+
+# Stands in for the checksum while the header is laid out
+_DIGEST_PLACEHOLDER = '0' * 64
+
+# Files verified by this process: real path -> (size, mtime_ns, digest)
+_verified = {}
+
+COMPRESSORS = {
+    'zlib': (zlib.compress, zlib.decompress, 3),
+    'bz2': (bz2.compress, bz2.decompress, 9),
+    'lzma': (lambda data, level: lzma.compress(data, preset=level), lzma.decompress, 3),
+}
+
+
+def resolve_compression(compress):
+    """
+    Normalise a compression setting to (name, level), or None
+
+    Accepts None/False, True (zlib), a method name, an int zlib level
+    (as joblib does) or a (name, level) tuple.
+    """
+    if compress is None or compress is False or compress == 0:
+        return None
+    if compress is True:
+        return ('zlib', COMPRESSORS['zlib'][2])
+    if isinstance(compress, int):
+        return ('zlib', compress)
+    if isinstance(compress, str):
+        name, level = compress, None
+    else:
+        name, level = compress
+    if name not in COMPRESSORS:
+        raise ValueError(f"Unknown compression method: {name}")
+    return (name, COMPRESSORS[name][2] if level is None else level)
+
+
+def is_artifact(filepath):
+    """Check whether a file is in the artifact format (as opposed to a joblib pickle)"""
+    try:
+        with open(filepath, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class _BlockPickler(pickle.Pickler):
+    """Pickler that moves large arrays out into blocks"""
+
+    def __init__(self, file, blocks, seen, min_block_bytes):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.blocks = blocks
+        self.seen = seen
+        self.min_block_bytes = min_block_bytes
+
+    def persistent_id(self, obj):
+        if (type(obj) not in (np.ndarray, np.memmap) or obj.dtype.hasobject
+                or obj.nbytes < self.min_block_bytes):
+            return None
+
+        key = id(obj)
+        if key not in self.seen:
+            order = 'F' if obj.flags.f_contiguous and not obj.flags.c_contiguous else 'C'
+            self.blocks.append((obj, order))
+            self.seen[key] = (len(self.blocks) - 1, obj.dtype, obj.shape, order)
+        return ('array',) + self.seen[key]
+
+
+def _block_bytes(arr, order):
+    """Raw bytes of an array in its stored memory order"""
+    return np.ascontiguousarray(arr.T if order == 'F' else arr).data
+
+
+class _BlockUnpickler(pickle.Unpickler):
+    """Unpickler that resolves block references through an ArtifactReader"""
+
+    def __init__(self, file, reader):
+        super().__init__(file)
+        self.reader = reader
+
+    def persistent_load(self, pid):
+        kind, index, dtype, shape, order = pid
+        if kind != 'array':
+            raise pickle.UnpicklingError(f"Unknown persistent id: {kind}")
+        return self.reader.block(index, dtype, shape, order)
+
+
+def save_artifact(sections, filepath, compress=None, metadata=None, min_block_bytes=MIN_BLOCK_BYTES,
+                  progress_callback=None):
+    """
+    Write objects to an artifact file atomically
+
+    Args:
+        sections: Dict of name -> object; sections are unpickled independently
+        filepath: Destination path
+        compress: Compression setting (see resolve_compression); compressed
+            blocks are decompressed on load instead of memory-mapped
+        metadata: JSON-serialisable dict readable without loading any section
+        min_block_bytes: Arrays from this size on are stored as blocks
+        progress_callback: Called with the percentage of bytes written
+
+    Returns:
+        dict: The header that was written
+    """
+    from backend.utils import atomic_write
+
+    compression = resolve_compression(compress)
+    blocks, seen = [], {}
+    pickles = {}
+    for name, obj in sections.items():
+        buffer = io.BytesIO()
+        _BlockPickler(buffer, blocks, seen, min_block_bytes).dump(obj)
+        pickles[name] = buffer.getvalue()
+
+    def encode(data):
+        if compression is None:
+            return data
+        name, level = compression
+        return COMPRESSORS[name][0](data, level)
+
+    # Compressed payloads have to exist before the header can give offsets
+    payloads = {name: encode(data) for name, data in pickles.items()}
+    block_payloads = [encode(_block_bytes(arr, order)) if compression else None
+                      for arr, order in blocks]
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'compression': compression[0] if compression else None,
+        'checksum': {'algorithm': 'sha256', 'digest': _DIGEST_PLACEHOLDER},
+        'metadata': metadata or {},
+        'sections': {},
+        'blocks': []
+    }
+
+    # Offsets depend on the header length, which depends on the offsets;
+    # iterate until the encoded header stops changing
+    header_bytes = b''
+    while True:
+        offset = _align(len(MAGIC) + 8 + len(header_bytes))
+        for name, payload in payloads.items():
+            header['sections'][name] = {'offset': offset, 'length': len(payload),
+                                        'raw_length': len(pickles[name])}
+            offset += len(payload)
+        header['blocks'] = []
+        for (arr, _), payload in zip(blocks, block_payloads):
+            offset = _align(offset)
+            length = arr.nbytes if payload is None else len(payload)
+            header['blocks'].append({'offset': offset, 'length': length, 'raw_length': arr.nbytes})
+            offset += length
+        new_header = json.dumps(header, default=str).encode()
+        if new_header == header_bytes:
+            break
+        header_bytes = new_header
+
+    body_start = _align(len(MAGIC) + 8 + len(header_bytes))
+    total_bytes = offset
+
+    def write(f):
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\0' * (body_start - len(MAGIC) - 8 - len(header_bytes)))
+
+        # The body is hashed as it is written; the digest is patched into
+        # the header before the temporary file is renamed into place
+        digest = hashlib.sha256()
+        position = body_start
+
+        def emit(data):
+            nonlocal position
+            view = memoryview(data).cast('B')
+            for start in range(0, len(view), CHUNK_BYTES):
+                chunk = view[start:start + CHUNK_BYTES]
+                f.write(chunk)
+                digest.update(chunk)
+                position += len(chunk)
+                if progress_callback:
+                    progress_callback(int(100 * position / total_bytes))
+
+        for name, payload in payloads.items():
+            emit(b'\0' * (header['sections'][name]['offset'] - position))
+            emit(payload)
+        for (arr, order), payload, entry in zip(blocks, block_payloads, header['blocks']):
+            emit(b'\0' * (entry['offset'] - position))
+            emit(_block_bytes(arr, order) if payload is None else payload)
+
+        header['checksum']['digest'] = digest.hexdigest()
+        f.seek(len(MAGIC) + 8 + header_bytes.index(_DIGEST_PLACEHOLDER.encode()))
+        f.write(header['checksum']['digest'].encode())
+        f.seek(0, os.SEEK_END)
+
+    atomic_write(filepath, write)
+    return header
+
+
+def read_header(filepath):
+    """Read an artifact's header (sections, blocks, metadata) without loading it"""
+    with open(filepath, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{filepath} is not a TrainIT model artifact")
+        (length,) = struct.unpack('<Q', f.read(8))
+        return json.loads(f.read(length))
+
+
+class ArtifactReader:
+    """
+    Opens an artifact and loads its sections on demand
+
+    Only the header is read on construction. Uncompressed array blocks are
+    views of a copy-on-write memory map: pages are read when touched, shared
+    between processes, and writes stay private to the process.
+    """
+
+    def __init__(self, filepath, mmap_mode=True, verify=False):
+        self.filepath = filepath
+        self.header = read_header(filepath)
+        if self.header['format_version'] > FORMAT_VERSION:
+            raise ValueError(f"Artifact format {self.header['format_version']} is newer "
+                             f"than this version of TrainIT supports")
+        if os.path.getsize(filepath) < self.body_end:
+            raise ValueError(f"{filepath} is truncated")
+        if verify:
+            self.verify()
+        self.mmap_mode = mmap_mode and self.header['compression'] is None
+        self._map = None
+        self._blocks = {}
+        self._loaded = {}
+
+    @property
+    def metadata(self):
+        return self.header['metadata']
+
+    @property
+    def sections(self):
+        return list(self.header['sections'])
+
+    @property
+    def body_start(self):
+        entries = list(self.header['sections'].values()) + self.header['blocks']
+        return min(entry['offset'] for entry in entries)
+
+    @property
+    def body_end(self):
+        entries = list(self.header['sections'].values()) + self.header['blocks']
+        return max(entry['offset'] + entry['length'] for entry in entries)
+
+    def verify(self):
+        """
+        Check the body against the SHA-256 in the header
+
+        Reads the whole file, unless this process already verified it and its
+        size and modification time are unchanged (e.g. repeated reloads).
+        """
+        if 'checksum' not in self.header:
+            warnings.warn(f"{self.filepath} was written before artifacts had checksums "
+                          f"(format {self.header['format_version']}); loading it unverified")
+            return
+        expected = self.header['checksum']['digest']
+        stat = os.stat(self.filepath)
+        path = os.path.realpath(self.filepath)
+        signature = (stat.st_size, stat.st_mtime_ns, expected)
+        if _verified.get(path) == signature:
+            return
+        digest = hashlib.sha256()
+        with open(self.filepath, 'rb') as f:
+            f.seek(self.body_start)
+            remaining = self.body_end - self.body_start
+            while remaining:
+                chunk = f.read(min(CHUNK_BYTES, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+        if digest.hexdigest() != expected:
+            raise ValueError(f"Checksum mismatch in {self.filepath}: the file is corrupted")
+        _verified[path] = signature
+
+    def _read(self, entry):
+        if self._map is not None:
+            return self._map[entry['offset']:entry['offset'] + entry['length']]
+        with open(self.filepath, 'rb') as f:
+            f.seek(entry['offset'])
+            return f.read(entry['length'])
+
+    def _decode(self, data):
+        if self.header['compression'] is None:
+            return data
+        try:
+            return COMPRESSORS[self.header['compression']][1](data)
+        except (zlib.error, lzma.LZMAError, OSError, ValueError) as e:
+            raise ValueError(f"Cannot decompress {self.filepath}: the file is corrupted ({e})")
+
+    def _ensure_map(self):
+        if self.mmap_mode and self._map is None:
+            with open(self.filepath, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    def block(self, index, dtype, shape, order='C'):
+        """Get one array block as an ndarray (mapped when uncompressed)"""
+        if index in self._blocks:
+            return self._blocks[index]
+        entry = self.header['blocks'][index]
+        if self._map is not None:
+            buffer = np.frombuffer(self._map, dtype=np.uint8, count=entry['length'],
+                                   offset=entry['offset'])
+        else:
+            buffer = np.frombuffer(bytearray(self._decode(self._read(entry))), dtype=np.uint8)
+
+        if order == 'F':
+            arr = buffer.view(dtype).reshape(shape[::-1]).T
+        else:
+            arr = buffer.view(dtype).reshape(shape)
+        # Arrays referenced from several places stay one object, as with plain pickle
+        self._blocks[index] = arr
+        return arr
+
+    def load(self, name):
+        """Unpickle a section (cached)"""
+        if name not in self._loaded:
+            if name not in self.header['sections']:
+                raise ValueError(f"Artifact has no section '{name}'")
+            self._ensure_map()
+            data = self._decode(self._read(self.header['sections'][name]))
+            self._loaded[name] = _BlockUnpickler(io.BytesIO(data), self).load()
+        return self._loaded[name]
+
+
+def load_artifact(filepath, mmap_mode=True, verify=True):
+    """Load every section of an artifact into a dict"""
+    reader = ArtifactReader(filepath, mmap_mode=mmap_mode, verify=verify)
+    return {name: reader.load(name) for name in reader.sections}
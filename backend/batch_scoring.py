@@ -0,0 +1,219 @@
+"""
+Batch Scoring Module
+Streams large files through a saved model on a pool of worker processes
+"""
+
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from backend.resources import ResourceConfig
+
+
+# Pipeline loaded once in each worker process
+_worker_pipeline = None
+
+
+def _init_worker(model_path):
+    """Load the model once per worker and keep each worker single-threaded"""
+    global _worker_pipeline
+    from threadpoolctl import threadpool_limits
+    from backend.pipeline import TrainingPipeline
+    from backend.resources import apply_estimator_jobs
+
+    # Parallelism comes from the process pool; nested BLAS or n_jobs threads
+    # would only oversubscribe the cores
+    threadpool_limits(limits=1)
+    _worker_pipeline = TrainingPipeline()
+    # score_file verified the checksum once; workers only map the file
+    _worker_pipeline.load_model(model_path, verify=False)
+    apply_estimator_jobs(_worker_pipeline.trainer.model, {'estimator_jobs': 1})
+
+
+def _read_row_group(input_path, row_group):
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(input_path).read_row_group(row_group)
+
+
+def _score_chunk(chunk, include_proba, keep_columns, input_path=None):
+    """Score one chunk in a worker and return it as an Arrow table"""
+    import pyarrow as pa
+
+    if input_path is not None:
+        # Parquet tasks carry a row group index; the worker reads it directly
+        chunk = _read_row_group(input_path, chunk)
+
+    pipeline = _worker_pipeline
+    columns = {}
+    for column in keep_columns or []:
+        if hasattr(chunk, 'num_rows'):
+            columns[column] = chunk.column(column)
+        else:
+            columns[column] = pa.array(chunk[column], from_pandas=True)
+
+    predictions, proba = pipeline.score_raw(chunk, include_proba, batch_size=len_rows(chunk))
+    labels = pipeline.class_labels()
+    # Typed from the class labels so empty chunks get the same column type
+    columns['prediction'] = pa.array(predictions, pa.array(labels).type)
+    if proba is not None:
+        for k, label in enumerate(labels):
+            columns[f'proba_{label}'] = proba[:, k]
+    return pa.table(columns)
+
+
+def len_rows(chunk):
+    """Number of rows in a DataFrame or Arrow table"""
+    return chunk.num_rows if hasattr(chunk, 'num_rows') else len(chunk)
+
+
+def iter_chunks(input_path, chunk_rows=100000):
+    """
+    Yield the input file in row chunks without reading it whole
+
+    CSV and JSON-lines (.jsonl) files are read with pandas chunked readers.
+    Parquet is split by row group and read by the workers themselves. JSON
+    and Excel files are read as DataLoader reads them, then sliced.
+    """
+    extension = input_path.lower().split('.')[-1]
+    if extension == 'csv':
+        yield from pd.read_csv(input_path, chunksize=chunk_rows)
+    elif extension == 'jsonl':
+        yield from pd.read_json(input_path, lines=True, chunksize=chunk_rows)
+    elif extension == 'parquet':
+        import pyarrow.parquet as pq
+        yield from range(pq.ParquetFile(input_path).num_row_groups)
+    elif extension in ('json', 'xlsx', 'xls'):
+        # No streaming reader for these; slice the loaded file instead
+        data = pd.read_json(input_path) if extension == 'json' else pd.read_excel(input_path)
+        for start in range(0, len(data), chunk_rows):
+            yield data.iloc[start:start + chunk_rows]
+    else:
+        raise ValueError(f"Unsupported file format: {extension}")
+
+
+def _empty_table(model_path, include_proba, keep_columns):
+    """Zero-row table with the output columns, for inputs without any rows"""
+    import numpy as np
+    import pyarrow as pa
+    from backend.pipeline import TrainingPipeline
+
+    pipeline = TrainingPipeline()
+    pipeline.load_model(model_path, verify=False)
+    labels = pipeline.class_labels()
+    columns = {column: pa.array([], pa.null()) for column in keep_columns or []}
+    columns['prediction'] = pa.array([], pa.array(labels).type)
+    if include_proba and hasattr(pipeline.trainer.model, 'predict_proba'):
+        for label in labels:
+            columns[f'proba_{label}'] = pa.array(np.zeros(0))
+    return pa.table(columns)
+
+
+def score_file(model_path, input_path, output_path, chunk_rows=100000, n_workers=None,
+               include_proba=True, keep_columns=None, progress_callback=None):
+    """
+    Score a file of raw rows with a saved model and write predictions to Parquet
+
+    Chunks are fanned out to worker processes, each holding one copy of the
+    model, and written back in input order. At most two chunks per worker are
+    in flight, so memory stays bounded whatever the file size. The output
+    schema is fixed by the first chunk; later chunks are cast to it.
+
+    Args:
+        model_path: Model saved with TrainingPipeline.save_model
+        input_path: CSV, JSON, JSON-lines, Parquet or Excel file with the raw feature columns
+        output_path: Parquet file to write
+        chunk_rows: Rows per chunk (Parquet input uses its row groups)
+        n_workers: Worker processes (defaults to the available cores)
+        include_proba: Also write one probability column per class
+        keep_columns: Input columns copied to the output, e.g. row ids
+        progress_callback: Called with the number of rows scored so far
+
+    Returns:
+        dict: Rows, chunks, elapsed seconds and throughput
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from backend.artifact import ArtifactReader, is_artifact
+    from backend.utils import atomic_write
+
+    if is_artifact(model_path):
+        ArtifactReader(model_path, verify=True)
+    n_workers = n_workers or ResourceConfig().cores
+    parquet_input = input_path.lower().endswith('.parquet')
+    start_time = time.time()
+    stats = {'rows': 0, 'chunks': 0}
+
+    def write(f):
+        writer = None
+        pending = deque()
+
+        def drain(limit):
+            nonlocal writer
+            while len(pending) > limit:
+                table = pending.popleft().result()
+                if writer is None:
+                    writer = pq.ParquetWriter(f, table.schema)
+                elif table.schema != writer.schema:
+                    # A column's inferred type can differ between chunks
+                    # (e.g. ints, then floats once a value is missing)
+                    try:
+                        table = table.cast(writer.schema)
+                    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                        raise ValueError(f"Chunk {stats['chunks']} does not match the output "
+                                         f"schema of the first chunk: {e}")
+                writer.write_table(table)
+                stats['rows'] += table.num_rows
+                stats['chunks'] += 1
+                if progress_callback:
+                    progress_callback(stats['rows'])
+
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(model_path,)) as pool:
+            for chunk in iter_chunks(input_path, chunk_rows):
+                pending.append(pool.submit(_score_chunk, chunk, include_proba, keep_columns,
+                                           input_path if parquet_input else None))
+                drain(2 * n_workers)
+            drain(0)
+
+        if writer is None:
+            # Still publish a readable file with the output columns
+            writer = pq.ParquetWriter(f, _empty_table(model_path, include_proba,
+                                                      keep_columns).schema)
+        writer.close()
+
+    atomic_write(output_path, write)
+
+    elapsed = time.time() - start_time
+    return {
+        'rows': stats['rows'],
+        'chunks': stats['chunks'],
+        'workers': n_workers,
+        'seconds': elapsed,
+        'rows_per_second': stats['rows'] / elapsed if elapsed > 0 else None,
+        'output_path': output_path
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a data file with a saved TrainIT model")
+    parser.add_argument('model_path', help="Model saved with TrainingPipeline.save_model")
+    parser.add_argument('input_path', help="CSV, JSON, JSON-lines, Parquet or Excel file")
+    parser.add_argument('output_path', help="Parquet file for the predictions")
+    parser.add_argument('--chunk-rows', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-proba', action='store_true', help="Only write predicted labels")
+    parser.add_argument('--keep', nargs='*', default=None, help="Input columns to copy")
+    args = parser.parse_args(argv)
+
+    summary = score_file(args.model_path, args.input_path, args.output_path,
+                         chunk_rows=args.chunk_rows, n_workers=args.workers,
+                         include_proba=not args.no_proba, keep_columns=args.keep)
+    print(f"Scored {summary['rows']} rows in {summary['seconds']:.1f}s "
+          f"({summary['rows_per_second']:.0f} rows/s) -> {summary['output_path']}")
+
+
+if __name__ == '__main__':
+    main()
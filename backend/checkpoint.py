@@ -0,0 +1,112 @@
+"""
+Checkpoint Module
+Persists training and tuning progress so long runs can be resumed
+"""
+
+import os
+import json
+import shutil
+from datetime import datetime
+
+import joblib
+
+from backend.utils import atomic_write, atomic_write_json
+
+
+class CheckpointManager:
+    """Stores run state and partially fitted estimators in a checkpoint directory"""
+
+    STATE_FILE = 'state.json'
+    ESTIMATOR_FILE = 'estimator.joblib'
+
+    def __init__(self, checkpoint_dir='models/checkpoints'):
+        self.checkpoint_dir = checkpoint_dir
+        self.state = {}
+
+    @property
+    def state_path(self):
+        return os.path.join(self.checkpoint_dir, self.STATE_FILE)
+
+    @property
+    def estimator_path(self):
+        return os.path.join(self.checkpoint_dir, self.ESTIMATOR_FILE)
+
+    def exists(self):
+        """Check whether a checkpoint has been written"""
+        return os.path.exists(self.state_path)
+
+    def load_state(self):
+        """Load the run state from disk"""
+        if not self.exists():
+            raise FileNotFoundError(f"No checkpoint found in {self.checkpoint_dir}")
+
+        with open(self.state_path, 'r') as f:
+            self.state = json.load(f)
+        return self.state
+
+    def save_state(self, **updates):
+        """Update and atomically persist the run state"""
+        self.state.update(updates)
+        self.state['updated_at'] = datetime.now().isoformat()
+        atomic_write_json(self.state, self.state_path)
+
+    def start(self, fingerprint, config):
+        """
+        Begin or continue a checkpointed run
+
+        Args:
+            fingerprint: Fingerprint of the training data
+            config: Run configuration (paths, loading and training arguments);
+                all of it must match the configuration of an existing checkpoint
+
+        Raises:
+            ValueError: If an existing checkpoint belongs to other data or settings
+        """
+        # Compared as stored, so tuples in model parameters match their JSON lists
+        config = json.loads(json.dumps(config, default=str))
+        if self.exists():
+            self.load_state()
+            if self.state.get('fingerprint') != fingerprint:
+                raise ValueError(
+                    f"Dataset has changed since the checkpoint in {self.checkpoint_dir} "
+                    f"was written (expected {self.state.get('fingerprint')}, got {fingerprint})"
+                )
+            stored = self.state.get('config', {})
+            changed = [key for key in sorted(set(stored) | set(config))
+                       if key != 'train_args' and stored.get(key) != config.get(key)]
+            stored_args, args = stored.get('train_args', {}), config.get('train_args', {})
+            changed += [key for key in sorted(set(stored_args) | set(args))
+                        if stored_args.get(key) != args.get(key)]
+            if changed:
+                raise ValueError(
+                    f"Checkpoint in {self.checkpoint_dir} was written for a different "
+                    f"training configuration ({', '.join(changed)} changed)"
+                )
+        self.save_state(fingerprint=fingerprint, config=config)
+
+    def completed_candidates(self):
+        """Get cross-validation results already recorded for the search"""
+        return self.state.get('candidates', {})
+
+    def record_candidates(self, results):
+        """Record finished search candidates keyed by their parameter key"""
+        candidates = self.state.setdefault('candidates', {})
+        candidates.update(results)
+        self.save_state(stage='search')
+
+    def save_estimator(self, estimator, **state):
+        """Atomically persist a partially fitted estimator"""
+        atomic_write(self.estimator_path, lambda f: joblib.dump(estimator, f))
+        self.save_state(**state)
+
+    def load_estimator(self):
+        """Load the persisted estimator, if any"""
+        if not os.path.exists(self.estimator_path):
+            return None
+        return joblib.load(self.estimator_path)
+
+    def clear(self):
+        """Remove the checkpoint directory"""
+        if os.path.isdir(self.checkpoint_dir):
+            shutil.rmtree(self.checkpoint_dir)
+        self.state = {}
@@ -0,0 +1,228 @@
+"""
+Compaction Module
+Shrinks fitted tree models after training within a validation-accuracy tolerance
+"""
+
+import numpy as np
+
+from backend.footprint import serialized_size
+
+
+def tree_estimators(model):
+    """All fitted sklearn trees of a model (forest, boosting or a single tree)"""
+    if hasattr(model, 'tree_'):
+        return [model]
+    members = getattr(model, 'estimators_', None)
+    if members is None:
+        return []
+    return [tree for tree in np.ravel(members) if hasattr(tree, 'tree_')]
+
+
+def snap_to_float32(values, direction=-np.inf):
+    """
+    Round float64 values to float32-representable ones, towards direction
+
+    Trees compare float32 inputs against float64 thresholds, so a threshold
+    rounded down to the largest float32 not above it splits every input the
+    same way while its low mantissa bits become zeros.
+    """
+    snapped = values.astype(np.float32)
+    overshoot = snapped > values if direction < 0 else snapped < values
+    snapped[overshoot] = np.nextafter(snapped[overshoot], np.float32(direction))
+    return snapped.astype(np.float64)
+
+
+def node_depths(children_left, children_right):
+    """Depth of every reachable node, computed level by level"""
+    depth = np.full(len(children_left), -1, dtype=np.int64)
+    frontier, level = np.array([0]), 0
+    while len(frontier):
+        depth[frontier] = level
+        children = np.concatenate([children_left[frontier], children_right[frontier]])
+        frontier = children[children >= 0]
+        level += 1
+    return depth
+
+
+def compact_tree(estimator, max_depth=None, float32_values=False, keep_importances=True):
+    """
+    Rebuild an estimator's tree with compact node data (in place)
+
+    Args:
+        estimator: Fitted DecisionTreeClassifier/Regressor
+        max_depth: Collapse subtrees below this depth into leaves (classifiers)
+        float32_values: Round leaf values to float32 precision
+        keep_importances: Keep impurity and weighted sample counts, which
+            only feature_importances_ reads; otherwise they are zeroed too
+
+    Returns:
+        int: Number of nodes in the rebuilt tree
+    """
+    tree = estimator.tree_
+    state = tree.__getstate__()
+    nodes, values = state['nodes'].copy(), state['values'].copy()
+    left, right = nodes['left_child'], nodes['right_child']
+
+    if max_depth is not None:
+        depth = node_depths(left, right)
+        collapse = (depth >= max_depth) & (left != -1)
+        if collapse.any() and not values[collapse].any():
+            raise ValueError("Tree was already compacted; its inner node values are gone")
+        left[collapse] = right[collapse] = -1
+        nodes['feature'][collapse] = -2
+        nodes['threshold'][collapse] = -2.0
+
+        # Drop nodes that are no longer reachable; parents precede children,
+        # so the kept nodes stay in a valid order
+        keep = node_depths(left, right) >= 0
+        new_index = np.cumsum(keep) - 1
+        nodes, values = nodes[keep], values[keep]
+        left, right = nodes['left_child'], nodes['right_child']
+        left[left >= 0] = new_index[left[left >= 0]]
+        right[right >= 0] = new_index[right[right >= 0]]
+
+    is_leaf = left == -1
+    split = ~is_leaf
+    nodes['threshold'][split] = snap_to_float32(nodes['threshold'][split])
+    if float32_values:
+        values[is_leaf] = values[is_leaf].astype(np.float32)
+
+    # Inference reads only features, thresholds, children and leaf values
+    values[split] = 0.0
+    nodes['n_node_samples'] = 0
+    if not keep_importances:
+        nodes['impurity'] = 0.0
+        nodes['weighted_n_node_samples'] = 0.0
+
+    rebuilt = type(tree)(tree.n_features, np.asarray(tree.n_classes, dtype=np.intp), tree.n_outputs)
+    rebuilt.__setstate__({
+        'max_depth': int(node_depths(left, right).max()),
+        'node_count': len(nodes),
+        'nodes': nodes,
+        'values': values
+    })
+    estimator.tree_ = rebuilt
+    return len(nodes)
+
+
+def inner_values_cleared(estimator):
+    """Whether a previous compaction zeroed the inner node values depth pruning needs"""
+    tree = estimator.tree_
+    split = tree.children_left != -1
+    return bool(split.any()) and not tree.value[split].any()
+
+
+def _accuracy(model, X, y):
+    return float(np.mean(model.predict(X) == np.asarray(y)))
+
+
+def compact_model(model, X_val, y_val, tolerance=0.005, prune_members=True, prune_depth=True,
+                  float32_values=True, keep_importances=True, status_callback=None):
+    """
+    Shrink a fitted tree model in place while validation accuracy stays in tolerance
+
+    Steps, each kept only if accuracy stays within tolerance of the original:
+    dropping trailing ensemble members, collapsing deep subtrees (classifier
+    trees) and float32 leaf values. Thresholds are always snapped to float32
+    and unused node fields zeroed, which never changes a prediction.
+
+    Args:
+        model: Fitted Random Forest, Gradient Boosting or Decision Tree
+        X_val: Preprocessed validation features
+        y_val: Encoded validation labels
+        tolerance: Largest accepted drop in validation accuracy
+        prune_members: Try removing ensemble members
+        prune_depth: Try limiting the tree depth
+        float32_values: Try rounding leaf values to float32
+        keep_importances: Keep the node statistics feature_importances_ needs
+        status_callback: Callback for status messages
+
+    Returns:
+        dict: Size, node count and accuracy before and after, plus the steps taken
+    """
+    import copy
+    from backend.tuning import staged_predictions
+
+    trees = tree_estimators(model)
+    if not trees:
+        raise ValueError(f"{type(model).__name__} has no trees to compact")
+
+    def summary():
+        raw_bytes, compressed_bytes = serialized_size(model, compress_level=1)
+        members = tree_estimators(model)
+        return {
+            'bytes': raw_bytes,
+            'compressed_bytes': compressed_bytes,
+            'n_trees': len(members),
+            'n_nodes': int(sum(tree.tree_.node_count for tree in members)),
+            'max_depth': int(max(tree.tree_.max_depth for tree in members)),
+            'val_accuracy': _accuracy(model, X_val, y_val)
+        }
+
+    before = summary()
+    floor = before['val_accuracy'] - tolerance
+    steps = []
+
+    def status(message):
+        steps.append(message)
+        if status_callback:
+            status_callback(f"Compaction: {message}")
+
+    if prune_members and hasattr(model, 'estimators_') and len(model.estimators_) > 1:
+        n_members = len(model.estimators_)
+        predictions = staged_predictions(model, X_val, range(1, n_members + 1))
+        y_true = np.asarray(y_val)
+        keep = next(n for n in range(1, n_members + 1)
+                    if np.mean(predictions[n] == y_true) >= floor)
+        if keep < n_members:
+            model.estimators_ = model.estimators_[:keep]
+            model.n_estimators = keep
+            if hasattr(model, 'n_estimators_'):
+                model.n_estimators_ = keep
+            if hasattr(model, 'train_score_'):
+                model.train_score_ = model.train_score_[:keep]
+            status(f"kept {keep} of {n_members} ensemble members")
+
+    # Collapsed subtrees take their root's class distribution, which
+    # regression trees (boosting) and already compacted trees do not have
+    prunable = all(tree.tree_.n_classes[0] > 1 and not inner_values_cleared(tree)
+                   for tree in tree_estimators(model))
+    if prune_depth and prunable:
+        depth = max(tree.tree_.max_depth for tree in tree_estimators(model))
+        best = None
+        # Walk down from the full depth and stop at the first depth that costs accuracy
+        for limit in range(depth - 1, 0, -max(1, depth // 8)):
+            candidate = copy.deepcopy(model)
+            for tree in tree_estimators(candidate):
+                compact_tree(tree, max_depth=limit, keep_importances=keep_importances)
+            if _accuracy(candidate, X_val, y_val) < floor:
+                break
+            best = limit
+        if best is not None:
+            for tree in tree_estimators(model):
+                compact_tree(tree, max_depth=best, keep_importances=keep_importances)
+            status(f"limited tree depth from {depth} to {best}")
+
+    if float32_values:
+        candidate = copy.deepcopy(model)
+        for tree in tree_estimators(candidate):
+            compact_tree(tree, float32_values=True, keep_importances=keep_importances)
+        if _accuracy(candidate, X_val, y_val) >= floor:
+            model.__dict__.update(candidate.__dict__)
+            status("rounded leaf values to float32")
+
+    for tree in tree_estimators(model):
+        compact_tree(tree, keep_importances=keep_importances)
+    status("snapped thresholds to float32 and cleared unused node fields")
+
+    after = summary()
+    return {
+        'tolerance': tolerance,
+        'before': before,
+        'after': after,
+        'size_reduction': 1 - after['bytes'] / before['bytes'] if before['bytes'] else 0.0,
+        'compressed_size_reduction': (1 - after['compressed_bytes'] / before['compressed_bytes']
+                                      if before['compressed_bytes'] else 0.0),
+        'accuracy_change': after['val_accuracy'] - before['val_accuracy'],
+        'steps': steps
+    }
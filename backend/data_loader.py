@@ -10,12 +10,18 @@ from sklearn.preprocessing import StandardScaler, LabelEncoder
 import json
 
 
+# Rows used to place the quantile bin edges of each feature
+BIN_SAMPLE_SIZE = 200000
+
+
 class DataLoader:
     """Handles dataset loading and preprocessing"""
     
     def __init__(self):
         self.scaler = StandardScaler()
         self.label_encoders = {}
+        self.fill_values = {}
+        self.bin_edges = None
         self.feature_names = []
         self.target_name = None
         
@@ -47,13 +53,15 @@ class DataLoader:
         except Exception as e:
             raise Exception(f"Error loading data from {file_path}: {str(e)}")
     
-    def preprocess_data(self, data, target_column=None):
+    def preprocess_data(self, data, target_column=None, binned=False):
         """
         Preprocess the data for training
         
         Args:
             data: DataFrame containing the data
             target_column: Name of the target column (if None, assumes last column)
+            binned: Store quantile bin codes (uint8) instead of scaled floats;
+                for tree learners, which only use the order of values
             
         Returns:
             tuple: (X, y) preprocessed features and target
@@ -80,27 +88,135 @@ class DataLoader:
         X = self.encode_categorical_features(X)
         y = self.encode_target(y)
         
-        # Scale numerical features
-        X = self.scale_features(X)
+        # Scale numerical features, or bin them for tree learners
+        if binned:
+            X = self.bin_features(X)
+        else:
+            self.bin_edges = None
+            X = self.scale_features(X)
         
         return X, y
     
     def handle_missing_values(self, data):
         """Handle missing values in the dataset"""
+        # Fill values are kept for every column so transform() can impute new rows
+        self.fill_values = {}
+        
         # For numerical columns, fill with median
         numerical_cols = data.select_dtypes(include=[np.number]).columns
         for col in numerical_cols:
+            self.fill_values[col] = data[col].median()
             if data[col].isnull().any():
-                data[col].fillna(data[col].median(), inplace=True)
+                data[col].fillna(self.fill_values[col], inplace=True)
         
         # For categorical columns, fill with mode
         categorical_cols = data.select_dtypes(include=['object']).columns
         for col in categorical_cols:
+            mode = data[col].mode()
+            self.fill_values[col] = mode[0] if not mode.empty else 'Unknown'
             if data[col].isnull().any():
-                data[col].fillna(data[col].mode()[0] if not data[col].mode().empty else 'Unknown', inplace=True)
+                data[col].fillna(self.fill_values[col], inplace=True)
         
         return data
     
+    def transform(self, data, target_column=None):
+        """
+        Preprocess new rows with the already fitted imputation, encoders and scaler
+        
+        Args:
+            data: DataFrame with the raw feature columns (and optionally the target)
+            target_column: Name of the target column (defaults to the fitted one)
+            
+        Returns:
+            tuple: (X, y) where y is None if the target column is absent
+        """
+        X = pd.DataFrame(self.transform_array(data), columns=self.feature_names,
+                         index=data.index, copy=False)
+        
+        target_column = target_column or self.target_name
+        if target_column not in data.columns:
+            return X, None
+        
+        y = data[target_column]
+        if target_column in self.fill_values:
+            y = y.fillna(self.fill_values[target_column])
+        if 'target' in self.label_encoders:
+            le = self.label_encoders['target']
+            unseen = set(y.unique()) - set(le.classes_)
+            if unseen:
+                raise ValueError(f"Unseen target labels: {sorted(map(str, unseen))}")
+            return X, le.transform(y)
+        return X, y.values
+    
+    def transform_array(self, data, out=None):
+        """
+        Impute, encode and scale (or bin) raw feature columns in one pass
+        
+        Each column is read once and written straight into the output matrix
+        in the order of feature_names, without intermediate DataFrames.
+        
+        Args:
+            data: pandas DataFrame, pyarrow Table/RecordBatch or dict of columns
+            out: Preallocated output array of shape (n_rows, n_features)
+            
+        Returns:
+            ndarray: float64 features, or uint8 bin codes for binned models
+        """
+        if not self.feature_names:
+            raise ValueError("Preprocessing has not been fitted. Call preprocess_data first.")
+        
+        columns = data.column_names if hasattr(data, 'column_names') else list(data.keys())
+        missing = [col for col in self.feature_names if col not in set(columns)]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+        
+        n_rows = data.num_rows if hasattr(data, 'num_rows') else len(data[self.feature_names[0]])
+        dtype = np.uint8 if self.bin_edges is not None else np.float64
+        if out is None:
+            out = np.empty((n_rows, len(self.feature_names)), dtype=dtype)
+        
+        for j, col in enumerate(self.feature_names):
+            values = self._column_values(data, col)
+            fill = self.fill_values.get(col)
+            
+            if col in self.label_encoders:
+                # Unseen categories encode to -1; missing ones take the fill category
+                le = self.label_encoders[col]
+                if values.dtype.kind not in 'OUT':
+                    values = values.astype(str)
+                codes = pd.Categorical(values, categories=le.classes_).codes.astype(np.float64)
+                null = pd.isnull(values)
+                if fill is not None and null.any():
+                    fill_code = np.flatnonzero(le.classes_ == str(fill))
+                    codes[null] = fill_code[0] if len(fill_code) else -1
+                values = codes
+            else:
+                if values.dtype == object:
+                    # Nullable pandas columns hold pd.NA; treat it as missing
+                    values = pd.to_numeric(values, errors='coerce')
+                values = np.asarray(values, dtype=np.float64)
+                if fill is not None and np.isnan(values).any():
+                    values = np.where(np.isnan(values), fill, values)
+            
+            if self.bin_edges is not None:
+                out[:, j] = np.searchsorted(self.bin_edges[col], values, side='right')
+            else:
+                # Same arithmetic as StandardScaler.transform
+                column = out[:, j]
+                np.subtract(values, self.scaler.mean_[j], out=column)
+                np.divide(column, self.scaler.scale_[j], out=column)
+        
+        return out
+    
+    @staticmethod
+    def _column_values(data, col):
+        """Get one column as a NumPy array from a DataFrame, Arrow table or dict"""
+        column = data.column(col) if hasattr(data, 'column_names') else data[col]
+        if hasattr(column, 'to_numpy') and not hasattr(column, 'iloc'):
+            # Arrow arrays: nulls become NaN (numbers) or None (strings)
+            return column.to_numpy(zero_copy_only=False)
+        return np.asarray(column)
+    
     def encode_categorical_features(self, X):
         """Encode categorical features"""
         categorical_cols = X.select_dtypes(include=['object']).columns
@@ -126,6 +242,43 @@ class DataLoader:
         X_scaled = self.scaler.fit_transform(X)
         return pd.DataFrame(X_scaled, columns=X.columns, index=X.index)
     
+    def bin_features(self, X, max_bins=255, random_state=42):
+        """
+        Discretise each feature into at most max_bins quantile bins stored as uint8
+        
+        Features with few distinct values get one bin per value; the others
+        get edges at the quantiles of a row sample. The edges are kept so new
+        rows are binned identically.
+        """
+        if not 2 <= max_bins <= 256:
+            raise ValueError("max_bins must be between 2 and 256")
+        
+        values = X.to_numpy(dtype=np.float64)
+        if len(values) > BIN_SAMPLE_SIZE:
+            rng = np.random.default_rng(random_state)
+            values = values[rng.choice(len(values), BIN_SAMPLE_SIZE, replace=False)]
+        
+        self.bin_edges = {col: self._quantile_edges(values[:, j], max_bins)
+                          for j, col in enumerate(X.columns)}
+        return self.apply_bins(X)
+    
+    @staticmethod
+    def _quantile_edges(values, max_bins):
+        """Bin edges of one feature (at most max_bins - 1 of them)"""
+        values = values[~np.isnan(values)]
+        distinct = np.unique(values)
+        if len(distinct) <= max_bins:
+            return (distinct[:-1] + distinct[1:]) / 2
+        return np.unique(np.quantile(values, np.linspace(0, 1, max_bins + 1)[1:-1]))
+    
+    def apply_bins(self, X):
+        """Map features to their bin codes using the fitted edges"""
+        binned = np.empty(X.shape, dtype=np.uint8)
+        for j, col in enumerate(X.columns):
+            binned[:, j] = np.searchsorted(self.bin_edges[col], X[col].to_numpy(dtype=np.float64),
+                                           side='right')
+        return pd.DataFrame(binned, columns=X.columns, index=X.index)
+    
     def get_data_info(self, data):
         """Get information about the dataset"""
         info = {
@@ -141,3 +294,86 @@ class DataLoader:
     def split_data(self, X, y, test_size=0.2, random_state=42):
         """Split data into training and validation sets"""
         return train_test_split(X, y, test_size=test_size, random_state=random_state)
+    
+    def row_hashes(self, X, y=None):
+        """Hash every row of X (and its label) so duplicate rows can be found"""
+        frame = X if isinstance(X, pd.DataFrame) else pd.DataFrame(X)
+        if y is not None:
+            frame = frame.assign(__target__=np.asarray(y))
+        return pd.util.hash_pandas_object(frame, index=False).values
+    
+    def subsample(self, X, y, target_size, method='balanced', random_state=42):
+        """
+        Draw a small training set for fast iteration
+        
+        Duplicate rows are collapsed first and their counts become sample
+        weights, so every kept row is distinct.
+        
+        Args:
+            X: Preprocessed features
+            y: Encoded target
+            target_size: Number of distinct rows to keep
+            method: 'balanced' (equal rows per class where possible) or
+                'coreset' (rare classes kept whole, the rest sampled
+                proportionally and reweighted to their full class size)
+            random_state: Seed for the row sampling
+            
+        Returns:
+            tuple: (X, y, sample_weight) for the selected rows
+        """
+        if method not in ('balanced', 'coreset'):
+            raise ValueError(f"Unknown subsample method: {method}")
+        if target_size < 1:
+            raise ValueError("target_size must be positive")
+        
+        y = np.asarray(y)
+        _, first, counts = np.unique(self.row_hashes(X, y), return_index=True,
+                                     return_counts=True)
+        order = np.argsort(first)
+        first, counts = first[order], counts[order]
+        labels = y[first]
+        
+        classes, class_sizes = np.unique(labels, return_counts=True)
+        quotas = self._class_quotas(class_sizes, target_size, method)
+        
+        rng = np.random.default_rng(random_state)
+        selected, weights = [], []
+        for label, quota in zip(classes, quotas):
+            members = np.flatnonzero(labels == label)
+            chosen = members if quota >= len(members) else rng.choice(members, quota, replace=False)
+            class_weights = counts[chosen].astype(np.float64)
+            if method == 'coreset':
+                # Let the sampled rows stand in for every row of their class
+                class_weights *= counts[members].sum() / class_weights.sum()
+            selected.append(chosen)
+            weights.append(class_weights)
+        
+        selected = np.concatenate(selected)
+        weights = np.concatenate(weights)
+        order = np.argsort(selected)
+        rows = first[selected[order]]
+        
+        X_sub = X.iloc[rows] if hasattr(X, 'iloc') else X[rows]
+        return X_sub, y[rows], weights[order]
+    
+    @staticmethod
+    def _class_quotas(class_sizes, target_size, method):
+        """Number of distinct rows to keep from each class"""
+        if method == 'balanced':
+            # Water-fill: small classes are taken whole and their unused
+            # share is split among the larger ones
+            quotas = np.zeros(len(class_sizes), dtype=np.int64)
+            remaining = target_size
+            for position, i in enumerate(np.argsort(class_sizes, kind='stable')):
+                quotas[i] = min(class_sizes[i], remaining // (len(class_sizes) - position))
+                remaining -= quotas[i]
+            return quotas
+        
+        # Coreset: every class keeps a floor of rows, the rest of the budget
+        # is shared in proportion to class size
+        floor = np.minimum(class_sizes, max(1, target_size // (2 * len(class_sizes))))
+        extra = class_sizes - floor
+        budget = max(0, target_size - int(floor.sum()))
+        if budget == 0 or extra.sum() == 0:
+            return floor
+        return floor + np.minimum(extra, np.floor(extra / extra.sum() * budget).astype(np.int64))
@@ -0,0 +1,429 @@
+"""
+Distributed Search Module
+Runs hyperparameter candidate fits on worker processes connected over TCP
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import threading
+import warnings
+import subprocess
+from collections import deque
+from multiprocessing.connection import Client, Listener
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.exceptions import FitFailedWarning
+
+from backend.tuning import fit_and_score, fit_and_score_path, take_rows
+
+
+# Environment variable holding the shared secret when it is not passed explicitly
+AUTHKEY_ENV = 'TRAINIT_AUTHKEY'
+
+# Rows per dataset shard message
+SHARD_ROWS = 100000
+
+
+def resolve_authkey(authkey=None):
+    """Get the shared secret as bytes from the argument or the environment"""
+    authkey = authkey or os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        raise ValueError(f"An authkey is required (pass one or set {AUTHKEY_ENV})")
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+def run_task(task, estimator, X, y, sample_weight=None):
+    """
+    Evaluate one candidate group on one fold
+
+    Returns:
+        list: (accuracy, fit_time) per candidate in the group
+    """
+    params_list = task['params_list']
+    if len(params_list) > 1:
+        return fit_and_score_path(estimator, params_list, task['path_param'], X, y,
+                                  task['train_idx'], task['test_idx'], sample_weight)
+    return [fit_and_score(estimator, params_list[0], X, y,
+                          task['train_idx'], task['test_idx'], sample_weight)]
+
+
+def concat_rows(parts):
+    """Concatenate row blocks of DataFrames, Series or arrays"""
+    if parts[0] is None:
+        return None
+    if hasattr(parts[0], 'iloc'):
+        return pd.concat(parts)
+    return np.concatenate(parts)
+
+
+class DatasetStore:
+    """Datasets received by a worker, kept in memory and cached on disk by fingerprint"""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.datasets = {}
+        self.pending = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, fingerprint):
+        return os.path.join(self.cache_dir, f'{fingerprint}.joblib')
+
+    def fingerprints(self):
+        """Fingerprints available without a transfer"""
+        known = set(self.datasets)
+        if self.cache_dir:
+            known.update(name[:-len('.joblib')] for name in os.listdir(self.cache_dir)
+                         if name.endswith('.joblib'))
+        return sorted(known)
+
+    def add_shard(self, message):
+        """Store one shard; the dataset is assembled once every shard arrived"""
+        fingerprint = message['fingerprint']
+        shards = self.pending.setdefault(fingerprint, {})
+        shards[message['index']] = (message['X'], message['y'], message['sample_weight'])
+        if len(shards) < message['count']:
+            return
+
+        ordered = [shards[i] for i in range(message['count'])]
+        dataset = tuple(concat_rows([shard[part] for shard in ordered]) for part in range(3))
+        del self.pending[fingerprint]
+        self.datasets[fingerprint] = dataset
+        if self.cache_dir:
+            from backend.utils import atomic_write
+            atomic_write(self.path(fingerprint), lambda f: joblib.dump(dataset, f))
+
+    def get(self, fingerprint):
+        """Get (X, y, sample_weight) for a fingerprint"""
+        if fingerprint not in self.datasets:
+            if not self.cache_dir or not os.path.exists(self.path(fingerprint)):
+                raise ValueError(f"Dataset {fingerprint} is not available on this worker")
+            self.datasets[fingerprint] = joblib.load(self.path(fingerprint))
+        return self.datasets[fingerprint]
+
+
+def run_worker(address, authkey=None, cache_dir='models/worker_cache', connect_timeout=30.0):
+    """
+    Connect to a coordinator and evaluate tasks until it shuts the worker down
+
+    Args:
+        address: (host, port) of the coordinator
+        authkey: Shared secret (defaults to the TRAINIT_AUTHKEY variable)
+        cache_dir: Directory caching received datasets across sessions
+        connect_timeout: Seconds to keep retrying the initial connection
+    """
+    authkey = resolve_authkey(authkey)
+    deadline = time.time() + connect_timeout
+    while True:
+        try:
+            conn = Client(tuple(address), authkey=authkey)
+            break
+        except (ConnectionRefusedError, OSError):
+            if time.time() > deadline:
+                raise
+            time.sleep(0.5)
+
+    store = DatasetStore(cache_dir)
+    conn.send({'type': 'hello', 'host': socket.gethostname(), 'pid': os.getpid(),
+               'datasets': store.fingerprints()})
+    try:
+        while True:
+            message = conn.recv()
+            if message['type'] == 'shutdown':
+                break
+            if message['type'] == 'shard':
+                store.add_shard(message)
+                continue
+
+            try:
+                X, y, sample_weight = store.get(message['fingerprint'])
+                output = run_task(message, message['estimator'], X, y, sample_weight)
+                conn.send({'type': 'result', 'task_id': message['task_id'], 'output': output})
+            except Exception as e:
+                conn.send({'type': 'error', 'task_id': message['task_id'], 'message': str(e)})
+    except (EOFError, OSError):
+        # Coordinator went away, or dropped this worker after a timeout
+        pass
+    finally:
+        conn.close()
+
+
+def spawn_local_workers(n_workers, address, authkey=None, cache_dir='models/worker_cache'):
+    """
+    Start worker processes on this machine, e.g. for testing
+
+    Returns:
+        list: subprocess.Popen handles of the workers
+    """
+    env = dict(os.environ, **{AUTHKEY_ENV: resolve_authkey(authkey).decode()})
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    command = [sys.executable, '-m', 'backend.distributed', 'worker',
+               '--host', str(address[0]), '--port', str(address[1])]
+    if cache_dir:
+        command += ['--cache-dir', cache_dir]
+    return [subprocess.Popen(command, cwd=root, env=env) for _ in range(n_workers)]
+
+
+class SearchCoordinator:
+    """
+    Hands candidate fits to connected workers and collects their results
+
+    Workers connect over TCP (authenticated with a shared key) and pull one
+    task at a time. Each dataset is sent to a worker in shards the first time
+    one of its tasks needs it; workers cache it by fingerprint. A task held by
+    a worker that disconnects or exceeds task_timeout goes back to the queue,
+    up to max_retries times, after which its candidates score NaN like any
+    failed fit.
+    """
+
+    def __init__(self, address=('127.0.0.1', 0), authkey=None, max_retries=2,
+                 worker_wait=60.0, shard_rows=SHARD_ROWS, task_timeout=3600.0):
+        """
+        Args:
+            address: (host, port) to listen on; port 0 picks a free port
+            authkey: Shared secret (defaults to the TRAINIT_AUTHKEY variable)
+            max_retries: Times a task is re-queued after losing its worker
+            worker_wait: Seconds to wait for a worker before map() gives up
+            shard_rows: Rows per dataset shard message
+            task_timeout: Seconds a worker may take to answer one task before
+                it counts as lost and the task is re-queued (None waits forever)
+        """
+        self.authkey = resolve_authkey(authkey)
+        self.listener = Listener(tuple(address), authkey=self.authkey)
+        self.address = self.listener.address
+        self.max_retries = max_retries
+        self.worker_wait = worker_wait
+        self.shard_rows = shard_rows
+        self.task_timeout = task_timeout
+
+        self.datasets = {}
+        self.queue = deque()
+        self.results = {}
+        self.workers = {}
+        self.condition = threading.Condition()
+        self.next_task_id = 0
+        self.next_worker_id = 0
+        self.closed = False
+        self.lost_workers = 0
+        self.retried_tasks = 0
+
+        self.accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self.accept_thread.start()
+
+    @property
+    def n_workers(self):
+        """Number of connected workers"""
+        with self.condition:
+            return len(self.workers)
+
+    def wait_for_workers(self, n_workers, timeout=None):
+        """Block until n_workers are connected; returns whether they are"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self.condition:
+            while len(self.workers) < n_workers:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            return True
+
+    def register_dataset(self, fingerprint, X, y, sample_weight=None):
+        """Make a dataset available to tasks under its fingerprint"""
+        with self.condition:
+            self.datasets[fingerprint] = (X, y, sample_weight)
+
+    def map(self, estimator, fingerprint, tasks):
+        """
+        Evaluate tasks on the workers
+
+        Args:
+            estimator: Unfitted base estimator
+            fingerprint: Fingerprint of a registered dataset
+            tasks: Dicts with params_list, path_param, train_idx and test_idx
+
+        Returns:
+            list: Output of run_task for each task, in order
+        """
+        if fingerprint not in self.datasets:
+            raise ValueError(f"Dataset {fingerprint} has not been registered")
+
+        with self.condition:
+            task_ids = []
+            for task in tasks:
+                task_id = self.next_task_id
+                self.next_task_id += 1
+                self.queue.append(dict(task, task_id=task_id, fingerprint=fingerprint,
+                                       estimator=estimator, attempts=0))
+                task_ids.append(task_id)
+            self.condition.notify_all()
+
+            idle_since = None
+            while not all(task_id in self.results for task_id in task_ids):
+                if self.workers:
+                    idle_since = None
+                elif idle_since is None:
+                    idle_since = time.time()
+                elif time.time() - idle_since > self.worker_wait:
+                    raise RuntimeError(f"No workers connected to {self.address} "
+                                       f"for {self.worker_wait:.0f}s")
+                self.condition.wait(1.0)
+
+            return [self.results.pop(task_id) for task_id in task_ids]
+
+    def stats(self):
+        """Get worker and retry counts"""
+        with self.condition:
+            return {
+                'workers': len(self.workers),
+                'lost_workers': self.lost_workers,
+                'retried_tasks': self.retried_tasks
+            }
+
+    def close(self):
+        """Shut down the workers and stop listening"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        try:
+            # Unblock accept() with a throwaway connection
+            Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+        self.listener.close()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                if self.closed:
+                    return
+                # Failed handshake (wrong key or port scanner); keep listening
+                continue
+            if self.closed:
+                conn.close()
+                return
+            threading.Thread(target=self._serve_worker, args=(conn,), daemon=True).start()
+
+    def _next_task(self):
+        """Wait for a queued task, or None once the coordinator closes"""
+        with self.condition:
+            while not self.queue and not self.closed:
+                self.condition.wait()
+            if self.closed:
+                return None
+            return self.queue.popleft()
+
+    def _serve_worker(self, conn):
+        """Feed tasks to one worker until it disconnects or the coordinator closes"""
+        try:
+            hello = conn.recv()
+        except (EOFError, OSError):
+            conn.close()
+            return
+
+        with self.condition:
+            worker_id = self.next_worker_id
+            self.next_worker_id += 1
+            self.workers[worker_id] = f"{hello.get('host')}:{hello.get('pid')}"
+            self.condition.notify_all()
+        has_dataset = set(hello.get('datasets', []))
+
+        task = None
+        try:
+            while True:
+                task = self._next_task()
+                if task is None:
+                    conn.send({'type': 'shutdown'})
+                    break
+
+                if task['fingerprint'] not in has_dataset:
+                    self._send_dataset(conn, task['fingerprint'])
+                    has_dataset.add(task['fingerprint'])
+
+                conn.send(dict({key: value for key, value in task.items() if key != 'attempts'},
+                               type='task'))
+                # A hung worker that keeps its connection open must not hold
+                # the task forever; TimeoutError is handled like a disconnect
+                if self.task_timeout is not None and not conn.poll(self.task_timeout):
+                    raise TimeoutError(f"No reply within {self.task_timeout}s")
+                reply = conn.recv()
+                if reply['type'] == 'error':
+                    warnings.warn(f"Task failed on worker {self.workers[worker_id]}: "
+                                  f"{reply['message']}", FitFailedWarning)
+                    output = [(np.nan, 0.0)] * len(task['params_list'])
+                else:
+                    output = reply['output']
+                self._complete(task['task_id'], output)
+                task = None
+        except (EOFError, OSError):
+            # Includes TimeoutError; closing the connection in finally makes
+            # a hung worker exit instead of answering a re-queued task late
+            with self.condition:
+                self.lost_workers += 1
+            if task is not None:
+                self._requeue(task)
+        finally:
+            with self.condition:
+                self.workers.pop(worker_id, None)
+                self.condition.notify_all()
+            conn.close()
+
+    def _send_dataset(self, conn, fingerprint):
+        """Send a dataset to a worker in row shards"""
+        X, y, sample_weight = self.datasets[fingerprint]
+        n_rows = len(y)
+        count = max(1, -(-n_rows // self.shard_rows))
+        for index in range(count):
+            rows = np.arange(index * self.shard_rows, min(n_rows, (index + 1) * self.shard_rows))
+            conn.send({
+                'type': 'shard',
+                'fingerprint': fingerprint,
+                'index': index,
+                'count': count,
+                'X': take_rows(X, rows),
+                'y': take_rows(y, rows),
+                'sample_weight': None if sample_weight is None else sample_weight[rows]
+            })
+
+    def _complete(self, task_id, output):
+        with self.condition:
+            self.results[task_id] = output
+            self.condition.notify_all()
+
+    def _requeue(self, task):
+        """Retry a task whose worker was lost, or fail it after max_retries"""
+        with self.condition:
+            task['attempts'] += 1
+            if task['attempts'] > self.max_retries:
+                warnings.warn(f"Giving up on {task['params_list']} after "
+                              f"{task['attempts']} lost workers", FitFailedWarning)
+                self.results[task['task_id']] = [(np.nan, 0.0)] * len(task['params_list'])
+            else:
+                self.retried_tasks += 1
+                self.queue.appendleft(task)
+            self.condition.notify_all()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TrainIT distributed search worker")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    worker = subparsers.add_parser('worker', help="Connect to a coordinator and run tasks")
+    worker.add_argument('--host', default='127.0.0.1', help="Coordinator host")
+    worker.add_argument('--port', type=int, required=True, help="Coordinator port")
+    worker.add_argument('--authkey', default=None,
+                        help=f"Shared secret (defaults to ${AUTHKEY_ENV})")
+    worker.add_argument('--cache-dir', default='models/worker_cache',
+                        help="Directory caching received datasets")
+    args = parser.parse_args(argv)
+
+    run_worker((args.host, args.port), authkey=args.authkey, cache_dir=args.cache_dir)
+
+
+if __name__ == '__main__':
+    main()
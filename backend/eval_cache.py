@@ -0,0 +1,127 @@
+"""
+Evaluation Cache Module
+Persists cross-validation results of hyperparameter candidates across sessions
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+
+
+class EvaluationCache:
+    """
+    SQLite-backed store of fold scores and fit times per evaluated candidate
+
+    Entries are keyed by dataset fingerprint, CV split, algorithm and a hash of
+    the canonical parameter key, so a search can skip any point it has already
+    measured on the same data and folds.
+    """
+
+    def __init__(self, db_path='models/eval_cache.sqlite', max_age_days=30, max_entries=100000):
+        self.db_path = db_path
+        self.max_age_days = max_age_days
+        self.max_entries = max_entries
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS evaluations (
+                fingerprint TEXT NOT NULL,
+                split_key TEXT NOT NULL,
+                algorithm TEXT NOT NULL,
+                params_hash TEXT NOT NULL,
+                params TEXT NOT NULL,
+                split_scores TEXT NOT NULL,
+                fit_times TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                PRIMARY KEY (fingerprint, split_key, algorithm, params_hash)
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_evaluations_last_used ON evaluations (last_used_at)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def hash_params(key):
+        """Hash a canonical parameter key"""
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get_many(self, fingerprint, split_key, algorithm, keys):
+        """
+        Look up cached results for several candidates
+
+        Args:
+            fingerprint: Dataset fingerprint
+            split_key: Identifier of the CV splitter and its seed
+            algorithm: Estimator name
+            keys: Canonical parameter keys (see utils.params_key)
+
+        Returns:
+            dict: Results for the keys that were found, keyed by parameter key
+        """
+        hashes = {self.hash_params(key): key for key in keys}
+        found = {}
+        query = ("SELECT params_hash, split_scores, fit_times FROM evaluations "
+                 "WHERE fingerprint = ? AND split_key = ? AND algorithm = ? AND params_hash = ?")
+        for params_hash, key in hashes.items():
+            row = self.conn.execute(query, (fingerprint, split_key, algorithm, params_hash)).fetchone()
+            if row is not None:
+                found[key] = {
+                    'split_scores': json.loads(row[1]),
+                    'fit_times': json.loads(row[2]),
+                }
+
+        if found:
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE evaluations SET last_used_at = ? WHERE fingerprint = ? AND split_key = ? "
+                "AND algorithm = ? AND params_hash = ?",
+                [(now, fingerprint, split_key, algorithm, self.hash_params(key)) for key in found]
+            )
+            self.conn.commit()
+        return found
+
+    def put_many(self, fingerprint, split_key, algorithm, results):
+        """Store results (keyed by parameter key) and apply the eviction policy"""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(fingerprint, split_key, algorithm, self.hash_params(key), key,
+              json.dumps(result['split_scores']), json.dumps(result['fit_times']), now, now)
+             for key, result in results.items()]
+        )
+        self.conn.commit()
+        self.evict()
+
+    def evict(self):
+        """Drop entries older than max_age_days and the least recently used beyond max_entries"""
+        if self.max_age_days is not None:
+            cutoff = time.time() - self.max_age_days * 86400
+            self.conn.execute("DELETE FROM evaluations WHERE created_at < ?", (cutoff,))
+
+        if self.max_entries is not None:
+            self.conn.execute("""
+                DELETE FROM evaluations WHERE rowid IN (
+                    SELECT rowid FROM evaluations ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+    def clear(self):
+        """Remove all cached evaluations"""
+        self.conn.execute("DELETE FROM evaluations")
+        self.conn.commit()
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
@@ -0,0 +1,252 @@
+"""
+Footprint Module
+Measures the serialised size and in-memory footprint of fitted models
+
+Sizes are counted by streaming the pickle through a writer that only adds
+up byte counts, so inspecting a large model never holds a second copy of
+it in memory.
+"""
+
+import sys
+import mmap
+import zlib
+import types
+import pickle
+
+import numpy as np
+
+
+# Objects that belong to the interpreter rather than to a model
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                  types.MethodType)
+
+
+class ByteCounter:
+    """
+    Write-only file object that counts bytes instead of storing them
+
+    With a compression level, the stream is also fed through zlib and the
+    compressed length is counted; only zlib's window is kept in memory.
+    """
+
+    def __init__(self, compress_level=None):
+        self.bytes = 0
+        self.compressed_bytes = None if compress_level is None else 0
+        self._compressor = None if compress_level is None else zlib.compressobj(compress_level)
+
+    def write(self, data):
+        length = memoryview(data).nbytes
+        self.bytes += length
+        if self._compressor is not None:
+            self.compressed_bytes += len(self._compressor.compress(data))
+        return length
+
+    def close(self):
+        """Flush the compressor so compressed_bytes is final"""
+        if self._compressor is not None:
+            self.compressed_bytes += len(self._compressor.flush())
+            self._compressor = None
+
+
+def serialized_size(obj, compress_level=None):
+    """
+    Size of an object's pickle, counted without building it
+
+    Args:
+        obj: Any picklable object
+        compress_level: Also count the zlib-compressed size at this level
+
+    Returns:
+        tuple: (bytes, compressed bytes or None)
+    """
+    counter = ByteCounter(compress_level)
+    pickle.Pickler(counter, protocol=pickle.HIGHEST_PROTOCOL).dump(obj)
+    counter.close()
+    return counter.bytes, counter.compressed_bytes
+
+
+def _children(obj):
+    """Objects referenced by obj that count towards its footprint"""
+    if isinstance(obj, dict):
+        return list(obj.keys()) + list(obj.values())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return list(obj)
+    if isinstance(obj, np.ndarray):
+        return list(obj.ravel()) if obj.dtype.hasobject else []
+    children = []
+    if hasattr(obj, '__dict__'):
+        children.append(obj.__dict__)
+    elif not isinstance(obj, (str, bytes, bytearray, int, float, complex, bool, mmap.mmap)):
+        # Extension types such as sklearn's Tree expose their arrays through
+        # __getstate__; the arrays are views of the object's own memory
+        try:
+            state = obj.__getstate__()
+        except (AttributeError, TypeError):
+            state = None
+        if isinstance(state, dict):
+            children.extend(state.values())
+    return children
+
+
+def _footprint(obj, seen):
+    """
+    Walk obj's object graph, counting each object and each buffer once
+
+    Returns:
+        tuple: (bytes held in process memory, bytes of memory-mapped files)
+    """
+    memory = mapped = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SKIPPED_TYPES):
+            continue
+        seen[id(item)] = item  # keeps the object alive so its id is not reused
+
+        # For arrays, getsizeof covers the data only when the array owns it
+        memory += sys.getsizeof(item)
+        if isinstance(item, np.ndarray) and item.base is not None:
+            base = item.base
+            if isinstance(base, memoryview):
+                base = base.obj
+            if isinstance(base, np.ndarray):
+                stack.append(base)
+            elif isinstance(base, mmap.mmap):
+                key = ('mapped', id(base), item.__array_interface__['data'][0])
+                if key not in seen:
+                    seen[key] = base
+                    mapped += item.nbytes
+            elif not isinstance(base, (bytes, bytearray)):
+                # Memory owned by a foreign object (e.g. a tree's node buffer)
+                key = ('buffer', item.__array_interface__['data'][0], item.nbytes)
+                if key not in seen:
+                    seen[key] = base
+                    memory += item.nbytes
+            else:
+                stack.append(base)
+        stack.extend(_children(item))
+    return memory, mapped
+
+
+def memory_footprint(obj):
+    """
+    In-memory size of an object and everything it references
+
+    Arrays sharing a buffer are counted once. Arrays backed by a memory map
+    (a lazily loaded artifact) are reported separately: their pages are
+    shared with the OS cache and only resident once touched.
+
+    Returns:
+        dict: 'memory_bytes' and 'mapped_bytes'
+    """
+    memory, mapped = _footprint(obj, {})
+    return {'memory_bytes': memory, 'mapped_bytes': mapped}
+
+
+def _array_summary(arr):
+    arr = np.asarray(arr)
+    return {'shape': list(arr.shape), 'dtype': str(arr.dtype), 'bytes': int(arr.nbytes)}
+
+
+def model_details(model):
+    """
+    Model-specific size figures: trees, support vectors, coefficient matrices
+
+    Pipelines (such as the approximate-kernel SVM) report one entry per step.
+    """
+    from backend.compaction import tree_estimators
+
+    if hasattr(model, 'steps'):
+        return {'steps': {name: model_details(step) for name, step in model.steps}}
+
+    details = {'estimator': type(model).__name__}
+    trees = tree_estimators(model)
+    if trees:
+        tree_bytes = [serialized_size(tree)[0] for tree in trees]
+        details['trees'] = {
+            'n_trees': len(trees),
+            'n_nodes': int(sum(tree.tree_.node_count for tree in trees)),
+            'max_depth': int(max(tree.tree_.max_depth for tree in trees)),
+            'bytes_per_tree': int(np.mean(tree_bytes)),
+            'largest_tree_bytes': int(max(tree_bytes))
+        }
+    if hasattr(model, 'support_vectors_'):
+        details['support_vectors'] = dict(_array_summary(model.support_vectors_),
+                                          n_support_vectors=int(len(model.support_vectors_)),
+                                          per_class=np.asarray(model.n_support_).tolist())
+        details['dual_coef'] = _array_summary(model.dual_coef_)
+    if hasattr(model, 'coef_') and not hasattr(model, 'support_vectors_'):
+        details['coef'] = _array_summary(model.coef_)
+        details['intercept'] = _array_summary(model.intercept_)
+    if hasattr(model, 'coefs_'):
+        details['layers'] = [_array_summary(weights) for weights in model.coefs_]
+        details['n_parameters'] = int(sum(np.size(w) for w in model.coefs_)
+                                      + sum(np.size(b) for b in model.intercepts_))
+    if hasattr(model, 'components_'):
+        details['components'] = _array_summary(model.components_)
+    return details
+
+
+def inspect_model(model, compress_level=1):
+    """
+    Serialised size, in-memory footprint and per-component breakdown of a model
+
+    Components are the model's attributes (estimators_, tree_, coef_, ...),
+    largest first; memory shared between attributes is attributed to the
+    first one that references it.
+
+    Args:
+        model: Fitted estimator
+        compress_level: zlib level for the compressed size, or None to skip it
+
+    Returns:
+        dict: Totals, 'components' and model-specific 'details'
+    """
+    serialized_bytes, compressed_bytes = serialized_size(model, compress_level)
+    seen = {id(model): model}
+    components = []
+    for name, value in vars(model).items():
+        memory, mapped = _footprint(value, seen)
+        components.append({
+            'name': name,
+            'serialized_bytes': serialized_size(value)[0],
+            'memory_bytes': memory,
+            'mapped_bytes': mapped
+        })
+    components.sort(key=lambda c: c['serialized_bytes'], reverse=True)
+
+    return {
+        'serialized_bytes': serialized_bytes,
+        'compressed_bytes': compressed_bytes,
+        'memory_bytes': (sys.getsizeof(model) + sys.getsizeof(vars(model))
+                         + sum(c['memory_bytes'] for c in components)),
+        'mapped_bytes': sum(c['mapped_bytes'] for c in components),
+        'components': components,
+        'details': model_details(model)
+    }
+
+
+def inspect_artifact(filepath):
+    """
+    Size breakdown of a saved artifact, read from its header alone
+
+    Returns:
+        dict: File size, compression and the stored size of every section
+            and of the array blocks
+    """
+    import os
+    from backend.artifact import read_header
+
+    header = read_header(filepath)
+    blocks = header['blocks']
+    return {
+        'file_bytes': os.path.getsize(filepath),
+        'compression': header['compression'],
+        'sections': {name: {'bytes': entry['length'], 'raw_bytes': entry['raw_length']}
+                     for name, entry in header['sections'].items()},
+        'blocks': {
+            'count': len(blocks),
+            'bytes': sum(entry['length'] for entry in blocks),
+            'raw_bytes': sum(entry['raw_length'] for entry in blocks)
+        }
+    }
@@ -0,0 +1,117 @@
+"""
+Kernel Cache Module
+Reuses SVM kernel matrices across hyperparameter candidates
+"""
+
+from collections import OrderedDict
+
+from sklearn.metrics.pairwise import (linear_kernel, polynomial_kernel,
+                                      rbf_kernel, sigmoid_kernel)
+
+
+# Kernels that SVC can be given as precomputed Gram matrices
+PRECOMPUTABLE_KERNELS = ('linear', 'rbf', 'poly', 'sigmoid')
+
+
+def resolve_gamma(gamma, X):
+    """Resolve 'scale'/'auto' to the value SVC would use when fitted on X"""
+    if gamma == 'scale':
+        variance = X.var()
+        return 1.0 / (X.shape[1] * variance) if variance != 0 else 1.0
+    if gamma == 'auto':
+        return 1.0 / X.shape[1]
+    return gamma
+
+
+def kernel_key(settings):
+    """Identify the kernel matrix implied by a set of SVC parameters"""
+    kernel = settings['kernel']
+    if kernel == 'linear':
+        return (kernel,)
+    if kernel == 'rbf':
+        return (kernel, settings['gamma'])
+    return (kernel, settings['gamma'], settings['degree'], settings['coef0'])
+
+
+def compute_kernel(X, Y, settings, gamma):
+    """Compute the kernel between the rows of X and Y"""
+    kernel = settings['kernel']
+    if kernel == 'linear':
+        return linear_kernel(X, Y)
+    if kernel == 'rbf':
+        return rbf_kernel(X, Y, gamma=gamma)
+    if kernel == 'poly':
+        return polynomial_kernel(X, Y, degree=settings['degree'], gamma=gamma,
+                                 coef0=settings['coef0'])
+    return sigmoid_kernel(X, Y, gamma=gamma, coef0=settings['coef0'])
+
+
+class KernelCache:
+    """
+    LRU cache of per-fold (train, test) kernel matrices within a memory budget
+
+    Candidates that differ only in C (or other non-kernel parameters) share
+    one kernel computation per fold. The cached arrays are handed to joblib
+    workers, which memory-map them from shared storage instead of copying.
+    """
+
+    def __init__(self, max_bytes=1024 ** 3):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def fold_kernels(self, settings, fold, X_train, X_test):
+        """
+        Get the (K_train, K_test) matrices for one fold
+
+        Args:
+            settings: Full SVC parameters (estimator defaults plus candidate)
+            fold: Fold index
+            X_train: Callable returning the fold's training rows as an array
+            X_test: Callable returning the fold's test rows as an array
+
+        Returns:
+            tuple: (K_train, K_test), or None if the kernel cannot be
+                precomputed or does not fit in the budget
+        """
+        if settings['kernel'] not in PRECOMPUTABLE_KERNELS:
+            return None
+
+        key = (kernel_key(settings), fold)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+        X_fit = X_train()
+        X_eval = X_test()
+        required = (len(X_fit) + len(X_eval)) * len(X_fit) * 8
+        if required > self.max_bytes:
+            return None
+
+        while self.entries and self.nbytes + required > self.max_bytes:
+            _, (K_train, K_test) = self.entries.popitem(last=False)
+            self.nbytes -= K_train.nbytes + K_test.nbytes
+
+        self.misses += 1
+        gamma = resolve_gamma(settings['gamma'], X_fit)
+        kernels = (compute_kernel(X_fit, X_fit, settings, gamma),
+                   compute_kernel(X_eval, X_fit, settings, gamma))
+        self.entries[key] = kernels
+        self.nbytes += required
+        return kernels
+
+    def stats(self):
+        """Get hit/miss counts and the current cache size"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'cached_mb': round(self.nbytes / 1024 ** 2, 2)
+        }
+
+    def clear(self):
+        """Drop all cached matrices"""
+        self.entries.clear()
+        self.nbytes = 0
@@ -0,0 +1,212 @@
+"""
+Metrics Module
+Derives classification metrics from a single confusion matrix
+"""
+
+import numpy as np
+
+
+# Non-negative integer labels are counted directly without sorting while the
+# resulting (max label + 1)^2 matrix stays at most this many cells
+MAX_DENSE_CELLS = 1 << 20
+
+
+class ConfusionAccumulator:
+    """
+    Confusion matrix built with one bincount per chunk of predictions
+
+    Chunks may contain different subsets of labels; the matrix grows to the
+    sorted union of every label seen, matching sklearn's confusion_matrix.
+    All metrics are then derived from the matrix with vectorized NumPy.
+    """
+
+    def __init__(self):
+        self.labels = None
+        self.matrix = None
+
+    def update(self, y_true, y_pred):
+        """Add a chunk of true and predicted labels"""
+        y_true = np.asarray(y_true).ravel()
+        y_pred = np.asarray(y_pred).ravel()
+        if len(y_true) != len(y_pred):
+            raise ValueError(f"Found {len(y_true)} true labels but {len(y_pred)} predictions")
+        if len(y_true) == 0:
+            return self
+
+        if self._is_dense(y_true, y_pred):
+            # Encoded targets: use the label values themselves as indices
+            y_true = y_true.astype(np.int64, copy=False)
+            y_pred = y_pred.astype(np.int64, copy=False)
+            k = int(max(y_true.max(), y_pred.max())) + 1
+            counts = np.bincount(y_true * k + y_pred, minlength=k * k).reshape(k, k)
+            labels = np.flatnonzero(counts.sum(axis=0) + counts.sum(axis=1))
+            counts = counts[np.ix_(labels, labels)]
+        else:
+            labels, inverse = np.unique(np.concatenate([y_true, y_pred]), return_inverse=True)
+            inverse = inverse.ravel()
+            k = len(labels)
+            n = len(y_true)
+            counts = np.bincount(inverse[:n] * k + inverse[n:], minlength=k * k).reshape(k, k)
+
+        self._merge(labels, counts)
+        return self
+
+    @staticmethod
+    def _is_dense(y_true, y_pred):
+        # The dense matrix is sized by the largest label, not by how many
+        # labels occur; sparse large labels go through np.unique instead
+        if not all(values.dtype.kind in 'iu' and values.min() >= 0 for values in (y_true, y_pred)):
+            return False
+        k = int(max(y_true.max(), y_pred.max())) + 1
+        return k * k <= MAX_DENSE_CELLS
+
+    def _merge(self, labels, counts):
+        """Add counts for the given labels, growing the label set if needed"""
+        counts = counts.astype(np.int64, copy=False)
+        if self.labels is None:
+            self.labels, self.matrix = labels, counts.copy()
+            return
+        if len(labels) == len(self.labels) and np.array_equal(labels, self.labels):
+            self.matrix += counts
+            return
+
+        merged = np.union1d(self.labels, labels)
+        matrix = np.zeros((len(merged), len(merged)), dtype=np.int64)
+        old = np.searchsorted(merged, self.labels)
+        new = np.searchsorted(merged, labels)
+        matrix[np.ix_(old, old)] += self.matrix
+        matrix[np.ix_(new, new)] += counts
+        self.labels, self.matrix = merged, matrix
+
+    def per_class(self):
+        """
+        Get per-class precision, recall, F1 and support
+
+        Undefined ratios (no predictions or no support) are 0, like
+        sklearn's zero_division=0.
+        """
+        if self.matrix is None:
+            raise ValueError("No predictions have been accumulated")
+        return per_class_rates(self.matrix)
+
+    def bootstrap(self, n_bootstrap=200, confidence=0.95, random_state=42):
+        """
+        Get bootstrap confidence intervals for accuracy and weighted metrics
+
+        Resampling n prediction pairs with replacement is the same as drawing
+        the cells of the confusion matrix from a multinomial, so every
+        replicate is generated directly as a matrix without touching the rows.
+
+        Returns:
+            dict: (lower, upper) bounds keyed by metric name
+        """
+        if self.matrix is None:
+            raise ValueError("No predictions have been accumulated")
+
+        total = int(self.matrix.sum())
+        k = len(self.labels)
+        rng = np.random.default_rng(random_state)
+        samples = rng.multinomial(total, self.matrix.ravel() / total, size=n_bootstrap)
+        samples = samples.reshape(n_bootstrap, k, k)
+
+        precision, recall, f1, support = per_class_rates(samples)
+        values = {
+            'accuracy': np.trace(samples, axis1=1, axis2=2) / total,
+            'precision': (precision * support).sum(axis=1) / total,
+            'recall': (recall * support).sum(axis=1) / total,
+            'f1': (f1 * support).sum(axis=1) / total,
+        }
+
+        tail = (1 - confidence) / 2 * 100
+        return {name: tuple(float(bound) for bound in np.percentile(metric, [tail, 100 - tail]))
+                for name, metric in values.items()}
+
+    def metrics(self):
+        """
+        Get accuracy, weighted precision/recall/F1 and the confusion matrix
+
+        Returns:
+            dict: Metrics computed from the accumulated confusion matrix
+        """
+        precision, recall, f1, support = self.per_class()
+        total = support.sum()
+
+        def weighted(values):
+            return float(np.dot(values, support) / total) if total > 0 else 0.0
+
+        return {
+            'accuracy': float(np.trace(self.matrix) / self.matrix.sum()),
+            'precision': weighted(precision),
+            'recall': weighted(recall),
+            'f1': weighted(f1),
+            'confusion_matrix': self.matrix.tolist(),
+        }
+
+    def report(self, digits=2):
+        """Format a text report in the layout of sklearn's classification_report"""
+        precision, recall, f1, support = self.per_class()
+        total = int(support.sum())
+        target_names = [str(label) for label in self.labels]
+        headers = ["precision", "recall", "f1-score", "support"]
+        width = max(max(len(name) for name in target_names), len("weighted avg"), digits)
+
+        head_fmt = "{:>{width}s} " + " {:>9}" * len(headers)
+        row_fmt = "{:>{width}s} " + " {:>9.{digits}f}" * 3 + " {:>9}\n"
+
+        report = head_fmt.format("", *headers, width=width) + "\n\n"
+        for row in zip(target_names, precision, recall, f1, support):
+            report += row_fmt.format(*row, width=width, digits=digits)
+        report += "\n"
+
+        accuracy_fmt = "{:>{width}s} " + " {:>9.{digits}}" * 2 + " {:>9.{digits}f}" + " {:>9}\n"
+        report += accuracy_fmt.format("accuracy", "", "", np.trace(self.matrix) / total, total,
+                                      width=width, digits=digits)
+
+        macro = [values.mean() for values in (precision, recall, f1)]
+        report += row_fmt.format("macro avg", *macro, total, width=width, digits=digits)
+        weighted = [np.dot(values, support) / total for values in (precision, recall, f1)]
+        report += row_fmt.format("weighted avg", *weighted, total, width=width, digits=digits)
+        return report
+
+
+def per_class_rates(matrix):
+    """
+    Per-class precision, recall, F1 and support of one or more confusion matrices
+
+    Args:
+        matrix: Array of shape (..., k, k) with true labels along rows
+
+    Returns:
+        tuple: (precision, recall, f1, support), each of shape (..., k)
+    """
+    tp = np.diagonal(matrix, axis1=-2, axis2=-1).astype(np.float64)
+    predicted = matrix.sum(axis=-2)
+    support = matrix.sum(axis=-1)
+    fp = predicted - tp
+    fn = support - tp
+
+    precision = np.divide(tp, predicted, out=np.zeros_like(tp), where=predicted > 0)
+    recall = np.divide(tp, support, out=np.zeros_like(tp), where=support > 0)
+    f1_denominator = 2 * tp + fp + fn
+    f1 = np.divide(2 * tp, f1_denominator, out=np.zeros_like(tp), where=f1_denominator > 0)
+    return precision, recall, f1, support
+
+
+def classification_metrics(y_true, y_pred, include_report=False):
+    """
+    Compute all classification metrics from one confusion matrix
+
+    Args:
+        y_true: True labels
+        y_pred: Predicted labels
+        include_report: Also return the formatted classification report
+
+    Returns:
+        dict: accuracy, weighted precision/recall/f1, confusion_matrix
+            (and classification_report when requested)
+    """
+    accumulator = ConfusionAccumulator().update(y_true, y_pred)
+    results = accumulator.metrics()
+    if include_report:
+        results['classification_report'] = accumulator.report()
+    return results
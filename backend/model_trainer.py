@@ -6,42 +6,149 @@ Handles model training with various algorithms
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.svm import SVC
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.pipeline import Pipeline
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.neural_network import MLPClassifier
-from sklearn.model_selection import GridSearchCV, cross_val_score
-from sklearn.metrics import (accuracy_score, precision_score, recall_score, 
-                            f1_score, confusion_matrix, classification_report)
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid, cross_val_score, train_test_split
+from backend.kernel_cache import KernelCache
+from backend.metrics import ConfusionAccumulator, classification_metrics
+from backend.resources import ResourceConfig, apply_estimator_jobs, estimate_worker_bytes
+from backend.tuning import HyperparameterSearch, sample_weight_params
+from backend.utils import params_key
+import itertools
 import joblib
 import time
 
 
+# Source of ModelTrainer.model_version; unique across trainers in the process
+_model_versions = itertools.count(1)
+
+# Algorithms whose fitting can be split into checkpointed increments
+ENSEMBLE_ALGORITHMS = ('Random Forest', 'Gradient Boosting')
+
+# Algorithms that only use the order of feature values and can train on bin codes
+TREE_ALGORITHMS = ('Random Forest', 'Gradient Boosting', 'Decision Tree')
+
+
 class ModelTrainer:
     """Handles model training and evaluation"""
     
-    def __init__(self, algorithm='Random Forest', auto_tune=False):
+    # Number of checkpoints written while growing an ensemble or training an MLP
+    CHECKPOINT_STEPS = 10
+    
+    # Row count above which svm_engine='auto' switches to the approximate kernel
+    APPROX_SVM_THRESHOLD = 50000
+    
+    def __init__(self, algorithm='Random Forest', auto_tune=False, checkpoint=None,
+                 eval_cache=None, dataset_fingerprint=None, skip_cv=False,
+                 train_eval_size=None, resources=None, svm_engine='auto',
+                 svm_approximation='nystroem', approx_svm_threshold=APPROX_SVM_THRESHOLD,
+                 search_executor=None):
         self.algorithm = algorithm
         self.auto_tune = auto_tune
+        self.svm_engine = svm_engine
+        self.svm_approximation = svm_approximation
+        self.approx_svm_threshold = approx_svm_threshold
+        self.approximate_svm = svm_engine == 'approximate'
+        self.skip_cv = skip_cv
+        self.train_eval_size = train_eval_size
+        self.resources = resources or ResourceConfig()
+        self.search_executor = search_executor
+        self.resource_usage = {}
+        self.checkpoint = checkpoint
+        self.eval_cache = eval_cache
+        self.dataset_fingerprint = dataset_fingerprint
+        self.sample_weight = None
         self.model = None
         self.best_params = None
+        self.cv_results = None
+        self.cache_stats = None
+        self.kernel_cache_stats = None
         self.training_history = []
         self.is_training = False
+    
+    @property
+    def model(self):
+        """The fitted estimator; a deferred artifact section is loaded on first access"""
+        if getattr(self, '_model_loader', None) is not None:
+            loader, self._model_loader = self._model_loader, None
+            self._model = loader()
+        return self._model
+    
+    @model.setter
+    def model(self, value):
+        self._model_loader = None
+        self._model = value
+        self.model_version = next(_model_versions)
+    
+    def defer_model(self, loader):
+        """Set a callable that loads the model the first time it is needed"""
+        self._model_loader = loader
+        self._model = None
+        self.model_version = next(_model_versions)
         
     def get_model(self, **params):
         """Get model instance based on algorithm"""
+        # Factories so that only the selected estimator receives params;
+        # caller params override the defaults
         models = {
-            'Random Forest': RandomForestClassifier(random_state=42, **params),
-            'Gradient Boosting': GradientBoostingClassifier(random_state=42, **params),
-            'Neural Network': MLPClassifier(random_state=42, max_iter=1000, **params),
-            'Support Vector Machine': SVC(random_state=42, **params),
-            'Logistic Regression': LogisticRegression(random_state=42, max_iter=1000, **params),
-            'Decision Tree': DecisionTreeClassifier(random_state=42, **params)
+            'Random Forest': lambda: RandomForestClassifier(**{'random_state': 42, **params}),
+            'Gradient Boosting': lambda: GradientBoostingClassifier(**{'random_state': 42, **params}),
+            'Neural Network': lambda: MLPClassifier(**{'random_state': 42, 'max_iter': 1000,
+                                                       **params}),
+            'Support Vector Machine': lambda: (self.get_approximate_svm(**params)
+                                               if self.approximate_svm
+                                               else SVC(**{'random_state': 42, **params})),
+            'Logistic Regression': lambda: LogisticRegression(**{'random_state': 42, 'max_iter': 1000,
+                                                                 **params}),
+            'Decision Tree': lambda: DecisionTreeClassifier(**{'random_state': 42, **params})
         }
         
-        return models.get(self.algorithm, RandomForestClassifier(random_state=42))
+        factory = models.get(self.algorithm)
+        if factory is None:
+            return RandomForestClassifier(random_state=42)
+        return factory()
+    
+    def get_approximate_svm(self, **params):
+        """
+        Get a linear SVM on approximate kernel features
+        
+        Nystroem (or random Fourier) features followed by a hinge-loss SGD
+        classifier scale linearly in the number of rows, unlike the exact SVC.
+        """
+        if self.svm_approximation == 'rff':
+            features = RBFSampler(gamma=0.1, n_components=300, random_state=42)
+        else:
+            features = Nystroem(kernel='rbf', n_components=300, random_state=42)
+        
+        model = Pipeline([
+            ('kernel', features),
+            ('svm', SGDClassifier(loss='hinge', alpha=1e-4, max_iter=1000, tol=1e-3,
+                                  random_state=42))
+        ])
+        return model.set_params(**params)
+    
+    def resolve_svm_engine(self, n_samples):
+        """Decide between the exact and the approximate-kernel SVM"""
+        if self.svm_engine == 'auto':
+            self.approximate_svm = n_samples > self.approx_svm_threshold
+        else:
+            self.approximate_svm = self.svm_engine == 'approximate'
+        return self.approximate_svm
     
     def get_param_grid(self):
         """Get hyperparameter grid for tuning"""
+        if self.algorithm == 'Support Vector Machine' and self.approximate_svm:
+            return {
+                'kernel__n_components': [100, 300, 1000],
+                # Nystroem treats None as 1 / n_features; RBFSampler needs a number
+                'kernel__gamma': [0.01, 0.1] if self.svm_approximation == 'rff' else [None, 0.1],
+                'svm__alpha': [1e-5, 1e-4, 1e-3]
+            }
+        
         param_grids = {
             'Random Forest': {
                 'n_estimators': [50, 100, 200],
@@ -79,7 +186,8 @@ class ModelTrainer:
     
     def train(self, X_train, y_train, X_val=None, y_val=None, 
               epochs=10, batch_size=32, learning_rate=0.001, 
-              progress_callback=None, status_callback=None):
+              progress_callback=None, status_callback=None,
+              sample_weight=None, model_params=None):
         """
         Train the model
         
@@ -93,11 +201,14 @@ class ModelTrainer:
             learning_rate: Learning rate
             progress_callback: Callback for progress updates
             status_callback: Callback for status messages
+            sample_weight: Row weights, e.g. duplicate counts of a subsample
+            model_params: Fixed hyperparameters used when not auto-tuning
             
         Returns:
             dict: Training results
         """
         self.is_training = True
+        self.sample_weight = sample_weight
         start_time = time.time()
         
         if status_callback:
@@ -107,11 +218,19 @@ class ModelTrainer:
         params = {}
         if self.algorithm == 'Neural Network':
             params['learning_rate_init'] = learning_rate
+        if model_params:
+            params.update(model_params)
+            self.best_params = dict(model_params)
+        
+        if self.algorithm == 'Support Vector Machine' and self.resolve_svm_engine(len(y_train)):
+            if status_callback:
+                status_callback(f"Using approximate-kernel SVM ({self.svm_approximation}) "
+                                f"for {len(y_train)} rows")
         
         if self.auto_tune:
             if status_callback:
                 status_callback("Performing hyperparameter tuning...")
-            self.model = self.auto_tune_model(X_train, y_train, progress_callback)
+            self.model = self.auto_tune_model(X_train, y_train, progress_callback, status_callback)
         else:
             self.model = self.get_model(**params)
             
@@ -134,9 +253,9 @@ class ModelTrainer:
                     time.sleep(0.1)  # Simulate training time
             
             # Actual model training
-            self.model.fit(X_train, y_train)
+            self.model = self.fit_estimator(self.model, X_train, y_train, status_callback)
         
-        if not self.is_training:
+        if not self.is_training or self.model is None:
             return None
         
         if progress_callback:
@@ -153,71 +272,389 @@ class ModelTrainer:
         results['algorithm'] = self.algorithm
         results['auto_tuned'] = self.auto_tune
         
+        if self.algorithm == 'Support Vector Machine':
+            results['svm_engine'] = 'approximate' if self.approximate_svm else 'exact'
+        
         if self.best_params:
             results['best_params'] = self.best_params
         
+        if self.cache_stats is not None:
+            results['eval_cache'] = self.cache_stats
+        
+        if self.kernel_cache_stats is not None:
+            results['kernel_cache'] = self.kernel_cache_stats
+        
+        results['resources'] = self.resource_usage
+        
         if status_callback:
             status_callback("Training completed successfully!")
         
         return results
     
-    def auto_tune_model(self, X_train, y_train, progress_callback=None):
+    def auto_tune_model(self, X_train, y_train, progress_callback=None, status_callback=None):
         """Perform automatic hyperparameter tuning"""
         base_model = self.get_model()
         param_grid = self.get_param_grid()
         
         if not param_grid:
-            return base_model.fit(X_train, y_train)
+            return self.fit_estimator(base_model, X_train, y_train, status_callback)
+        
+        n_candidates = len(ParameterGrid(param_grid))
+        allocation = self.allocate_resources('search', n_candidates * 3, X_train)
+        apply_estimator_jobs(base_model, allocation)
         
-        grid_search = GridSearchCV(
+        kernel_cache = None
+        if (self.algorithm == 'Support Vector Machine' and not self.approximate_svm
+                and self.search_executor is None):
+            # Candidates differing only in C share one kernel matrix per fold
+            kernel_cache = KernelCache(max_bytes=self.kernel_cache_budget())
+        
+        search = HyperparameterSearch(
             base_model,
             param_grid,
             cv=3,
-            scoring='accuracy',
-            n_jobs=-1,
-            verbose=0
+            n_jobs=allocation['outer_jobs'],
+            checkpoint=self.checkpoint,
+            cache=self.eval_cache,
+            fingerprint=self.dataset_fingerprint,
+            kernel_cache=kernel_cache,
+            executor=self.search_executor
         )
         
-        grid_search.fit(X_train, y_train)
+        if self.checkpoint is not None and self.checkpoint.completed_candidates() and status_callback:
+            status_callback(f"Resuming search: {len(self.checkpoint.completed_candidates())} "
+                            f"candidates already evaluated")
+        
+        def search_progress(fraction):
+            if progress_callback:
+                progress_callback(int(fraction * 60))
+        
+        with self.resources.limit(allocation):
+            search = search.fit(X_train, y_train, progress_callback=search_progress,
+                                should_stop=lambda: not self.is_training,
+                                sample_weight=self.sample_weight)
+        if search is None:
+            return None
         
-        self.best_params = grid_search.best_params_
+        self.best_params = search.best_params_
+        self.cv_results = search.cv_results_
+        if self.search_executor is not None:
+            self.resource_usage['distributed'] = self.search_executor.stats()
+        if kernel_cache is not None:
+            self.kernel_cache_stats = kernel_cache.stats()
+            kernel_cache.clear()
+        if self.eval_cache is not None:
+            self.cache_stats = {'hits': search.cache_hits_, 'misses': search.cache_misses_}
+            if status_callback:
+                status_callback(f"Evaluation cache: {search.cache_hits_} hits, "
+                                f"{search.cache_misses_} misses")
         
         if progress_callback:
             progress_callback(70)
         
-        return grid_search.best_estimator_
+        if status_callback:
+            status_callback("Refitting best configuration...")
+        
+        return self.fit_estimator(self.get_model(**self.best_params), X_train, y_train, status_callback)
+    
+    def kernel_cache_budget(self):
+        """Memory given to the tuning kernel cache of the exact SVM"""
+        memory_bytes = self.resources.memory_bytes
+        return memory_bytes // 4 if memory_bytes else 1024 ** 3
+    
+    def allocate_resources(self, phase, n_tasks, X_train):
+        """Split the resource budget for a phase and record the allocation"""
+        allocation = self.resources.allocate(n_tasks=n_tasks,
+                                             bytes_per_worker=estimate_worker_bytes(X_train))
+        self.resource_usage[phase] = allocation
+        return allocation
+    
+    def fit_estimator(self, model, X_train, y_train, status_callback=None):
+        """Fit a single model using the whole core budget"""
+        allocation = self.allocate_resources('fit', 1, X_train)
+        apply_estimator_jobs(model, allocation)
+        
+        with self.resources.limit(allocation):
+            if self.checkpoint is None:
+                return model.fit(X_train, y_train, **self.fit_params(model))
+            return self._fit_with_checkpoints(model, X_train, y_train, status_callback)
+    
+    def _fit_with_checkpoints(self, model, X_train, y_train, status_callback=None):
+        """
+        Fit a model, checkpointing partial progress
+        
+        Ensembles are grown with warm starts and MLPs are trained epoch by epoch,
+        so a resumed run continues from the last saved increment.
+        """
+        # n_jobs depends on the machine, not on the fitted model
+        fit_key = params_key({name: value for name, value in model.get_params().items()
+                              if name != 'n_jobs'})
+        saved = self._load_checkpointed_estimator(fit_key)
+        if saved is not None and self.checkpoint.state.get('stage') == 'done':
+            if status_callback:
+                status_callback("Restored fitted model from checkpoint")
+            return saved
+        
+        if saved is not None:
+            model = saved
+        
+        if self.algorithm in ENSEMBLE_ALGORITHMS:
+            model = self._fit_ensemble(model, X_train, y_train, fit_key, status_callback)
+        elif self.algorithm == 'Neural Network' and hasattr(model, 'partial_fit'):
+            model = self._fit_mlp(model, X_train, y_train, fit_key, status_callback)
+        else:
+            model.fit(X_train, y_train, **self.fit_params(model))
+        
+        if self.is_training:
+            self.checkpoint.save_estimator(model, stage='done', fit_params=fit_key,
+                                           best_params=self.best_params)
+        return model
+    
+    def fit_params(self, model):
+        """Keyword arguments passing the training sample weights to model.fit"""
+        return sample_weight_params(model, self.sample_weight)
+    
+    def _load_checkpointed_estimator(self, fit_key):
+        """Get the checkpointed estimator if it was fitted with the same params"""
+        if self.checkpoint.state.get('fit_params') != fit_key:
+            return None
+        return self.checkpoint.load_estimator()
+    
+    def _fit_ensemble(self, model, X_train, y_train, fit_key, status_callback=None):
+        """Grow a forest or boosting ensemble in checkpointed increments"""
+        if hasattr(model, 'estimators_'):
+            # Resumed from a partially grown ensemble
+            target = self.checkpoint.state.get('target_units', model.n_estimators)
+            grown = len(model.estimators_)
+        else:
+            target = model.n_estimators
+            grown = 0
+        step = max(1, target // self.CHECKPOINT_STEPS)
+        
+        model.set_params(warm_start=True)
+        while grown < target and self.is_training:
+            grown = min(target, grown + step)
+            model.set_params(n_estimators=grown)
+            model.fit(X_train, y_train, **self.fit_params(model))
+            self.checkpoint.save_estimator(model, stage='fit', fit_params=fit_key,
+                                           target_units=target)
+            if status_callback:
+                status_callback(f"Fitted {grown}/{target} estimators (checkpointed)")
+        
+        model.set_params(warm_start=False)
+        return model
+    
+    def _fit_mlp(self, model, X_train, y_train, fit_key, status_callback=None):
+        """Train an MLP one epoch at a time with periodic checkpoints"""
+        classes = np.unique(y_train)
+        step = max(1, model.max_iter // self.CHECKPOINT_STEPS)
+        best_loss = min(model.loss_curve_) if hasattr(model, 'loss_curve_') else np.inf
+        no_improvement = self.checkpoint.state.get('no_improvement', 0)
+        
+        # Same stopping rule as MLPClassifier.fit: stop once the training loss
+        # has not improved by tol for n_iter_no_change consecutive epochs
+        # partial_fit resets n_iter_ on every call, so count epochs from the loss curve
+        epochs_done = len(getattr(model, 'loss_curve_', []))
+        while epochs_done < model.max_iter and self.is_training:
+            model.partial_fit(X_train, y_train, classes=classes,
+                              sample_weight=self.sample_weight)
+            epochs_done += 1
+            loss = model.loss_curve_[-1]
+            no_improvement = no_improvement + 1 if loss > best_loss - model.tol else 0
+            best_loss = min(best_loss, loss)
+            converged = no_improvement > model.n_iter_no_change
+            model.n_iter_ = epochs_done
+            
+            if converged or epochs_done % step == 0:
+                self.checkpoint.save_estimator(model, stage='fit', fit_params=fit_key,
+                                               no_improvement=no_improvement)
+                if status_callback:
+                    status_callback(f"Epoch {epochs_done}/{model.max_iter}, "
+                                    f"loss {loss:.4f} (checkpointed)")
+            if converged:
+                break
+        
+        return model
     
     def evaluate(self, X_train, y_train, X_val=None, y_val=None):
         """Evaluate the trained model"""
         results = {}
         
         # Training metrics
-        y_train_pred = self.model.predict(X_train)
-        results['train_accuracy'] = accuracy_score(y_train, y_train_pred)
-        results['train_precision'] = precision_score(y_train, y_train_pred, average='weighted', zero_division=0)
-        results['train_recall'] = recall_score(y_train, y_train_pred, average='weighted', zero_division=0)
-        results['train_f1'] = f1_score(y_train, y_train_pred, average='weighted', zero_division=0)
+        if self.train_eval_size and len(y_train) > self.train_eval_size:
+            results.update(self.evaluate_train_sample(X_train, y_train))
+        else:
+            y_train_pred = self.model.predict(X_train)
+            train_metrics = classification_metrics(y_train, y_train_pred)
+            results['train_accuracy'] = train_metrics['accuracy']
+            results['train_precision'] = train_metrics['precision']
+            results['train_recall'] = train_metrics['recall']
+            results['train_f1'] = train_metrics['f1']
         
         # Validation metrics if validation set provided
         if X_val is not None and y_val is not None:
-            y_val_pred = self.model.predict(X_val)
-            results['val_accuracy'] = accuracy_score(y_val, y_val_pred)
-            results['val_precision'] = precision_score(y_val, y_val_pred, average='weighted', zero_division=0)
-            results['val_recall'] = recall_score(y_val, y_val_pred, average='weighted', zero_division=0)
-            results['val_f1'] = f1_score(y_val, y_val_pred, average='weighted', zero_division=0)
-            results['confusion_matrix'] = confusion_matrix(y_val, y_val_pred).tolist()
-            results['classification_report'] = classification_report(y_val, y_val_pred, zero_division=0)
+            results.update(self.evaluate_validation(X_val, y_val))
         
         # Cross-validation score
+        if not self.skip_cv:
+            results.update(self.cross_validate(X_train, y_train))
+        
+        return results
+    
+    def evaluate_validation(self, X_val, y_val):
+        """Validation metrics, confusion matrix and report of the current model"""
+        y_val_pred = self.model.predict(X_val)
+        val_metrics = classification_metrics(y_val, y_val_pred, include_report=True)
+        return {
+            'val_accuracy': val_metrics['accuracy'],
+            'val_precision': val_metrics['precision'],
+            'val_recall': val_metrics['recall'],
+            'val_f1': val_metrics['f1'],
+            'confusion_matrix': val_metrics['confusion_matrix'],
+            'classification_report': val_metrics['classification_report']
+        }
+    
+    def evaluate_train_sample(self, X_train, y_train, n_bootstrap=200, confidence=0.95):
+        """
+        Score a stratified subsample of the training rows
+        
+        Predicting on train_eval_size rows instead of the full training set
+        keeps evaluation cheap for slow predictors; bootstrap confidence
+        intervals are reported next to each metric.
+        """
+        from backend.tuning import take_rows
+        
+        rows = np.arange(len(y_train))
         try:
-            cv_scores = cross_val_score(self.model, X_train, y_train, cv=5, scoring='accuracy')
-            results['cv_mean'] = cv_scores.mean()
-            results['cv_std'] = cv_scores.std()
-        except:
-            pass
+            rows, _ = train_test_split(rows, train_size=self.train_eval_size,
+                                       stratify=y_train, random_state=42)
+        except ValueError:
+            # Classes too small to stratify
+            rows, _ = train_test_split(rows, train_size=self.train_eval_size, random_state=42)
+        rows = np.sort(rows)
         
+        y_sample = np.asarray(y_train)[rows]
+        y_pred = self.model.predict(take_rows(X_train, rows))
+        accumulator = ConfusionAccumulator().update(y_sample, y_pred)
+        metrics = accumulator.metrics()
+        intervals = accumulator.bootstrap(n_bootstrap=n_bootstrap, confidence=confidence)
+        
+        results = {'train_eval_samples': len(rows)}
+        for name in ('accuracy', 'precision', 'recall', 'f1'):
+            results[f'train_{name}'] = metrics[name]
+            results[f'train_{name}_ci'] = intervals[name]
         return results
     
+    def cross_validate(self, X_train, y_train, cv=5):
+        """
+        Get cross-validation accuracy of the trained configuration
+        
+        Reuses the fold scores of the winning candidate when the model came out
+        of auto-tuning; otherwise runs a fresh CV with the folds in parallel.
+        """
+        if self.cv_results is not None:
+            best_index = int(np.argmin(self.cv_results['rank_test_score']))
+            n_splits = sum(1 for key in self.cv_results if key.startswith('split'))
+            cv_scores = np.array([self.cv_results[f'split{fold}_test_score'][best_index]
+                                  for fold in range(n_splits)])
+            source = 'search'
+        else:
+            allocation = self.allocate_resources('cv', cv, X_train)
+            try:
+                with self.resources.limit(allocation):
+                    cv_scores = cross_val_score(
+                        apply_estimator_jobs(clone(self.model), allocation), X_train, y_train,
+                        cv=cv, scoring='accuracy', n_jobs=allocation['outer_jobs'],
+                        params=self.fit_params(self.model)
+                    )
+            except ValueError as e:
+                return {'cv_error': str(e)}
+            source = 'cross_val_score'
+        
+        return {
+            'cv_mean': cv_scores.mean(),
+            'cv_std': cv_scores.std(),
+            'cv_folds': len(cv_scores),
+            'cv_source': source
+        }
+    
+    def update_model(self, X_new, y_new, extra_estimators=None, epochs=5, status_callback=None):
+        """
+        Extend the fitted model with new rows instead of refitting from scratch
+        
+        Forests and boosting grow extra warm-started members fitted on the new
+        rows, and MLPs and SGD-based models take partial_fit epochs. Logistic
+        regression is rejected: a warm-started fit on the new rows alone is a
+        full refit that forgets the original data, not an update.
+        
+        Args:
+            X_new: Preprocessed new features
+            y_new: Encoded new labels
+            extra_estimators: Members added to an ensemble (default: 10% more)
+            epochs: partial_fit passes over the new rows
+            status_callback: Callback for status messages
+            
+        Returns:
+            str: The update method used ('warm_start' or 'partial_fit')
+        """
+        if self.model is None:
+            raise ValueError("Model has not been trained yet")
+        if isinstance(self.model, LogisticRegression):
+            raise ValueError(f"{self.algorithm} does not support incremental updates; "
+                             f"retrain it on the old and new rows together")
+        
+        model = self.model
+        y_new = np.asarray(y_new)
+        # The model changes in place, so outputs cached for it are stale
+        self.model_version = next(_model_versions)
+        
+        if isinstance(model, (RandomForestClassifier, GradientBoostingClassifier)):
+            extra = extra_estimators or max(1, model.n_estimators // 10)
+            X_fit, y_fit, weights = self._pad_missing_classes(X_new, y_new)
+            model.set_params(warm_start=True, n_estimators=model.n_estimators + extra)
+            model.fit(X_fit, y_fit, sample_weight=weights)
+            model.set_params(warm_start=False)
+            if status_callback:
+                status_callback(f"Added {extra} estimators fitted on {len(y_new)} new rows")
+            return 'warm_start'
+        
+        # Incremental learners; approximate SVM pipelines keep their fitted features
+        if isinstance(model, Pipeline):
+            learner, features = model.steps[-1][1], model[:-1].transform(X_new)
+        else:
+            learner, features = model, X_new
+        if not hasattr(learner, 'partial_fit'):
+            raise ValueError(f"{self.algorithm} does not support incremental updates")
+        
+        for epoch in range(epochs):
+            learner.partial_fit(features, y_new, classes=learner.classes_)
+            if status_callback:
+                status_callback(f"Update epoch {epoch + 1}/{epochs} on {len(y_new)} new rows")
+        return 'partial_fit'
+    
+    def _pad_missing_classes(self, X, y):
+        """
+        Append one zero-weight row per known class absent from y
+        
+        Warm-started fits re-derive classes_ from y, so every class the model
+        already knows has to appear even if the new rows do not contain it.
+        """
+        missing = np.setdiff1d(self.model.classes_, y)
+        weights = np.ones(len(y))
+        if len(missing) == 0:
+            return X, y, weights
+        
+        from backend.tuning import take_rows
+        
+        filler = take_rows(X, np.zeros(len(missing), dtype=np.int64))
+        if hasattr(X, 'iloc'):
+            import pandas as pd
+            X = pd.concat([X, filler], ignore_index=True)
+        else:
+            X = np.vstack([X, filler])
+        return (X, np.concatenate([y, missing.astype(y.dtype)]),
+                np.concatenate([weights, np.zeros(len(missing))]))
+    
     def predict(self, X):
         """Make predictions on new data"""
         if self.model is None:
@@ -234,23 +671,56 @@ class ModelTrainer:
         else:
             raise ValueError(f"{self.algorithm} does not support probability predictions")
     
-    def save_model(self, filepath):
-        """Save the trained model"""
+    def compile_model(self):
+        """
+        Flatten a trained Random Forest or Decision Tree into NumPy node arrays
+        
+        Returns:
+            CompiledTrees: Lightweight evaluator matching the model's predictions
+        """
+        if self.model is None:
+            raise ValueError("Model has not been trained yet")
+        if self.algorithm not in ('Random Forest', 'Decision Tree'):
+            raise ValueError(f"{self.algorithm} cannot be compiled; only Random Forest "
+                             f"and Decision Tree models are supported")
+        
+        from backend.tree_runtime import compile_trees
+        return compile_trees(self.model)
+    
+    def save_model(self, filepath, compress=None, progress_callback=None):
+        """
+        Save the trained model as a memory-mappable artifact
+        
+        Args:
+            filepath: Destination path
+            compress: None, True, a zlib level, 'zlib'/'bz2'/'lzma' or (method, level)
+            progress_callback: Called with the percentage of the file written
+        """
         if self.model is None:
             raise ValueError("No model to save")
         
-        joblib.dump({
-            'model': self.model,
+        from backend.artifact import save_artifact
+        
+        save_artifact({'model': self.model}, filepath, compress=compress, metadata={
             'algorithm': self.algorithm,
             'best_params': self.best_params
-        }, filepath)
+        }, progress_callback=progress_callback)
     
-    def load_model(self, filepath):
-        """Load a trained model"""
-        data = joblib.load(filepath)
-        self.model = data['model']
-        self.algorithm = data['algorithm']
-        self.best_params = data.get('best_params')
+    def load_model(self, filepath, verify=True):
+        """Load a trained model (artifacts lazily, older joblib files eagerly)"""
+        from backend.artifact import ArtifactReader, is_artifact
+        
+        if not is_artifact(filepath):
+            data = joblib.load(filepath)
+            self.model = data['model']
+            self.algorithm = data['algorithm']
+            self.best_params = data.get('best_params')
+            return
+        
+        reader = ArtifactReader(filepath, verify=verify)
+        self.algorithm = reader.metadata['algorithm']
+        self.best_params = reader.metadata.get('best_params')
+        self.defer_model(lambda: reader.load('model'))
     
     def stop_training(self):
         """Stop the training process"""
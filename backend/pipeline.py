@@ -4,15 +4,29 @@ Coordinates data loading, preprocessing, and model training
 """
 
 from backend.data_loader import DataLoader
-from backend.model_trainer import ModelTrainer
+from backend.model_trainer import ModelTrainer, TREE_ALGORITHMS
+from backend.checkpoint import CheckpointManager
+from backend.eval_cache import EvaluationCache
+from backend.preflight import PreflightEstimator, current_rss_bytes, peak_rss_bytes
+from backend.resources import ResourceConfig, estimate_worker_bytes
+from backend.utils import dataset_fingerprint, log_training_session
+from sklearn.model_selection import ParameterGrid
 import numpy as np
 
 
 class TrainingPipeline:
     """Complete training pipeline for ML models"""
     
-    def __init__(self):
+    # Share of the memory budget a run may use; the rest covers the
+    # interpreter, the GUI and estimation error
+    PREFLIGHT_MEMORY_FRACTION = 0.8
+    
+    # Smallest training set the pre-flight fallback will subsample to
+    PREFLIGHT_MIN_ROWS = 1000
+    
+    def __init__(self, resources=None):
         self.data_loader = DataLoader()
+        self.resources = resources or ResourceConfig()
         self.trainer = None
         self.X_train = None
         self.y_train = None
@@ -22,9 +36,24 @@ class TrainingPipeline:
         self.y_test = None
         self.train_data = None
         self.test_data = None
+        self.train_path = None
+        self.test_path = None
+        self.target_column = None
+        self.dataset_fingerprint = None
+        self.training_fingerprint = None
+        self.binned = False
+        self.subsample_size = None
+        self.subsample_method = 'balanced'
+        self.sample_weight = None
+        self.subsample_info = None
+        self.full_data = None
+        self.last_train_args = None
+        self.prediction_cache = None
+        self.last_results = None
         
     def load_datasets(self, train_path, test_path=None, target_column=None, 
-                     progress_callback=None, status_callback=None):
+                     progress_callback=None, status_callback=None,
+                     subsample_size=None, subsample_method='balanced', binned=False):
         """
         Load and preprocess datasets
         
@@ -32,6 +61,11 @@ class TrainingPipeline:
             train_path: Path to training dataset
             test_path: Path to test dataset (optional)
             target_column: Name of target column
+            subsample_size: Train and validate on a subsample of about this
+                many training rows (see DataLoader.subsample)
+            subsample_method: 'balanced' or 'coreset'
+            binned: Store features as uint8 quantile bins instead of scaled
+                floats (only for tree algorithms)
             progress_callback: Callback for progress updates
             status_callback: Callback for status messages
             
@@ -42,6 +76,13 @@ class TrainingPipeline:
             if status_callback:
                 status_callback("Loading training dataset...")
             
+            self.train_path = train_path
+            self.test_path = test_path
+            self.target_column = target_column
+            self.binned = binned
+            self.subsample_size = subsample_size
+            self.subsample_method = subsample_method
+            
             # Load training data
             self.train_data = self.data_loader.load_data(train_path)
             
@@ -51,8 +92,15 @@ class TrainingPipeline:
             if status_callback:
                 status_callback("Preprocessing training data...")
             
+            # Fingerprint of the file and target the registry groups models by,
+            # taken before preprocessing imputes missing values in place
+            target = target_column
+            if target is None and len(self.train_data.columns):
+                target = self.train_data.columns[-1]
+            self.dataset_fingerprint = dataset_fingerprint(self.train_data, [str(target)])
+            
             # Preprocess training data
-            X, y = self.data_loader.preprocess_data(self.train_data, target_column)
+            X, y = self.data_loader.preprocess_data(self.train_data, target_column, binned=binned)
             
             if progress_callback:
                 progress_callback(40)
@@ -62,6 +110,14 @@ class TrainingPipeline:
             self.X_train, self.X_val, self.y_train, self.y_val = train_test_split(
                 X, y, test_size=0.2, random_state=42
             )
+            self.sample_weight = None
+            self.subsample_info = None
+            self.full_data = None
+            if subsample_size and len(self.y_train) > subsample_size:
+                self.apply_subsample(subsample_size, subsample_method, status_callback)
+            # The exact training rows, keying checkpoints and cached evaluations
+            self.training_fingerprint = dataset_fingerprint(self.X_train, self.y_train,
+                                                            self.sample_weight)
             
             if progress_callback:
                 progress_callback(60)
@@ -79,8 +135,8 @@ class TrainingPipeline:
                 if status_callback:
                     status_callback("Preprocessing test data...")
                 
-                # Preprocess test data
-                self.X_test, self.y_test = self.data_loader.preprocess_data(
+                # Preprocess test data with the encoders, scaler or bins fitted on training data
+                self.X_test, self.y_test = self.data_loader.transform(
                     self.test_data, target_column
                 )
             
@@ -100,6 +156,8 @@ class TrainingPipeline:
                 'target_name': self.data_loader.target_name,
                 'n_classes': len(np.unique(self.y_train))
             }
+            if self.subsample_info:
+                info['subsample'] = self.subsample_info
             
             return info
             
@@ -109,7 +167,11 @@ class TrainingPipeline:
             raise
     
     def train_model(self, algorithm='Random Forest', epochs=10, batch_size=32,
-                   learning_rate=0.001, auto_tune=False,
+                   learning_rate=0.001, auto_tune=False, checkpoint_dir=None,
+                   eval_cache_path='models/eval_cache.sqlite', skip_cv=False,
+                   train_eval_size=None, svm_engine='auto', model_params=None,
+                   preflight='warn', max_runtime=None, log_dir=None,
+                   search_executor=None, compact=False, compaction_tolerance=0.005,
                    progress_callback=None, status_callback=None):
         """
         Train a machine learning model
@@ -120,6 +182,26 @@ class TrainingPipeline:
             batch_size: Batch size for training
             learning_rate: Learning rate
             auto_tune: Whether to perform hyperparameter tuning
+            checkpoint_dir: Directory for periodic checkpoints (optional)
+            eval_cache_path: SQLite file memoizing tuning evaluations across
+                sessions (None disables the cache)
+            skip_cv: Skip cross-validation in the evaluation for quick iterations
+            train_eval_size: Score only a stratified subsample of this many
+                training rows, with bootstrap confidence intervals
+            svm_engine: 'exact', 'approximate' (kernel approximation + linear
+                SVM) or 'auto' to switch to approximate on large datasets
+            model_params: Fixed hyperparameters for the model (without auto_tune)
+            preflight: What to do when the estimated memory or runtime is over
+                budget: 'warn', 'adapt' (switch SVM engine, then subsample),
+                'error' or 'off'
+            max_runtime: Runtime limit in seconds checked by the pre-flight
+            log_dir: Directory for a session log of the final results, which
+                also calibrates the pre-flight estimator (None, the default,
+                writes no log and runs the pre-flight uncalibrated)
+            search_executor: distributed.SearchCoordinator running the tuning
+                fits on remote workers (optional)
+            compact: Shrink tree models after training (see compact_model)
+            compaction_tolerance: Largest validation accuracy drop compaction may cause
             progress_callback: Callback for progress updates
             status_callback: Callback for status messages
             
@@ -129,23 +211,110 @@ class TrainingPipeline:
         if self.X_train is None or self.y_train is None:
             raise ValueError("No training data loaded. Please load datasets first.")
         
+        if self.data_loader.bin_edges is not None and algorithm not in TREE_ALGORITHMS:
+            raise ValueError(f"{algorithm} needs scaled features; "
+                             f"load the datasets with binned=False")
+        
+        # Everything that shapes the result, as requested (the pre-flight may
+        # switch the SVM engine below); checkpoints and promotion replay it
+        train_args = {
+            'algorithm': algorithm,
+            'epochs': epochs,
+            'batch_size': batch_size,
+            'learning_rate': learning_rate,
+            'auto_tune': auto_tune,
+            'eval_cache_path': eval_cache_path,
+            'skip_cv': skip_cv,
+            'train_eval_size': train_eval_size,
+            'svm_engine': svm_engine,
+            'model_params': model_params,
+            'preflight': preflight,
+            'max_runtime': max_runtime,
+            'log_dir': log_dir,
+            'compact': compact,
+            'compaction_tolerance': compaction_tolerance
+        }
+        
         try:
+            estimate = None
+            if preflight != 'off':
+                estimate, svm_engine = self.run_preflight(
+                    algorithm, auto_tune, svm_engine, model_params=model_params,
+                    skip_cv=skip_cv, mode=preflight, max_runtime=max_runtime,
+                    log_dir=log_dir, status_callback=status_callback
+                )
+            
+            checkpoint = None
+            if checkpoint_dir:
+                checkpoint = CheckpointManager(checkpoint_dir)
+                checkpoint.start(self.training_fingerprint, {
+                    'train_path': self.train_path,
+                    'test_path': self.test_path,
+                    'target_column': self.target_column,
+                    'binned': self.binned,
+                    'subsample_size': self.subsample_size,
+                    'subsample_method': self.subsample_method,
+                    'train_args': train_args
+                })
+            
+            eval_cache = None
+            if auto_tune and eval_cache_path:
+                eval_cache = EvaluationCache(eval_cache_path)
+            
             # Initialize trainer
-            self.trainer = ModelTrainer(algorithm=algorithm, auto_tune=auto_tune)
+            self.trainer = ModelTrainer(algorithm=algorithm, auto_tune=auto_tune,
+                                        checkpoint=checkpoint, eval_cache=eval_cache,
+                                        dataset_fingerprint=self.training_fingerprint,
+                                        skip_cv=skip_cv,
+                                        train_eval_size=train_eval_size,
+                                        resources=self.resources,
+                                        svm_engine=svm_engine,
+                                        search_executor=search_executor)
             
             if status_callback:
                 status_callback(f"Starting {algorithm} training...")
             
+            self.last_train_args = dict(train_args)
+            
+            rss_before, peak_before = current_rss_bytes(), peak_rss_bytes()
+            
             # Train model
-            results = self.trainer.train(
-                self.X_train, self.y_train,
-                self.X_val, self.y_val,
-                epochs=epochs,
-                batch_size=batch_size,
-                learning_rate=learning_rate,
-                progress_callback=progress_callback,
-                status_callback=status_callback
-            )
+            try:
+                results = self.trainer.train(
+                    self.X_train, self.y_train,
+                    self.X_val, self.y_val,
+                    epochs=epochs,
+                    batch_size=batch_size,
+                    learning_rate=learning_rate,
+                    progress_callback=progress_callback,
+                    status_callback=status_callback,
+                    sample_weight=self.sample_weight,
+                    model_params=model_params
+                )
+            finally:
+                if eval_cache is not None:
+                    eval_cache.close()
+            
+            if results is None:
+                return None
+            
+            if self.subsample_info:
+                results['subsample'] = self.subsample_info
+            
+            if estimate is not None:
+                results['preflight'] = estimate
+            
+            if log_dir:
+                # The process peak only reflects this run if the run raised it
+                peak_after = peak_rss_bytes()
+                if rss_before and peak_before and peak_after > peak_before:
+                    results['peak_memory_bytes'] = peak_after - rss_before
+            
+            if compact and algorithm in TREE_ALGORITHMS:
+                results['compaction'] = self.compact_model(compaction_tolerance,
+                                                           status_callback=status_callback)
+                # Validation metrics describe the compacted model that is kept
+                results.update(self.trainer.evaluate_validation(self.X_val, self.y_val))
             
             # Evaluate on test set if available
             if self.X_test is not None and self.y_test is not None:
@@ -155,6 +324,11 @@ class TrainingPipeline:
                 test_results = self.evaluate_on_test()
                 results['test_metrics'] = test_results
             
+            if log_dir:
+                # Logged last so the record describes the model that is kept
+                log_training_session(self.last_train_args, results, log_dir)
+            
+            self.last_results = results
             return results
             
         except Exception as e:
@@ -162,69 +336,634 @@ class TrainingPipeline:
                 status_callback(f"Training error: {str(e)}")
             raise
     
-    def evaluate_on_test(self):
-        """Evaluate model on test set"""
+    def compact_model(self, tolerance=0.005, prune_members=True, prune_depth=True,
+                      float32_values=True, status_callback=None):
+        """
+        Shrink the trained tree model within a validation accuracy tolerance
+        
+        Trailing ensemble members and deep subtrees are dropped and leaf
+        values rounded to float32 as long as validation accuracy stays within
+        tolerance; thresholds are snapped to float32 and node fields unused at
+        inference are cleared (see backend.compaction).
+        
+        Returns:
+            dict: Size and accuracy before and after, and the steps taken
+        """
+        if self.trainer is None or self.trainer.model is None:
+            raise ValueError("No trained model available")
+        if self.trainer.algorithm not in TREE_ALGORITHMS:
+            raise ValueError(f"{self.trainer.algorithm} models cannot be compacted")
+        if self.X_val is None:
+            raise ValueError("Compaction needs the validation set; load the datasets first")
+        
+        from backend.compaction import compact_model
+        
+        report = compact_model(self.trainer.model, self.X_val, self.y_val, tolerance=tolerance,
+                               prune_members=prune_members, prune_depth=prune_depth,
+                               float32_values=float32_values, status_callback=status_callback)
+        # Changed in place; reassigning gives it a new version for the prediction cache
+        self.trainer.model = self.trainer.model
+        if status_callback:
+            status_callback(f"Compaction: {report['before']['bytes'] / 1024 ** 2:.1f} MB -> "
+                            f"{report['after']['bytes'] / 1024 ** 2:.1f} MB, validation accuracy "
+                            f"{report['before']['val_accuracy']:.4f} -> "
+                            f"{report['after']['val_accuracy']:.4f}")
+        return report
+    
+    def inspect_model(self, compress_level=1):
+        """
+        Report the trained model's serialised size, memory footprint and breakdown
+        
+        Sizes are counted while streaming the pickle, so this is safe to call
+        on models too large to pickle into memory (see backend.footprint).
+        
+        Returns:
+            dict: Totals, per-attribute components and model-specific details
+        """
+        if self.trainer is None or self.trainer.model is None:
+            raise ValueError("No trained model available")
+        
+        from backend.footprint import inspect_model
+        return inspect_model(self.trainer.model, compress_level=compress_level)
+    
+    def run_preflight(self, algorithm, auto_tune, svm_engine='auto', model_params=None,
+                      skip_cv=False, mode='warn', max_runtime=None, log_dir='logs',
+                      status_callback=None):
+        """
+        Estimate peak memory and runtime before training and apply fallbacks
+        
+        Args:
+            algorithm: ML algorithm to use
+            auto_tune: Whether hyperparameter tuning will run
+            svm_engine: Requested SVM engine
+            model_params: Fixed hyperparameters (without auto_tune)
+            skip_cv: Whether cross-validation is skipped
+            mode: 'warn', 'adapt' or 'error' (see train_model)
+            max_runtime: Runtime limit in seconds
+            log_dir: Directory of past training logs used for calibration
+            status_callback: Callback for status messages
+            
+        Returns:
+            tuple: (estimate, svm_engine) with the engine to train with
+        """
+        estimator = PreflightEstimator(log_dir)
+        memory_bytes = self.resources.memory_bytes
+        budget = int(memory_bytes * self.PREFLIGHT_MEMORY_FRACTION) if memory_bytes else None
+        
+        def estimate_for(n_samples, engine):
+            return self._preflight_estimate(estimator, algorithm, auto_tune, engine,
+                                            model_params, skip_cv, n_samples)
+        
+        n_samples = len(self.y_train)
+        estimate = estimate_for(n_samples, svm_engine)
+        problems = estimator.check(estimate, budget, max_runtime)
+        if status_callback:
+            status_callback(f"Pre-flight: ~{estimate['peak_memory_bytes'] / 1024 ** 3:.2f} GB peak, "
+                            f"~{estimate['runtime_seconds']:.1f}s for {estimate['n_fits']} fits "
+                            f"({estimate['calibration_runs']} calibration runs)")
+            for problem in problems:
+                status_callback(f"⚠️ Pre-flight: {problem}")
+        
+        if not problems or mode == 'warn':
+            return estimate, svm_engine
+        if mode == 'error':
+            raise ValueError("Pre-flight check failed: " + "; ".join(problems))
+        
+        actions = []
+        if algorithm == 'Support Vector Machine' and svm_engine != 'approximate':
+            svm_engine = 'approximate'
+            actions.append("switched SVM to the approximate engine")
+            estimate = estimate_for(n_samples, svm_engine)
+            problems = estimator.check(estimate, budget, max_runtime)
+        
+        size = n_samples
+        while problems and size // 2 >= self.PREFLIGHT_MIN_ROWS:
+            size //= 2
+            estimate = estimate_for(size, svm_engine)
+            problems = estimator.check(estimate, budget, max_runtime)
+        if size < n_samples:
+            self.apply_subsample(size, 'coreset', status_callback)
+            self.training_fingerprint = dataset_fingerprint(self.X_train, self.y_train,
+                                                            self.sample_weight)
+            actions.append(f"subsampled training data to {size} rows")
+        
+        estimate['actions'] = actions
+        if status_callback:
+            for action in actions:
+                status_callback(f"Pre-flight fallback: {action}")
+            if problems:
+                status_callback("⚠️ Pre-flight: still over budget after fallbacks")
+        return estimate, svm_engine
+    
+    def _preflight_estimate(self, estimator, algorithm, auto_tune, svm_engine, model_params,
+                            skip_cv, n_samples):
+        """Estimate a run on n_samples of the current training rows"""
+        probe = ModelTrainer(algorithm=algorithm, auto_tune=auto_tune,
+                             svm_engine=svm_engine, resources=self.resources)
+        approximate = algorithm == 'Support Vector Machine' and probe.resolve_svm_engine(n_samples)
+        param_grid = probe.get_param_grid() if auto_tune else None
+        
+        # Parallel fits, sized the way ModelTrainer will allocate them
+        cv_fits = 0 if (param_grid or skip_cv) else 5
+        n_tasks = len(ParameterGrid(param_grid)) * 3 if param_grid else cv_fits
+        worker_bytes = estimate_worker_bytes(self.X_train) * n_samples // max(1, len(self.y_train))
+        outer_jobs = self.resources.allocate(max(1, n_tasks), worker_bytes)['outer_jobs']
+        
+        return estimator.estimate(
+            algorithm, n_samples, self.X_train.shape[1], len(np.unique(self.y_train)),
+            param_grid=param_grid, model_params=model_params, cv=3, cv_fits=cv_fits,
+            outer_jobs=outer_jobs, approximate_svm=approximate,
+            kernel_cache_bytes=probe.kernel_cache_budget()
+        )
+    
+    def apply_subsample(self, subsample_size, method='balanced', status_callback=None):
+        """
+        Replace the training and validation sets with a fast-iteration subsample
+        
+        The full sets are kept so promote_to_full_data can refit on them.
+        """
+        from sklearn.model_selection import train_test_split
+        from backend.tuning import take_rows
+        
+        if self.full_data is None:
+            self.full_data = (self.X_train, self.y_train, self.X_val, self.y_val)
+        n_full = len(self.full_data[1])
+        
+        self.X_train, self.y_train, self.sample_weight = self.data_loader.subsample(
+            self.X_train, self.y_train, subsample_size, method=method
+        )
+        
+        # Keep the 80/20 train/validation ratio
+        val_size = max(1, subsample_size // 4)
+        if len(self.y_val) > val_size:
+            rows = np.arange(len(self.y_val))
+            try:
+                rows, _ = train_test_split(rows, train_size=val_size, stratify=self.y_val,
+                                           random_state=42)
+            except ValueError:
+                rows, _ = train_test_split(rows, train_size=val_size, random_state=42)
+            rows = np.sort(rows)
+            self.X_val, self.y_val = take_rows(self.X_val, rows), take_rows(self.y_val, rows)
+        
+        self.subsample_info = {
+            'method': method,
+            'train_rows': len(self.y_train),
+            'full_train_rows': n_full,
+            'represented_rows': float(self.sample_weight.sum())
+        }
+        if status_callback:
+            status_callback(f"Using {method} subsample: {len(self.y_train)} of {n_full} "
+                            f"training rows")
+    
+    def promote_to_full_data(self, progress_callback=None, status_callback=None):
+        """
+        Refit the configuration chosen on the subsample using all rows
+        
+        Uses the algorithm and training arguments of the last train_model
+        call, with the hyperparameters it selected fixed instead of re-tuned.
+        
+        Returns:
+            dict: Training results on the full data
+        """
+        if self.full_data is None:
+            raise ValueError("No subsample is active. Load datasets with subsample_size first.")
+        if self.trainer is None or self.last_train_args is None:
+            raise ValueError("Train a model on the subsample before promoting it")
+        
+        args = dict(self.last_train_args)
+        args['model_params'] = self.trainer.best_params or args.get('model_params')
+        args['auto_tune'] = False
+        if args['algorithm'] == 'Support Vector Machine':
+            # The selected parameters belong to the engine they were tuned with
+            args['svm_engine'] = 'approximate' if self.trainer.approximate_svm else 'exact'
+        
+        self.X_train, self.y_train, self.X_val, self.y_val = self.full_data
+        self.full_data = None
+        self.sample_weight = None
+        self.subsample_info = None
+        self.subsample_size = None
+        self.training_fingerprint = dataset_fingerprint(self.X_train, self.y_train)
+        
+        if status_callback:
+            status_callback(f"Promoting to full data: refitting on {len(self.y_train)} rows...")
+        
+        return self.train_model(progress_callback=progress_callback,
+                                status_callback=status_callback, **args)
+    
+    def configure_resources(self, total_cores=None, memory_gb=None, reserved_cores=0):
+        """
+        Set the core and memory budget shared by all training phases
+        
+        Args:
+            total_cores: Cores to use (defaults to all cores)
+            memory_gb: Memory budget in GB (defaults to physical memory)
+            reserved_cores: Cores kept free, e.g. for the GUI event loop
+        """
+        self.resources = ResourceConfig(total_cores=total_cores, memory_gb=memory_gb,
+                                        reserved_cores=reserved_cores)
+        return self.resources
+    
+    def resume_training(self, checkpoint_dir, progress_callback=None, status_callback=None):
+        """
+        Resume an interrupted training run from its checkpoint
+        
+        Reloads the datasets recorded in the checkpoint, verifies that their
+        fingerprint is unchanged and continues training with the recorded
+        train_model arguments (except search_executor), skipping search
+        candidates and ensemble members that were already completed.
+        
+        Args:
+            checkpoint_dir: Directory passed to train_model for the original run
+            progress_callback: Callback for progress updates
+            status_callback: Callback for status messages
+            
+        Returns:
+            dict: Training results
+        """
+        state = CheckpointManager(checkpoint_dir).load_state()
+        config = state['config']
+        
+        if status_callback:
+            status_callback(f"Resuming training from checkpoint in {checkpoint_dir}...")
+        
+        self.load_datasets(config['train_path'], config.get('test_path'),
+                           config.get('target_column'),
+                           status_callback=status_callback,
+                           subsample_size=config.get('subsample_size'),
+                           subsample_method=config.get('subsample_method', 'balanced'),
+                           binned=config.get('binned', False))
+        
+        return self.train_model(checkpoint_dir=checkpoint_dir,
+                                progress_callback=progress_callback,
+                                status_callback=status_callback,
+                                **config['train_args'])
+    
+    def evaluate_on_test(self, batch_size=100000):
+        """
+        Evaluate model on test set
+        
+        Predictions are made in batches and folded into one confusion matrix,
+        so large test sets are scored without holding every intermediate.
+        """
         if self.trainer is None or self.trainer.model is None:
             raise ValueError("No trained model available")
         
         if self.X_test is None or self.y_test is None:
             raise ValueError("No test data available")
         
-        from sklearn.metrics import (accuracy_score, precision_score, 
-                                    recall_score, f1_score, confusion_matrix)
+        from backend.metrics import ConfusionAccumulator
+        from backend.tuning import take_rows
         
-        y_pred = self.trainer.predict(self.X_test)
+        y_test = np.asarray(self.y_test)
+        accumulator = ConfusionAccumulator()
+        for start in range(0, len(y_test), batch_size):
+            rows = np.arange(start, min(start + batch_size, len(y_test)))
+            accumulator.update(y_test[rows], self.trainer.predict(take_rows(self.X_test, rows)))
         
+        metrics = accumulator.metrics()
         results = {
-            'accuracy': accuracy_score(self.y_test, y_pred),
-            'precision': precision_score(self.y_test, y_pred, average='weighted', zero_division=0),
-            'recall': recall_score(self.y_test, y_pred, average='weighted', zero_division=0),
-            'f1_score': f1_score(self.y_test, y_pred, average='weighted', zero_division=0),
-            'confusion_matrix': confusion_matrix(self.y_test, y_pred).tolist()
+            'accuracy': metrics['accuracy'],
+            'precision': metrics['precision'],
+            'recall': metrics['recall'],
+            'f1_score': metrics['f1'],
+            'confusion_matrix': metrics['confusion_matrix']
         }
         
         return results
     
-    def save_model(self, filepath):
-        """Save trained model and preprocessing objects"""
+    def save_model(self, filepath, compress=None, progress_callback=None, registry_path=None):
+        """
+        Save trained model and preprocessing objects
+        
+        The file is a model artifact (see backend.artifact): large arrays are
+        stored as aligned blocks that load_model memory-maps instead of reading.
+        The header also records the fingerprints of the loaded dataset and of
+        the rows actually trained on, metrics and training time, which is what
+        the model registry indexes.
+        
+        Args:
+            filepath: Destination path
+            compress: None, True, a zlib level, 'zlib'/'bz2'/'lzma' or (method, level);
+                compressed artifacts load eagerly instead of being memory-mapped
+            progress_callback: Called with the percentage of the file written
+            registry_path: Register the saved model in this registry database
+        
+        Returns:
+            int: Registry id of the model, or None without registry_path
+        """
         if self.trainer is None or self.trainer.model is None:
             raise ValueError("No trained model to save")
         
-        import joblib
+        from backend.artifact import save_artifact
+        from backend.registry import ModelRegistry, scalar_metrics
         
-        model_data = {
-            'model': self.trainer.model,
-            'algorithm': self.trainer.algorithm,
-            'best_params': self.trainer.best_params,
+        preprocessing = {
             'scaler': self.data_loader.scaler,
             'label_encoders': self.data_loader.label_encoders,
+            'fill_values': self.data_loader.fill_values,
+            'bin_edges': self.data_loader.bin_edges,
             'feature_names': self.data_loader.feature_names,
             'target_name': self.data_loader.target_name
         }
+        # Readable from the header alone (see backend.artifact.read_header)
+        metadata = {
+            'algorithm': self.trainer.algorithm,
+            'best_params': self.trainer.best_params,
+            'feature_names': [str(name) for name in self.data_loader.feature_names],
+            'target_name': str(self.data_loader.target_name),
+            'dataset_fingerprint': self.dataset_fingerprint,
+            'training_fingerprint': self.training_fingerprint,
+            'metrics': scalar_metrics(self.last_results),
+            'training_time': (self.last_results or {}).get('training_time')
+        }
+        
+        save_artifact({'preprocessing': preprocessing, 'model': self.trainer.model},
+                      filepath, compress=compress, metadata=metadata,
+                      progress_callback=progress_callback)
         
-        joblib.dump(model_data, filepath)
+        if registry_path is None:
+            return None
+        registry = ModelRegistry(registry_path)
+        try:
+            return registry.register(filepath)
+        finally:
+            registry.close()
+    
+    def export_runtime(self, filepath):
+        """
+        Export a Random Forest or Decision Tree as NumPy node arrays
+        
+        The .npz file is loaded with CompiledTrees.load and scored without
+        scikit-learn; it expects preprocessed features (see transform_array).
+        
+        Returns:
+            CompiledTrees: The compiled model that was written
+        """
+        if self.trainer is None or self.trainer.model is None:
+            raise ValueError("No trained model to export")
+        
+        compiled = self.trainer.compile_model()
+        compiled.save(filepath)
+        return compiled
     
-    def load_model(self, filepath):
-        """Load a saved model and preprocessing objects"""
+    def load_model(self, filepath, verify=True):
+        """
+        Load a saved model and preprocessing objects
+        
+        Artifacts return after reading the header and preprocessing; the model
+        itself is loaded on first use. Files written by older versions with
+        joblib are still accepted.
+        
+        Args:
+            filepath: Model file
+            verify: Check the artifact's SHA-256 first (reads the whole file once;
+                skipped for a file this process verified that is unchanged)
+        """
         import joblib
+        from backend.artifact import ArtifactReader, is_artifact
         
-        model_data = joblib.load(filepath)
+        if is_artifact(filepath):
+            reader = ArtifactReader(filepath, verify=verify)
+            model_data = dict(reader.metadata, **reader.load('preprocessing'))
+        else:
+            model_data = joblib.load(filepath)
         
         self.trainer = ModelTrainer(algorithm=model_data['algorithm'])
-        self.trainer.model = model_data['model']
+        if 'model' in model_data:
+            self.trainer.model = model_data['model']
+        else:
+            self.trainer.defer_model(lambda: reader.load('model'))
         self.trainer.best_params = model_data.get('best_params')
         
         self.data_loader.scaler = model_data['scaler']
         self.data_loader.label_encoders = model_data['label_encoders']
+        self.data_loader.fill_values = model_data.get('fill_values', {})
+        self.data_loader.bin_edges = model_data.get('bin_edges')
         self.data_loader.feature_names = model_data['feature_names']
         self.data_loader.target_name = model_data['target_name']
+        
+        # Re-saving keeps the provenance the registry indexes
+        self.dataset_fingerprint = model_data.get('dataset_fingerprint')
+        self.training_fingerprint = model_data.get('training_fingerprint')
+        self.last_results = model_data.get('metrics')
     
-    def predict(self, X):
-        """Make predictions on new data"""
+    def update_model(self, data_path, model_path=None, holdout_fraction=0.2,
+                     extra_estimators=None, epochs=5, progress_callback=None,
+                     status_callback=None):
+        """
+        Update a trained model with newly arrived rows
+        
+        The new rows are preprocessed with the saved imputation, encoders and
+        scaler, split into an update set and a held-out slice, and the model is
+        extended on the update set only. Metrics on the held-out slice are
+        reported before and after the update.
+        
+        Args:
+            data_path: File with the new rows (same columns as the training data)
+            model_path: Saved model to update (defaults to the current model)
+            holdout_fraction: Share of the new rows kept for the comparison
+            extra_estimators: Ensemble members to add (default: 10% more)
+            epochs: partial_fit passes for incremental learners
+            progress_callback: Callback for progress updates
+            status_callback: Callback for status messages
+            
+        Returns:
+            dict: before/after held-out metrics, row counts and update time
+        """
+        import time
+        from sklearn.model_selection import train_test_split
+        from backend.metrics import classification_metrics
+        from backend.tuning import take_rows
+        
+        if model_path:
+            self.load_model(model_path)
         if self.trainer is None or self.trainer.model is None:
             raise ValueError("No trained model available")
         
-        return self.trainer.predict(X)
+        if status_callback:
+            status_callback(f"Preprocessing new rows from {data_path}...")
+        X_new, y_new = self.data_loader.transform(self.data_loader.load_data(data_path))
+        if y_new is None:
+            raise ValueError(f"New data has no target column '{self.data_loader.target_name}'")
+        
+        rows = np.arange(len(y_new))
+        try:
+            update_rows, holdout_rows = train_test_split(rows, test_size=holdout_fraction,
+                                                         stratify=y_new, random_state=42)
+        except ValueError:
+            update_rows, holdout_rows = train_test_split(rows, test_size=holdout_fraction,
+                                                         random_state=42)
+        X_update, y_update = take_rows(X_new, update_rows), y_new[update_rows]
+        X_holdout, y_holdout = take_rows(X_new, holdout_rows), y_new[holdout_rows]
+        
+        if progress_callback:
+            progress_callback(20)
+        
+        before = classification_metrics(y_holdout, self.trainer.predict(X_holdout))
+        
+        if status_callback:
+            status_callback(f"Updating {self.trainer.algorithm} with {len(update_rows)} new rows...")
+        start_time = time.time()
+        method = self.trainer.update_model(X_update, y_update, extra_estimators=extra_estimators,
+                                           epochs=epochs, status_callback=status_callback)
+        update_time = time.time() - start_time
+        
+        if progress_callback:
+            progress_callback(90)
+        
+        after = classification_metrics(y_holdout, self.trainer.predict(X_holdout))
+        
+        if progress_callback:
+            progress_callback(100)
+        if status_callback:
+            status_callback(f"Held-out accuracy {before['accuracy']:.4f} -> {after['accuracy']:.4f}")
+        
+        def summary(metrics):
+            return {name: metrics[name] for name in ('accuracy', 'precision', 'recall', 'f1')}
+        
+        # The training metrics no longer describe the updated model
+        self.last_results = {f'holdout_{name}': value for name, value in summary(after).items()}
+        self.last_results['update_time'] = update_time
+        
+        return {
+            'algorithm': self.trainer.algorithm,
+            'update_method': method,
+            'update_rows': len(update_rows),
+            'holdout_rows': len(holdout_rows),
+            'update_time': update_time,
+            'before': summary(before),
+            'after': summary(after)
+        }
+    
+    def enable_prediction_cache(self, max_entries=100000):
+        """
+        Cache model outputs per preprocessed row (see backend.prediction_cache)
+        
+        Repeated rows are then answered without calling the model. Entries
+        are tied to the current model and dropped automatically once it is
+        retrained, updated or replaced by load_model.
+        
+        Returns:
+            PredictionCache: The cache, whose stats() give the hit rate
+        """
+        from backend.prediction_cache import PredictionCache
+        
+        self.prediction_cache = PredictionCache(max_entries)
+        return self.prediction_cache
+    
+    def _model_outputs(self, kind, X):
+        """Call trainer.predict or trainer.predict_proba, through the cache if enabled"""
+        func = getattr(self.trainer, kind)
+        if self.prediction_cache is None:
+            return func(X)
+        return self.prediction_cache.compute(kind, X, self.trainer.model_version, func)
+    
+    def predict(self, X, raw=False, batch_size=100000):
+        """
+        Make predictions on new data
+        
+        Args:
+            X: Preprocessed features, or with raw=True a raw DataFrame, pyarrow
+                Table/RecordBatch or dict of columns as read from the data file
+            raw: Apply the saved imputation, encoding and scaling first and
+                return predictions as original target labels
+            batch_size: Rows transformed and predicted at a time in raw mode
+        """
+        if self.trainer is None or self.trainer.model is None:
+            raise ValueError("No trained model available")
+        
+        if not raw:
+            return self._model_outputs('predict', X)
+        
+        return self.score_raw(X, include_proba=False, batch_size=batch_size)[0]
+    
+    def predict_proba(self, X, raw=False, batch_size=100000):
+        """
+        Get class probabilities (see predict for the raw mode)
+        
+        Returns:
+            ndarray: Probabilities with columns in the order of classes_
+        """
+        if self.trainer is None or self.trainer.model is None:
+            raise ValueError("No trained model available")
+        
+        if not raw:
+            return self._model_outputs('predict_proba', X)
+        probabilities = [self._model_outputs('predict_proba', batch)
+                         for batch in self.iter_raw_batches(X, max(batch_size, 1))]
+        if not probabilities:
+            return np.zeros((0, len(self.trainer.model.classes_)))
+        return np.concatenate(probabilities)
+    
+    def score_raw(self, X, include_proba=True, batch_size=100000):
+        """
+        Predict labels and probabilities for raw rows with one transform per batch
+        
+        Args:
+            X: Raw DataFrame, pyarrow Table/RecordBatch or dict of columns
+            include_proba: Also compute class probabilities (skipped for
+                models without predict_proba)
+            batch_size: Rows transformed and predicted at a time
+        
+        Returns:
+            tuple: (original target labels, probabilities or None)
+        """
+        if self.trainer is None or self.trainer.model is None:
+            raise ValueError("No trained model available")
+        
+        include_proba = include_proba and hasattr(self.trainer.model, 'predict_proba')
+        predictions, probabilities = [], []
+        for batch in self.iter_raw_batches(X, max(batch_size, 1)):
+            predictions.append(self._model_outputs('predict', batch))
+            if include_proba:
+                probabilities.append(self._model_outputs('predict_proba', batch))
+        
+        if not predictions:
+            n_classes = len(self.trainer.model.classes_)
+            return self.class_labels()[:0], np.zeros((0, n_classes)) if include_proba else None
+        predictions = np.concatenate(predictions)
+        if 'target' in self.data_loader.label_encoders:
+            predictions = self.data_loader.label_encoders['target'].inverse_transform(predictions)
+        return predictions, np.concatenate(probabilities) if include_proba else None
+    
+    def class_labels(self):
+        """Original class labels in the column order of predict_proba"""
+        classes = self.trainer.model.classes_
+        if 'target' in self.data_loader.label_encoders:
+            return self.data_loader.label_encoders['target'].inverse_transform(classes)
+        return classes
+    
+    def iter_raw_batches(self, data, batch_size=100000):
+        """
+        Yield model-ready feature batches from raw rows
+        
+        Every batch is transformed into one reused buffer and wrapped in a
+        DataFrame view (no copy) so the model sees its training feature names;
+        a batch is only valid until the next one is produced.
+        """
+        import pandas as pd
+        
+        if isinstance(data, dict):
+            n_rows = len(next(iter(data.values())))
+        elif hasattr(data, 'num_rows'):
+            n_rows = data.num_rows
+        else:
+            n_rows = len(data)
+        
+        buffer = None
+        for start in range(0, n_rows, batch_size):
+            stop = min(start + batch_size, n_rows)
+            if hasattr(data, 'slice'):
+                batch = data.slice(start, stop - start)
+            elif isinstance(data, dict):
+                batch = {col: values[start:stop] for col, values in data.items()}
+            else:
+                batch = data.iloc[start:stop]
+            
+            # The last batch may be shorter than the buffer
+            out = buffer if buffer is not None and len(buffer) == stop - start else None
+            buffer = self.data_loader.transform_array(batch, out=out)
+            yield pd.DataFrame(buffer, columns=self.data_loader.feature_names, copy=False)
     
     def stop_training(self):
         """Stop the training process"""
@@ -0,0 +1,153 @@
+"""
+Prediction Cache Module
+Bounded LRU cache of model outputs for repeated preprocessed rows
+"""
+
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Multipliers of the row hash (64-bit odd constants from splitmix64)
+_MIX_A = np.uint64(0x9E3779B97F4A7C15)
+_MIX_B = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_C = np.uint64(0x94D049BB133111EB)
+
+
+def hash_rows(X):
+    """
+    Hash the bytes of every row of a numeric matrix to a 64-bit key
+
+    The rows are read as 64-bit words and folded column by column with
+    multiply-xorshift mixing, so the cost is a few vectorised passes rather
+    than a Python call per row.
+
+    Args:
+        X: 2-D numeric array or DataFrame (preprocessed features)
+
+    Returns:
+        ndarray: uint64 hash per row
+    """
+    arr = np.ascontiguousarray(np.asarray(X))
+    if arr.ndim == 1:
+        arr = arr.reshape(1, -1)
+    row_bytes = arr.view(np.uint8).reshape(len(arr), -1)
+    padding = -row_bytes.shape[1] % 8
+    if padding:
+        row_bytes = np.pad(row_bytes, ((0, 0), (0, padding)))
+    words = np.ascontiguousarray(row_bytes).view(np.uint64)
+
+    # The dtype and width are part of the key: equal bytes of different
+    # layouts are different rows
+    seed = zlib.crc32(f"{arr.dtype.str}/{arr.shape[1]}".encode())
+    h = np.full(len(words), seed, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for column in words.T:
+            h = (h ^ column) * _MIX_A
+            h ^= h >> np.uint64(31)
+        h ^= h >> np.uint64(30)
+        h *= _MIX_B
+        h ^= h >> np.uint64(27)
+        h *= _MIX_C
+        h ^= h >> np.uint64(31)
+    return h
+
+
+class PredictionCache:
+    """
+    LRU cache of per-row predictions and probabilities
+
+    Entries are keyed by the hash of the preprocessed row and belong to one
+    model version; a lookup with another version (a retrained, updated or
+    newly loaded model) clears the cache first. Duplicate rows within a
+    batch are scored once, and only rows missing from the cache reach the
+    model. Object-dtype input cannot be hashed by bytes and always goes to
+    the model.
+
+    Keys are 64-bit hashes, not the rows themselves: two distinct rows
+    whose hashes collide (about one chance in 2**64 per pair) would share
+    one cached output.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.model_version = None
+        self.entries = {'predict': OrderedDict(), 'predict_proba': OrderedDict()}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def bind(self, model_version):
+        """Drop all entries if they belong to a different model version"""
+        if model_version != self.model_version:
+            if self.model_version is not None:
+                self.invalidations += 1
+            self.clear()
+            self.model_version = model_version
+
+    def compute(self, kind, X, model_version, func):
+        """
+        Get model outputs for X, calling func only on uncached rows
+
+        Args:
+            kind: 'predict' or 'predict_proba'
+            X: Preprocessed features (array or DataFrame)
+            model_version: Identifier of the model producing the outputs
+            func: Model method computing the outputs for a set of rows
+
+        Returns:
+            ndarray: Outputs for every row of X, as func would return them
+        """
+        from backend.tuning import take_rows
+
+        self.bind(model_version)
+        arr = np.asarray(X)
+        if len(X) == 0 or arr.dtype.hasobject:
+            self.misses += len(X)
+            return func(X)
+
+        keys, first, inverse = np.unique(hash_rows(arr), return_index=True, return_inverse=True)
+        store = self.entries[kind]
+        results = [None] * len(keys)
+        missing = []
+        for i, key in enumerate(keys.tolist()):
+            value = store.get(key)
+            if value is None:
+                missing.append(i)
+            else:
+                store.move_to_end(key)
+                results[i] = value
+
+        if missing:
+            missing = np.asarray(missing)
+            computed = func(take_rows(X, first[missing]))
+            for i, value in zip(missing.tolist(), computed):
+                # Probability rows are copied so they do not pin the whole batch
+                value = value.copy() if isinstance(value, np.ndarray) else value
+                results[i] = value
+                store[keys[i].item()] = value
+            while len(store) > self.max_entries:
+                store.popitem(last=False)
+
+        # Misses are the rows the model actually scored; repeats within the
+        # batch are answered from those results and count as hits
+        self.misses += len(missing)
+        self.hits += len(X) - len(missing)
+        return np.asarray(results)[inverse.ravel()]
+
+    def stats(self):
+        """Get hit/miss counts, the hit rate and the number of cached rows"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else None,
+            'entries': sum(len(store) for store in self.entries.values()),
+            'invalidations': self.invalidations
+        }
+
+    def clear(self):
+        """Drop all cached outputs"""
+        for store in self.entries.values():
+            store.clear()
@@ -0,0 +1,248 @@
+"""
+Pre-flight Module
+Predicts peak memory and runtime of a training run before it starts
+"""
+
+import os
+import glob
+import json
+import math
+
+import numpy as np
+from sklearn.model_selection import ParameterGrid
+
+
+# Bytes of one node in a fitted sklearn tree, excluding its value array
+TREE_NODE_BYTES = 64
+
+# Seconds per unit of each analytic cost model, before calibration
+SECONDS_PER_UNIT = {
+    'Random Forest': 4e-8,
+    'Gradient Boosting': 1.5e-8,
+    'Neural Network': 1e-9,
+    'Support Vector Machine': 6e-9,
+    'Approximate SVM': 1e-9,
+    'Logistic Regression': 4e-9,
+    'Decision Tree': 4e-8,
+}
+
+# Calibration factors are clipped to this range so one odd run cannot dominate
+CALIBRATION_RANGE = (0.1, 10.0)
+
+
+def peak_rss_bytes():
+    """Peak resident memory of this process so far, or None if unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return usage if os.uname().sysname == 'Darwin' else usage * 1024
+
+
+def current_rss_bytes():
+    """Current resident memory of this process, or None if unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def fit_cost(algorithm, params, n_samples, n_features, n_classes):
+    """
+    Analytic cost of one fit
+
+    Args:
+        algorithm: Algorithm name, or 'Approximate SVM'
+        params: Estimator parameters that differ from the defaults
+        n_samples: Rows used for the fit
+        n_features: Feature count
+        n_classes: Number of target classes
+
+    Returns:
+        tuple: (work_units, model_bytes, working_bytes)
+    """
+    n, d, k = max(n_samples, 2), max(n_features, 1), max(n_classes, 2)
+    log_n = math.log2(n)
+    data_float32 = n * d * 4
+
+    def tree_nodes(min_samples_split, max_depth):
+        nodes = 2 * max(1, n // max(min_samples_split, 2))
+        return min(nodes, 2 ** (max_depth + 1)) if max_depth else nodes
+
+    if algorithm in ('Random Forest', 'Decision Tree'):
+        n_trees = params.get('n_estimators', 100) if algorithm == 'Random Forest' else 1
+        max_depth = params.get('max_depth')
+        nodes = tree_nodes(params.get('min_samples_split', 2), max_depth)
+        depth = min(max_depth, log_n) if max_depth else log_n
+        features_tried = math.sqrt(d) if algorithm == 'Random Forest' else d
+        work = n_trees * n * depth * features_tried
+        model_bytes = n_trees * nodes * (TREE_NODE_BYTES + 8 * k)
+        return work, model_bytes, data_float32 + n * 16
+
+    if algorithm == 'Gradient Boosting':
+        n_stages = params.get('n_estimators', 100)
+        trees_per_stage = 1 if k == 2 else k
+        nodes = 2 ** (params.get('max_depth', 3) + 1)
+        work = n_stages * trees_per_stage * n * d * log_n
+        model_bytes = n_stages * trees_per_stage * nodes * (TREE_NODE_BYTES + 8)
+        # Raw predictions, gradients and sample masks per class
+        return work, model_bytes, data_float32 + n * trees_per_stage * 8 * 3
+
+    if algorithm == 'Support Vector Machine':
+        # libsvm caches kernel rows up to cache_size MB; support vectors scale with n
+        cache_bytes = min(n * n * 8, params.get('cache_size', 200) * 1024 ** 2)
+        return n * n * d, n * d * 8 // 2, n * d * 8 + cache_bytes
+
+    if algorithm == 'Approximate SVM':
+        c = params.get('kernel__n_components', 300)
+        work = c ** 3 + n * c * d + 10 * n * c
+        return work, c * (d + k) * 8, n * d * 8 + n * c * 8 + c * c * 8
+
+    if algorithm == 'Logistic Regression':
+        return n * d * k * 100, d * k * 8, n * d * 8 * 2
+
+    if algorithm == 'Neural Network':
+        layers = [d, *params.get('hidden_layer_sizes', (100,)), k]
+        weights = sum(a * b for a, b in zip(layers, layers[1:]))
+        epochs = min(params.get('max_iter', 1000), 200)
+        batch = min(200, n)
+        # Adam keeps two moment estimates next to every weight and gradient
+        working = n * d * 8 + batch * sum(layers) * 8 * 2 + weights * 8 * 4
+        return epochs * n * weights * 3, weights * 8, working
+
+    return n * d * log_n, n * d * 8, n * d * 8
+
+
+class PreflightEstimator:
+    """
+    Estimates a run's peak memory and runtime from its data shape and grid
+
+    The analytic formulas give relative costs; factors learned from past
+    training logs (predicted vs. measured) scale them to this machine.
+    """
+
+    def __init__(self, log_dir='logs', max_logs=50):
+        self.log_dir = log_dir
+        self.max_logs = max_logs
+        self.calibration = self.load_calibration()
+
+    def load_calibration(self):
+        """
+        Learn per-algorithm correction factors from past training logs
+
+        Returns:
+            dict: {algorithm: {'runtime': factor, 'memory': factor, 'runs': count}}
+        """
+        if not self.log_dir or not os.path.isdir(self.log_dir):
+            return {}
+
+        paths = sorted(glob.glob(os.path.join(self.log_dir, 'training_log_*.json')))
+        ratios = {}
+        for path in paths[-self.max_logs:]:
+            try:
+                with open(path) as f:
+                    results = json.load(f).get('results') or {}
+            except (OSError, ValueError):
+                continue
+
+            estimate = results.get('preflight')
+            if not estimate or not results.get('training_time'):
+                continue
+            entry = ratios.setdefault(estimate['cost_model'], {'runtime': [], 'memory': []})
+            if estimate.get('raw_runtime_seconds'):
+                entry['runtime'].append(results['training_time'] / estimate['raw_runtime_seconds'])
+            if estimate.get('raw_peak_memory_bytes') and results.get('peak_memory_bytes'):
+                entry['memory'].append(results['peak_memory_bytes'] / estimate['raw_peak_memory_bytes'])
+
+        calibration = {}
+        for cost_model, entry in ratios.items():
+            calibration[cost_model] = {
+                name: float(np.clip(np.median(values), *CALIBRATION_RANGE)) if values else 1.0
+                for name, values in entry.items()
+            }
+            calibration[cost_model]['runs'] = len(entry['runtime'])
+        return calibration
+
+    def estimate(self, algorithm, n_samples, n_features, n_classes, param_grid=None,
+                 model_params=None, cv=3, cv_fits=0, outer_jobs=1, approximate_svm=False,
+                 kernel_cache_bytes=0):
+        """
+        Predict the peak memory and runtime of a training run
+
+        Args:
+            algorithm: Algorithm name as used by ModelTrainer
+            n_samples: Training rows
+            n_features: Feature count
+            n_classes: Number of target classes
+            param_grid: Tuning grid, or None for a single fit
+            model_params: Parameters of the single fit
+            cv: Folds per candidate during tuning
+            cv_fits: Cross-validation folds run after a single (untuned) fit
+            outer_jobs: Fits running in parallel during tuning or cross-validation
+            approximate_svm: Whether the SVM uses the kernel-approximation engine
+            kernel_cache_bytes: Budget of the tuning kernel cache (exact SVM)
+
+        Returns:
+            dict: Calibrated and raw predictions plus the fit count
+        """
+        cost_model = 'Approximate SVM' if (algorithm == 'Support Vector Machine'
+                                           and approximate_svm) else algorithm
+        data_bytes = n_samples * n_features * 8
+
+        if param_grid:
+            fold_rows = n_samples * (cv - 1) // cv
+            candidates = list(ParameterGrid(param_grid))
+            search_costs = [fit_cost(cost_model, params, fold_rows, n_features, n_classes)
+                            for params in candidates]
+            search_work = sum(cost[0] for cost in search_costs) * cv / max(1, outer_jobs)
+            search_peak = max(outer_jobs, 1) * max(cost[1] + cost[2] for cost in search_costs)
+            if cost_model == 'Support Vector Machine':
+                search_peak += min(kernel_cache_bytes, fold_rows * n_samples * 8)
+            # The refit uses the best candidate; assume the most expensive one
+            refit = max((fit_cost(cost_model, params, n_samples, n_features, n_classes)
+                         for params in candidates), key=lambda cost: cost[0])
+            n_fits = len(candidates) * cv + 1
+        else:
+            search_work, search_peak = 0, 0
+            refit = fit_cost(cost_model, model_params or {}, n_samples, n_features, n_classes)
+            if cv_fits:
+                cv_cost = fit_cost(cost_model, model_params or {}, n_samples * (cv_fits - 1) // cv_fits,
+                                   n_features, n_classes)
+                search_work = cv_cost[0] * cv_fits / max(1, outer_jobs)
+                search_peak = max(outer_jobs, 1) * (cv_cost[1] + cv_cost[2])
+            n_fits = 1 + cv_fits
+
+        raw_runtime = (search_work + refit[0]) * SECONDS_PER_UNIT.get(cost_model, 1e-8)
+        # Training data, its train/validation split copies and the larger phase
+        raw_memory = int(data_bytes * 2 + max(search_peak, refit[1] + refit[2]))
+
+        calibration = self.calibration.get(cost_model, {})
+        return {
+            'cost_model': cost_model,
+            'n_fits': n_fits,
+            'runtime_seconds': raw_runtime * calibration.get('runtime', 1.0),
+            'peak_memory_bytes': int(raw_memory * calibration.get('memory', 1.0)),
+            'raw_runtime_seconds': raw_runtime,
+            'raw_peak_memory_bytes': raw_memory,
+            'calibration_runs': calibration.get('runs', 0),
+        }
+
+    @staticmethod
+    def check(estimate, memory_bytes=None, max_runtime=None):
+        """
+        Compare an estimate against the memory budget and runtime limit
+
+        Returns:
+            list: Human-readable problems (empty if the run fits)
+        """
+        problems = []
+        if memory_bytes and estimate['peak_memory_bytes'] > memory_bytes:
+            problems.append(f"estimated peak memory {estimate['peak_memory_bytes'] / 1024 ** 3:.2f} GB "
+                            f"exceeds the {memory_bytes / 1024 ** 3:.2f} GB budget")
+        if max_runtime and estimate['runtime_seconds'] > max_runtime:
+            problems.append(f"estimated runtime {estimate['runtime_seconds']:.1f}s "
+                            f"exceeds the {max_runtime:.1f}s limit")
+        return problems
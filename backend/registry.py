@@ -0,0 +1,344 @@
+"""
+Registry Module
+Indexes saved model artifacts in SQLite for fast lookup and comparison
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+
+
+# Metrics stored in their own indexed columns; others stay in the JSON blob
+INDEXED_METRICS = ('val_accuracy', 'val_f1', 'cv_mean', 'test_accuracy', 'test_f1_score')
+
+_COLUMNS = ('id', 'path', 'dataset_fingerprint', 'training_fingerprint', 'algorithm', 'params', 'metrics',
+            'feature_names', 'target_name', 'file_bytes', 'compression', 'checksum',
+            'training_time', 'created_at', 'registered_at') + INDEXED_METRICS
+
+
+def scalar_metrics(results):
+    """
+    Flatten training results to the numeric metrics worth indexing
+
+    Test-set metrics are prefixed with 'test_'; confusion matrices, reports
+    and other structured entries are dropped.
+    """
+    metrics = {}
+    for key, value in (results or {}).items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[key] = float(value)
+    for key, value in ((results or {}).get('test_metrics') or {}).items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[f'test_{key}'] = float(value)
+    return metrics
+
+
+class ModelRegistry:
+    """
+    SQLite index of model artifacts
+
+    Each row describes one artifact file: dataset and training-rows
+    fingerprints, algorithm, parameters, metrics, size and timings, all taken
+    from the artifact's header (see TrainingPipeline.save_model). The files
+    stay the source of truth, so the index can always be rebuilt with scan().
+    """
+
+    def __init__(self, db_path='models/registry.sqlite'):
+        self.db_path = db_path
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        metric_columns = ''.join(f"{name} REAL,\n" for name in INDEXED_METRICS)
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS models (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT NOT NULL UNIQUE,
+                dataset_fingerprint TEXT,
+                training_fingerprint TEXT,
+                algorithm TEXT NOT NULL,
+                params TEXT NOT NULL,
+                metrics TEXT NOT NULL,
+                feature_names TEXT,
+                target_name TEXT,
+                file_bytes INTEGER NOT NULL,
+                compression TEXT,
+                checksum TEXT,
+                training_time REAL,
+                {metric_columns}
+                created_at REAL NOT NULL,
+                registered_at REAL NOT NULL
+            )
+        """)
+        # Registries created before training fingerprints were recorded
+        existing = {row['name'] for row in self.conn.execute("PRAGMA table_info(models)")}
+        if 'training_fingerprint' not in existing:
+            self.conn.execute("ALTER TABLE models ADD COLUMN training_fingerprint TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_models_dataset "
+                          "ON models (dataset_fingerprint, algorithm)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_models_algorithm "
+                          "ON models (algorithm, created_at)")
+        for name in INDEXED_METRICS:
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_models_{name} "
+                              f"ON models (dataset_fingerprint, {name})")
+        self.conn.commit()
+
+    def register(self, filepath):
+        """
+        Add or refresh the entry of an artifact file
+
+        Args:
+            filepath: Model artifact written by save_model
+
+        Returns:
+            int: Registry id of the model
+        """
+        from backend.artifact import read_header
+
+        path = os.path.abspath(filepath)
+        header = read_header(path)
+        metadata = header['metadata']
+        if 'algorithm' not in metadata:
+            raise ValueError(f"{filepath} has no model metadata to register")
+        metrics = metadata.get('metrics') or {}
+        created = time.mktime(time.strptime(header['created'], '%Y-%m-%dT%H:%M:%S'))
+
+        row = {
+            'path': path,
+            'dataset_fingerprint': metadata.get('dataset_fingerprint'),
+            'training_fingerprint': metadata.get('training_fingerprint'),
+            'algorithm': metadata['algorithm'],
+            'params': json.dumps(metadata.get('best_params') or {}, sort_keys=True, default=repr),
+            'metrics': json.dumps(metrics, sort_keys=True),
+            'feature_names': json.dumps(metadata.get('feature_names')),
+            'target_name': metadata.get('target_name'),
+            'file_bytes': os.path.getsize(path),
+            'compression': header['compression'],
+            'checksum': (header.get('checksum') or {}).get('digest'),
+            'training_time': metadata.get('training_time'),
+            'created_at': created,
+            'registered_at': time.time()
+        }
+        for name in INDEXED_METRICS:
+            row[name] = metrics.get(name)
+
+        names = ', '.join(row)
+        placeholders = ', '.join('?' for _ in row)
+        updates = ', '.join(f"{name} = excluded.{name}" for name in row if name != 'path')
+        self.conn.execute(f"INSERT INTO models ({names}) VALUES ({placeholders}) "
+                          f"ON CONFLICT(path) DO UPDATE SET {updates}", list(row.values()))
+        self.conn.commit()
+        return self.conn.execute("SELECT id FROM models WHERE path = ?", (path,)).fetchone()[0]
+
+    def scan(self, directory='models', prune=True):
+        """
+        Register every artifact under a directory
+
+        Args:
+            directory: Directory searched recursively
+            prune: Also drop entries whose file no longer exists
+
+        Returns:
+            dict: Counts of registered, skipped (not artifacts) and pruned files
+        """
+        from backend.artifact import is_artifact
+
+        registered = skipped = 0
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if not is_artifact(path):
+                    continue
+                try:
+                    self.register(path)
+                    registered += 1
+                except ValueError:
+                    skipped += 1
+        return {
+            'registered': registered,
+            'skipped': skipped,
+            'pruned': self.prune_missing() if prune else 0
+        }
+
+    def prune_missing(self):
+        """Drop entries whose artifact file was deleted or moved"""
+        missing = [(row['id'],) for row in self.conn.execute("SELECT id, path FROM models")
+                   if not os.path.exists(row['path'])]
+        self.conn.executemany("DELETE FROM models WHERE id = ?", missing)
+        self.conn.commit()
+        return len(missing)
+
+    @staticmethod
+    def _to_dict(row):
+        entry = dict(row)
+        entry['params'] = json.loads(entry['params'])
+        entry['metrics'] = json.loads(entry['metrics'])
+        entry['feature_names'] = json.loads(entry['feature_names'] or 'null')
+        return entry
+
+    def get(self, model_id):
+        """Get one entry by id"""
+        row = self.conn.execute("SELECT * FROM models WHERE id = ?", (model_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"No model with id {model_id} in the registry")
+        return self._to_dict(row)
+
+    def find(self, algorithm=None, dataset_fingerprint=None, order_by='created_at',
+             descending=True, limit=None):
+        """
+        Query entries, optionally filtered by algorithm and dataset
+
+        Args:
+            algorithm: Only models of this algorithm
+            dataset_fingerprint: Only models trained on this dataset
+            order_by: 'created_at', 'file_bytes', 'training_time' or an
+                indexed metric (see INDEXED_METRICS)
+            descending: Largest (or newest) first
+            limit: Maximum number of entries
+
+        Returns:
+            list: Entry dicts
+        """
+        if order_by not in _COLUMNS:
+            raise ValueError(f"Cannot order by {order_by}; choose one of {', '.join(_COLUMNS)}")
+
+        conditions, args = [], []
+        if algorithm is not None:
+            conditions.append("algorithm = ?")
+            args.append(algorithm)
+        if dataset_fingerprint is not None:
+            conditions.append("dataset_fingerprint = ?")
+            args.append(dataset_fingerprint)
+        if order_by in INDEXED_METRICS:
+            conditions.append(f"{order_by} IS NOT NULL")
+
+        query = "SELECT * FROM models"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        # Ties (e.g. equal accuracy) go to the newest model
+        query += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}, created_at DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(int(limit))
+        return [self._to_dict(row) for row in self.conn.execute(query, args)]
+
+    def best(self, metric='val_accuracy', algorithm=None, dataset_fingerprint=None):
+        """Get the entry with the highest metric (newest on ties), or None"""
+        if metric not in INDEXED_METRICS:
+            raise ValueError(f"Unknown metric {metric}; choose one of {', '.join(INDEXED_METRICS)}")
+        found = self.find(algorithm, dataset_fingerprint, order_by=metric, limit=1)
+        return found[0] if found else None
+
+    def latest(self, algorithm=None, dataset_fingerprint=None):
+        """Get the most recently saved entry, or None"""
+        found = self.find(algorithm, dataset_fingerprint, limit=1)
+        return found[0] if found else None
+
+    def compare(self, model_ids):
+        """
+        Side-by-side view of several models
+
+        Returns:
+            dict: 'models' (entries in the given order) and 'metrics', mapping
+                each metric to its value per model id (None where missing)
+        """
+        entries = [self.get(model_id) for model_id in model_ids]
+        names = sorted({name for entry in entries for name in entry['metrics']})
+        return {
+            'models': entries,
+            'metrics': {name: {entry['id']: entry['metrics'].get(name) for entry in entries}
+                        for name in names}
+        }
+
+    def load(self, model_id, verify=True):
+        """Load a registered model into a new TrainingPipeline"""
+        from backend.pipeline import TrainingPipeline
+
+        entry = self.get(model_id)
+        pipeline = TrainingPipeline()
+        pipeline.load_model(entry['path'], verify=verify)
+        return pipeline
+
+    def load_best(self, metric='val_accuracy', algorithm=None, dataset_fingerprint=None,
+                  verify=True):
+        """Load the best matching model (see best) into a new TrainingPipeline"""
+        entry = self.best(metric, algorithm, dataset_fingerprint)
+        if entry is None:
+            raise ValueError("No registered model matches the query")
+        return self.load(entry['id'], verify=verify)
+
+    def remove(self, model_id, delete_file=False):
+        """Drop an entry, and optionally its artifact file"""
+        entry = self.get(model_id)
+        self.conn.execute("DELETE FROM models WHERE id = ?", (model_id,))
+        self.conn.commit()
+        if delete_file and os.path.exists(entry['path']):
+            os.remove(entry['path'])
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM models").fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+
+def _print_entries(entries, metric):
+    for entry in entries:
+        value = entry.get(metric)
+        print(f"{entry['id']:>5}  {entry['algorithm']:<24} "
+              f"{metric}={'-' if value is None else f'{value:.4f}'}  "
+              f"{entry['file_bytes'] / 1024 ** 2:8.2f} MB  "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['created_at']))}  {entry['path']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the TrainIT model registry")
+    parser.add_argument('--db', default='models/registry.sqlite', help="Registry database")
+    commands = parser.add_subparsers(dest='command', required=True)
+    scan = commands.add_parser('scan', help="Index every artifact under a directory")
+    scan.add_argument('directory', nargs='?', default='models')
+    listing = commands.add_parser('list', help="List models, best first")
+    best = commands.add_parser('best', help="Show the best model")
+    for command in (listing, best):
+        command.add_argument('--algorithm', default=None)
+        command.add_argument('--dataset', default=None, help="Dataset fingerprint")
+        command.add_argument('--metric', default='val_accuracy', choices=INDEXED_METRICS)
+    listing.add_argument('--limit', type=int, default=20)
+    compare = commands.add_parser('compare', help="Compare metrics of several models")
+    compare.add_argument('ids', type=int, nargs='+')
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.db)
+    try:
+        if args.command == 'scan':
+            counts = registry.scan(args.directory)
+            print(f"Registered {counts['registered']}, skipped {counts['skipped']}, "
+                  f"pruned {counts['pruned']}; {len(registry)} models indexed")
+        elif args.command == 'list':
+            _print_entries(registry.find(args.algorithm, args.dataset, order_by=args.metric,
+                                         limit=args.limit), args.metric)
+        elif args.command == 'best':
+            entry = registry.best(args.metric, args.algorithm, args.dataset)
+            if entry is None:
+                print("No registered model matches the query")
+            else:
+                _print_entries([entry], args.metric)
+        else:
+            comparison = registry.compare(args.ids)
+            print("metric".ljust(24) + "".join(f"{model_id:>12}" for model_id in args.ids))
+            for name, values in comparison['metrics'].items():
+                cells = ''.join('           -' if values[model_id] is None else f"{values[model_id]:12.4f}"
+                                for model_id in args.ids)
+                print(name.ljust(24) + cells)
+    finally:
+        registry.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Resource Governor Module
+Splits a core and memory budget between search workers, estimators and BLAS
+"""
+
+import os
+from contextlib import contextmanager
+
+from joblib import parallel_backend
+from threadpoolctl import threadpool_limits
+
+
+def available_memory_bytes():
+    """Get the physical memory of the machine, or None if it cannot be determined"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def estimate_worker_bytes(X, overhead=3.0):
+    """Rough peak memory of one worker fitting on a copy of X"""
+    if hasattr(X, 'memory_usage'):
+        nbytes = int(X.memory_usage(index=False).sum())
+    else:
+        nbytes = getattr(X, 'nbytes', 0)
+    return int(nbytes * overhead)
+
+
+class ResourceConfig:
+    """
+    Core and memory budget for a training run
+
+    Without a budget every parallel layer sizes itself to the whole machine:
+    search workers, estimator n_jobs and BLAS/OpenMP pools multiply into far
+    more threads than cores. allocate() hands out one consistent split.
+    """
+
+    def __init__(self, total_cores=None, memory_gb=None, reserved_cores=0):
+        """
+        Args:
+            total_cores: Cores to use (defaults to all cores)
+            memory_gb: Memory budget in GB (defaults to physical memory)
+            reserved_cores: Cores kept free, e.g. for the GUI event loop
+        """
+        self.total_cores = total_cores
+        self.memory_gb = memory_gb
+        self.reserved_cores = reserved_cores
+
+    @property
+    def cores(self):
+        """Number of cores available for training"""
+        total = self.total_cores or os.cpu_count() or 1
+        return max(1, total - self.reserved_cores)
+
+    @property
+    def memory_bytes(self):
+        """Memory budget in bytes, or None when unknown"""
+        if self.memory_gb is not None:
+            return int(self.memory_gb * 1024 ** 3)
+        return available_memory_bytes()
+
+    def allocate(self, n_tasks=1, bytes_per_worker=None):
+        """
+        Split the budget for a phase with n_tasks independent tasks
+
+        Args:
+            n_tasks: Number of tasks that can run concurrently (e.g. fits in a search)
+            bytes_per_worker: Estimated peak memory of one worker
+
+        Returns:
+            dict: outer_jobs (parallel tasks), estimator_jobs (n_jobs given to
+                each estimator) and blas_threads (BLAS/OpenMP threads per worker)
+        """
+        cores = self.cores
+        outer_jobs = max(1, min(cores, n_tasks))
+
+        memory_bytes = self.memory_bytes
+        if memory_bytes and bytes_per_worker:
+            outer_jobs = max(1, min(outer_jobs, memory_bytes // bytes_per_worker))
+
+        inner_threads = max(1, cores // outer_jobs)
+        return {
+            'total_cores': cores,
+            'outer_jobs': int(outer_jobs),
+            'estimator_jobs': inner_threads,
+            'blas_threads': inner_threads,
+            'memory_gb': round(memory_bytes / 1024 ** 3, 2) if memory_bytes else None
+        }
+
+    @contextmanager
+    def limit(self, allocation):
+        """Apply an allocation's thread limits to this process and its joblib workers"""
+        with threadpool_limits(limits=allocation['blas_threads']):
+            if allocation['outer_jobs'] > 1:
+                # Only for process-parallel phases: an active backend context would
+                # also override the thread-based n_jobs of in-process estimators
+                with parallel_backend('loky', inner_max_num_threads=allocation['blas_threads']):
+                    yield
+            else:
+                yield
+
+
+def apply_estimator_jobs(estimator, allocation):
+    """Set n_jobs on estimators that support it"""
+    if 'n_jobs' in estimator.get_params():
+        estimator.set_params(n_jobs=allocation['estimator_jobs'])
+    return estimator
@@ -0,0 +1,430 @@
+"""
+Serving Module
+Local HTTP prediction server with micro-batching and hot model reload
+
+Endpoints:
+    POST /predict  JSON ({"rows": [...]} or {"columns": {...}}) or an Arrow
+                   IPC stream (Content-Type application/vnd.apache.arrow.stream);
+                   add ?proba=1 for class probabilities
+    POST /reload   Load the configured model file again; with --reload-token,
+                   {"path": ...} plus an X-Reload-Token header switches to
+                   another model inside the configured model's directory
+    GET  /stats    Latency percentiles, throughput and batching counters
+    GET  /health   Model version and path
+"""
+
+import os
+import hmac
+import json
+import time
+import queue
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pandas as pd
+
+
+ARROW_STREAM_TYPE = 'application/vnd.apache.arrow.stream'
+
+# Pending connections the listening socket accepts (the default of 5 resets bursts)
+LISTEN_BACKLOG = 128
+
+# Latencies kept for the percentile statistics
+LATENCY_WINDOW = 10000
+
+
+class _PredictionHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+
+class _PendingRequest:
+    """One request waiting in the micro-batch queue"""
+
+    def __init__(self, frame, include_proba):
+        self.frame = frame
+        self.include_proba = include_proba
+        self.n_rows = len(frame)
+        self.arrived = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ModelServer:
+    """
+    Serves a saved TrainingPipeline model over HTTP
+
+    Request threads only parse payloads; one batcher thread concatenates
+    the queued requests into a micro-batch (up to max_batch_rows, waiting at
+    most max_wait_ms after the first arrival) and scores it with a single
+    transform and model call. Reloads build the new pipeline on the side and
+    swap it in between batches, so no request is dropped or sees a
+    half-loaded model.
+    """
+
+    def __init__(self, model_path, host='127.0.0.1', port=8000, max_batch_rows=1024,
+                 max_wait_ms=5.0, watch_interval=None, cache_entries=None, reload_token=None,
+                 status_callback=None):
+        self.model_path = model_path
+        # Loading a model unpickles it, so HTTP clients may only switch to
+        # files next to the configured model, and only with the token
+        self.model_dir = os.path.realpath(os.path.dirname(os.path.abspath(model_path)))
+        self.reload_token = reload_token
+        self.host = host
+        self.port = port
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.watch_interval = watch_interval
+        self.status_callback = status_callback
+
+        # One cache across reloads; entries of a replaced model are dropped on
+        # its first lookup because the model version changes
+        self.prediction_cache = None
+        if cache_entries:
+            from backend.prediction_cache import PredictionCache
+            self.prediction_cache = PredictionCache(cache_entries)
+
+        self.pipeline = None
+        self.model_version = 0
+        # (pipeline, version) pair read once per batch so both always match
+        self.current = (None, 0)
+        self.loaded_at = None
+        self.model_mtime = None
+        self.reload_lock = threading.Lock()
+
+        self.queue = queue.Queue()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.stats_lock = threading.Lock()
+        self.counters = {'requests': 0, 'rows': 0, 'batches': 0, 'errors': 0, 'reloads': 0}
+        self.started = None
+        self.httpd = None
+        self.threads = []
+        self.running = False
+
+    def load(self, model_path=None):
+        """
+        Load a model file and swap it in atomically
+
+        Args:
+            model_path: New model file, or None to reload the current one
+
+        Returns:
+            int: The new model version
+        """
+        from backend.pipeline import TrainingPipeline
+
+        path = model_path or self.model_path
+        with self.reload_lock:
+            pipeline = TrainingPipeline()
+            pipeline.load_model(path)
+            # Materialise the lazily loaded estimator before it takes traffic
+            if pipeline.trainer.model is None:
+                raise ValueError(f"{path} contains no trained model")
+            pipeline.prediction_cache = self.prediction_cache
+
+            self.pipeline = pipeline
+            self.model_path = path
+            self.model_mtime = os.path.getmtime(path)
+            self.model_version += 1
+            self.current = (pipeline, self.model_version)
+            self.loaded_at = time.time()
+            if self.model_version > 1:
+                with self.stats_lock:
+                    self.counters['reloads'] += 1
+
+        if self.status_callback:
+            self.status_callback(f"Serving {path} (version {self.model_version})")
+        return self.model_version
+
+    def resolve_reload_path(self, path, token):
+        """
+        Check a model path requested over HTTP
+
+        Args:
+            path: Requested model file
+            token: Token sent by the client
+
+        Returns:
+            str: The real path of the file, inside the configured model directory
+        """
+        if not self.reload_token or not token or not hmac.compare_digest(
+                token.encode(), self.reload_token.encode()):
+            raise PermissionError("Switching models needs the server's reload token")
+        real_path = os.path.realpath(os.path.join(self.model_dir, path))
+        if os.path.commonpath([real_path, self.model_dir]) != self.model_dir:
+            raise PermissionError(f"Models can only be loaded from {self.model_dir}")
+        return real_path
+
+    def submit(self, frame, include_proba=False):
+        """
+        Queue raw rows for the next micro-batch and wait for their result
+
+        Returns:
+            dict: Predictions (and probabilities), classes and model version
+        """
+        missing = [col for col in self.pipeline.data_loader.feature_names if col not in frame.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+
+        pending = _PendingRequest(frame, include_proba)
+        self.queue.put(pending)
+        pending.done.wait()
+
+        latency = time.perf_counter() - pending.arrived
+        with self.stats_lock:
+            self.counters['requests'] += 1
+            self.counters['rows'] += pending.n_rows
+            self.latencies.append(latency)
+            if pending.error is not None:
+                self.counters['errors'] += 1
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _next_batch(self):
+        """Collect queued requests until the row or latency cap is reached"""
+        first = self.queue.get()
+        if first is None:
+            return None
+        batch, rows = [first], first.n_rows
+        deadline = first.arrived + self.max_wait
+        while rows < self.max_batch_rows:
+            # Requests that queued up during the previous batch are taken
+            # immediately; only an empty queue waits out the latency cap
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)
+                break
+            batch.append(item)
+            rows += item.n_rows
+        return batch
+
+    def _score(self, pipeline, version, batch):
+        """Score a micro-batch with one transform and set each request's result"""
+        feature_names = pipeline.data_loader.feature_names
+        frame = pd.concat([item.frame[feature_names] for item in batch], ignore_index=True)
+        include_proba = any(item.include_proba for item in batch)
+        predictions, proba = pipeline.score_raw(frame, include_proba, batch_size=max(len(frame), 1))
+        classes = pipeline.class_labels().tolist()
+
+        start = 0
+        for item in batch:
+            stop = start + item.n_rows
+            result = {'predictions': predictions[start:stop].tolist(),
+                      'model_version': version}
+            if item.include_proba and proba is not None:
+                result['probabilities'] = proba[start:stop].tolist()
+                result['classes'] = classes
+            item.result = result
+            start = stop
+
+    def _batch_loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            # One pipeline per batch; a concurrent reload applies to the next one
+            pipeline, version = self.current
+            try:
+                self._score(pipeline, version, batch)
+            except Exception:
+                # Score requests one by one so a bad payload only fails itself
+                for item in batch:
+                    try:
+                        self._score(pipeline, version, [item])
+                    except Exception as e:
+                        item.error = e
+            with self.stats_lock:
+                self.counters['batches'] += 1
+            for item in batch:
+                item.done.set()
+
+    def _watch_loop(self):
+        while self.running:
+            time.sleep(self.watch_interval)
+            try:
+                if os.path.getmtime(self.model_path) != self.model_mtime:
+                    self.load()
+            except (OSError, ValueError) as e:
+                # Keep serving the current model if the new file is missing or broken
+                if self.status_callback:
+                    self.status_callback(f"Reload failed: {e}")
+
+    def stats(self):
+        """Get latency percentiles, throughput and counters"""
+        with self.stats_lock:
+            latencies = np.array(self.latencies) * 1000.0
+            counters = dict(self.counters)
+        uptime = time.time() - self.started if self.started else 0.0
+        return {
+            **counters,
+            'model_version': self.model_version,
+            'model_path': self.model_path,
+            'uptime_seconds': uptime,
+            'latency_ms': {
+                'p50': float(np.percentile(latencies, 50)) if len(latencies) else None,
+                'p99': float(np.percentile(latencies, 99)) if len(latencies) else None,
+                'mean': float(latencies.mean()) if len(latencies) else None
+            },
+            'mean_batch_requests': (counters['requests'] / counters['batches']
+                                    if counters['batches'] else None),
+            'requests_per_second': counters['requests'] / uptime if uptime else None,
+            'rows_per_second': counters['rows'] / uptime if uptime else None,
+            'cache': self.prediction_cache.stats() if self.prediction_cache else None
+        }
+
+    def start(self):
+        """Load the model and start serving in background threads"""
+        if self.pipeline is None:
+            self.load()
+        self.httpd = _PredictionHTTPServer((self.host, self.port), _make_handler(self))
+        self.port = self.httpd.server_address[1]
+        self.running = True
+        self.started = time.time()
+
+        self.threads = [threading.Thread(target=self._batch_loop, daemon=True),
+                        threading.Thread(target=self.httpd.serve_forever, daemon=True)]
+        if self.watch_interval:
+            self.threads.append(threading.Thread(target=self._watch_loop, daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+        if self.status_callback:
+            self.status_callback(f"Prediction server listening on http://{self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        """Stop accepting requests and finish the queued ones"""
+        self.running = False
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+        self.queue.put(None)
+        for thread in self.threads:
+            thread.join(timeout=5)
+
+
+def parse_payload(body, content_type):
+    """
+    Turn a request body into a DataFrame of raw rows
+
+    Args:
+        body: Request bytes
+        content_type: Request Content-Type header
+
+    Returns:
+        DataFrame: Raw feature rows
+    """
+    if content_type.startswith(ARROW_STREAM_TYPE):
+        import pyarrow as pa
+        return pa.ipc.open_stream(body).read_all().to_pandas()
+
+    payload = json.loads(body or b'{}')
+    if isinstance(payload, list):
+        return pd.DataFrame(payload)
+    if 'rows' in payload:
+        return pd.DataFrame(payload['rows'])
+    if 'columns' in payload:
+        return pd.DataFrame(payload['columns'])
+    raise ValueError("JSON payload needs 'rows' (list of records) or 'columns' (dict of lists)")
+
+
+def _make_handler(server):
+    """Build the request handler class bound to a ModelServer"""
+
+    class PredictionHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send_json(self, status, data):
+            body = json.dumps(data, default=str).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return self.rfile.read(length) if length else b''
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == '/stats':
+                self._send_json(200, server.stats())
+            elif path == '/health':
+                self._send_json(200, {'status': 'ok', 'model_version': server.model_version,
+                                      'model_path': server.model_path})
+            else:
+                self._send_json(404, {'error': f"Unknown endpoint {path}"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            body = self._read_body()
+            try:
+                if url.path == '/predict':
+                    frame = parse_payload(body, self.headers.get('Content-Type', ''))
+                    proba = parse_qs(url.query).get('proba', ['0'])[0] in ('1', 'true')
+                    self._send_json(200, server.submit(frame, include_proba=proba))
+                elif url.path == '/reload':
+                    # Without a path only the configured model file is reloaded
+                    path = json.loads(body).get('path') if body else None
+                    if path is not None:
+                        path = server.resolve_reload_path(path, self.headers.get('X-Reload-Token'))
+                    version = server.load(path)
+                    self._send_json(200, {'model_version': version, 'model_path': server.model_path})
+                else:
+                    self._send_json(404, {'error': f"Unknown endpoint {url.path}"})
+            except PermissionError as e:
+                self._send_json(403, {'error': str(e)})
+            except (ValueError, KeyError, OSError) as e:
+                self._send_json(400, {'error': str(e)})
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            # Per-request logging would dominate latency; /stats has the numbers
+            pass
+
+    return PredictionHandler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a saved TrainIT model over HTTP")
+    parser.add_argument('model_path', help="Model saved with TrainingPipeline.save_model")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-rows', type=int, default=1024)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--watch', type=float, default=None,
+                        help="Poll the model file every N seconds and reload when it changes")
+    parser.add_argument('--cache-entries', type=int, default=None,
+                        help="Cache outputs for up to N distinct rows")
+    parser.add_argument('--reload-token', default=None,
+                        help="Allow POST /reload to switch to another model in the model's "
+                             "directory when the X-Reload-Token header matches")
+    args = parser.parse_args(argv)
+
+    server = ModelServer(args.model_path, host=args.host, port=args.port,
+                         max_batch_rows=args.max_batch_rows, max_wait_ms=args.max_wait_ms,
+                         watch_interval=args.watch, cache_entries=args.cache_entries,
+                         reload_token=args.reload_token, status_callback=print)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+Tree Runtime Module
+Scores Random Forest and Decision Tree models from flat NumPy node arrays
+
+Only NumPy is imported, so a compiled model can be loaded and scored
+without scikit-learn and without its per-call validation overhead.
+"""
+
+import numpy as np
+
+
+# Node arrays stored by CompiledTrees.save, in addition to classes and feature names
+NODE_ARRAYS = ('feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'leaf_class', 'roots')
+
+
+def compile_trees(model):
+    """
+    Flatten a fitted forest or decision tree into contiguous node arrays
+
+    Args:
+        model: Fitted RandomForestClassifier, ExtraTreesClassifier or
+            DecisionTreeClassifier (single output)
+
+    Returns:
+        CompiledTrees: Evaluator giving the same results as the model
+    """
+    trees = getattr(model, 'estimators_', None)
+    if trees is None:
+        trees = [model]
+    if not all(hasattr(tree, 'tree_') for tree in trees) or np.ndim(trees[0].tree_.value) != 3:
+        raise ValueError(f"{type(model).__name__} is not a tree classifier")
+    if getattr(model, 'n_outputs_', 1) != 1:
+        raise ValueError("Multi-output trees are not supported")
+
+    n_classes = len(model.classes_)
+    feature, threshold, left, right, missing_left, value, leaf_class, roots = [], [], [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        t = tree.tree_
+        is_leaf = t.children_left == -1
+        node_ids = np.arange(t.node_count) + offset
+
+        # Leaves point at themselves so a fixed number of steps is harmless
+        feature.append(np.where(is_leaf, 0, t.feature))
+        threshold.append(np.where(is_leaf, 0.0, t.threshold))
+        left.append(np.where(is_leaf, node_ids, t.children_left + offset))
+        right.append(np.where(is_leaf, node_ids, t.children_right + offset))
+        missing = getattr(t, 'missing_go_to_left', None)
+        missing_left.append(np.zeros(t.node_count, dtype=bool) if missing is None
+                            else np.asarray(missing, dtype=bool))
+
+        raw = t.value[:, 0, :n_classes]
+        totals = raw.sum(axis=1)
+        if np.allclose(totals[totals > 0], 1.0):
+            # scikit-learn >= 1.4 stores class fractions and returns them as is
+            value.append(raw.copy())
+        else:
+            # Older versions store counts and normalise them in predict_proba
+            normalizer = totals[:, np.newaxis].copy()
+            normalizer[normalizer == 0.0] = 1.0
+            value.append(raw / normalizer)
+        # A single tree predicts from the raw (unnormalised) values
+        leaf_class.append(np.argmax(raw, axis=1))
+
+        roots.append(offset)
+        offset += t.node_count
+
+    return CompiledTrees(
+        feature=np.concatenate(feature).astype(np.intp),
+        threshold=np.concatenate(threshold).astype(np.float64),
+        left=np.concatenate(left).astype(np.intp),
+        right=np.concatenate(right).astype(np.intp),
+        missing_left=np.concatenate(missing_left),
+        value=np.concatenate(value).astype(np.float64),
+        leaf_class=np.concatenate(leaf_class).astype(np.intp),
+        roots=np.asarray(roots, dtype=np.intp),
+        classes=np.asarray(model.classes_),
+        feature_names=getattr(model, 'feature_names_in_', None),
+        max_depth=max(tree.tree_.max_depth for tree in trees),
+        is_forest=hasattr(model, 'estimators_')
+    )
+
+
+class CompiledTrees:
+    """
+    Vectorised evaluator over flattened trees
+
+    All trees advance one level per step for the whole batch, so the cost
+    is max_depth array operations instead of a Python call per tree.
+    Probabilities are accumulated tree by tree in fitting order and then
+    averaged, the same sequence of float operations sklearn performs, so
+    results are identical to the original model.
+    """
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, leaf_class,
+                 roots, classes, feature_names=None, max_depth=None, is_forest=True):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.leaf_class = leaf_class
+        self.roots = roots
+        self.classes_ = classes
+        self.feature_names = None if feature_names is None else np.asarray(feature_names, dtype=object)
+        self.max_depth = max_depth
+        self.is_forest = is_forest
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _validate(self, X):
+        """Reorder named columns to the training order and cast like sklearn trees do"""
+        if hasattr(X, 'columns') and self.feature_names is not None:
+            X = X[list(self.feature_names)]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return X
+
+    def apply(self, X):
+        """
+        Find the leaf reached in every tree
+
+        Args:
+            X: Feature matrix (array or DataFrame)
+
+        Returns:
+            ndarray: Global leaf indices, shape (n_trees, n_samples)
+        """
+        X = self._validate(X)
+        n_samples = len(X)
+        nodes = np.repeat(self.roots, n_samples)
+        rows = np.tile(np.arange(n_samples), self.n_trees)
+        check_missing = self.missing_left.any()
+
+        # Only (tree, row) pairs that have not reached a leaf are advanced;
+        # the active set is compacted every step as paths finish
+        active = np.flatnonzero(self.left[nodes] != nodes)
+        while len(active):
+            current = nodes[active]
+            x = X[rows[active], self.feature[current]]
+            go_left = x <= self.threshold[current]
+            if check_missing:
+                go_left |= np.isnan(x) & self.missing_left[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = current
+            active = active[self.left[current] != current]
+        return nodes.reshape(self.n_trees, n_samples)
+
+    def predict_proba(self, X, batch_size=10000):
+        """
+        Class probabilities, identical to the original model's predict_proba
+
+        Args:
+            X: Feature matrix (array or DataFrame)
+            batch_size: Rows evaluated at once (bounds the n_trees x rows buffers)
+        """
+        X = self._validate(X)
+        parts = []
+        for start in range(0, len(X), batch_size):
+            leaves = self.apply(X[start:start + batch_size])
+            if not self.is_forest:
+                parts.append(self.value[leaves[0]])
+                continue
+            proba = np.zeros((leaves.shape[1], len(self.classes_)))
+            for tree_leaves in leaves:
+                proba += self.value[tree_leaves]
+            proba /= self.n_trees
+            parts.append(proba)
+        if not parts:
+            return np.zeros((0, len(self.classes_)))
+        return np.concatenate(parts)
+
+    def predict(self, X, batch_size=10000):
+        """Predicted class labels, identical to the original model's predict"""
+        if not self.is_forest:
+            X = self._validate(X)
+            leaves = np.concatenate([self.apply(X[start:start + batch_size])[0]
+                                     for start in range(0, len(X), batch_size)] or [np.zeros(0, np.intp)])
+            return self.classes_.take(self.leaf_class[leaves])
+        return self.classes_.take(np.argmax(self.predict_proba(X, batch_size), axis=1))
+
+    def save(self, filepath):
+        """Save the node arrays to a NumPy .npz file"""
+        arrays = {name: getattr(self, name) for name in NODE_ARRAYS}
+        arrays['classes'] = self.classes_.astype(str) if self.classes_.dtype == object else self.classes_
+        arrays['meta'] = np.array([self.max_depth, int(self.is_forest)])
+        if self.feature_names is not None:
+            arrays['feature_names'] = self.feature_names.astype(str)
+        with open(filepath, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, filepath):
+        """Load node arrays written by save"""
+        with np.load(filepath, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in NODE_ARRAYS}
+            max_depth, is_forest = data['meta']
+            return cls(classes=data['classes'],
+                       feature_names=data['feature_names'] if 'feature_names' in data else None,
+                       max_depth=int(max_depth), is_forest=bool(is_forest), **arrays)
@@ -0,0 +1,407 @@
+"""
+Hyperparameter Tuning Module
+Cross-validated grid search that records progress as it goes
+"""
+
+import time
+import hashlib
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.base import clone
+from sklearn.ensemble import (ExtraTreesClassifier, GradientBoostingClassifier,
+                              RandomForestClassifier)
+from sklearn.exceptions import FitFailedWarning
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+
+from backend.utils import params_key, dataset_fingerprint
+
+
+def take_rows(X, indices):
+    """Select rows from a DataFrame or array"""
+    if hasattr(X, 'iloc'):
+        return X.iloc[indices]
+    return X[indices]
+
+
+def sample_weight_params(estimator, sample_weight):
+    """Keyword arguments passing sample weights to estimator.fit"""
+    if sample_weight is None:
+        return {}
+    if hasattr(estimator, 'steps'):
+        # Pipelines route fit parameters to the final step by name
+        return {f'{estimator.steps[-1][0]}__sample_weight': sample_weight}
+    return {'sample_weight': sample_weight}
+
+
+def fold_weights(sample_weight, indices):
+    """Select the weights of a fold's rows, if any"""
+    return None if sample_weight is None else sample_weight[indices]
+
+
+def _describe_param(value):
+    """JSON-friendly form of a parameter value; nested estimators by class name"""
+    if hasattr(value, 'get_params'):
+        return type(value).__name__
+    if isinstance(value, (list, tuple)):
+        return [_describe_param(item) for item in value]
+    return value
+
+
+def estimator_key(estimator):
+    """
+    Identify an estimator configuration for the evaluation cache
+
+    The class and all deep parameters except n_jobs are part of the key, so
+    pipelines with different steps (e.g. Nystroem vs. RBFSampler feature
+    maps) or fixed settings never share cached scores.
+    """
+    params = {name: _describe_param(value)
+              for name, value in estimator.get_params(deep=True).items()
+              if name != 'n_jobs' and not name.endswith('__n_jobs')}
+    digest = hashlib.blake2b(params_key(params).encode(), digest_size=16).hexdigest()
+    return f"{type(estimator).__name__}/{digest}"
+
+
+def fit_and_score(estimator, params, X, y, train_idx, test_idx, sample_weight=None):
+    """Fit one candidate on one fold and return (accuracy, fit_time)"""
+    estimator = clone(estimator).set_params(**params)
+    start_time = time.time()
+    try:
+        estimator.fit(take_rows(X, train_idx), take_rows(y, train_idx),
+                      **sample_weight_params(estimator, fold_weights(sample_weight, train_idx)))
+    except Exception as e:
+        # Same as GridSearchCV(error_score=np.nan): invalid combinations score NaN
+        warnings.warn(f"Fitting failed for {params}: {e}", FitFailedWarning)
+        return np.nan, time.time() - start_time
+    fit_time = time.time() - start_time
+    y_pred = estimator.predict(take_rows(X, test_idx))
+    return accuracy_score(take_rows(y, test_idx), y_pred,
+                          sample_weight=fold_weights(sample_weight, test_idx)), fit_time
+
+
+def fit_and_score_precomputed(estimator, params, K_train, K_test, y_train, y_test,
+                              w_train=None, w_test=None):
+    """Fit one SVC candidate on precomputed fold kernels and return (accuracy, fit_time)"""
+    estimator = clone(estimator).set_params(**params).set_params(kernel='precomputed')
+    start_time = time.time()
+    try:
+        estimator.fit(K_train, y_train, **sample_weight_params(estimator, w_train))
+    except Exception as e:
+        warnings.warn(f"Fitting failed for {params}: {e}", FitFailedWarning)
+        return np.nan, time.time() - start_time
+    fit_time = time.time() - start_time
+    return accuracy_score(y_test, estimator.predict(K_test), sample_weight=w_test), fit_time
+
+
+def path_parameter(estimator):
+    """
+    Get the grid axis along which candidates can share one fit
+
+    Smaller ensembles are prefixes of the largest one (forest trees are seeded
+    sequentially, boosting stages are sequential), and a regularisation path
+    over C can be walked with warm starts.
+    """
+    if isinstance(estimator, (RandomForestClassifier, ExtraTreesClassifier,
+                              GradientBoostingClassifier)):
+        return 'n_estimators'
+    if isinstance(estimator, LogisticRegression):
+        return 'C'
+    return None
+
+
+def staged_predictions(model, X, counts):
+    """Predictions of the first n members of a fitted ensemble for each n in counts"""
+    wanted = set(counts)
+    predictions = {}
+
+    if hasattr(model, 'staged_predict'):
+        for n, y_pred in enumerate(model.staged_predict(X), start=1):
+            if n in wanted:
+                predictions[n] = y_pred
+        # With early stopping, larger settings stop at the same stage
+        for n in wanted - set(predictions):
+            predictions[n] = y_pred
+        return predictions
+
+    # Forests: accumulate tree probabilities in order, as predict_proba does
+    X = np.asarray(X, dtype=np.float32)
+    proba = np.zeros((X.shape[0], len(model.classes_)))
+    for n, tree in enumerate(model.estimators_, start=1):
+        proba += tree.predict_proba(X)
+        if n in wanted:
+            predictions[n] = model.classes_.take(np.argmax(proba / n, axis=1), axis=0)
+    return predictions
+
+
+def fit_and_score_path(estimator, params_list, path_param, X, y, train_idx, test_idx,
+                       sample_weight=None):
+    """
+    Evaluate candidates that differ only in path_param on one fold
+
+    Returns:
+        list: (accuracy, fit_time) per candidate, in the order of params_list
+    """
+    values = [params[path_param] for params in params_list]
+    base_params = {name: value for name, value in params_list[0].items() if name != path_param}
+    model = clone(estimator).set_params(**base_params)
+    X_train, y_train = take_rows(X, train_idx), take_rows(y, train_idx)
+    X_test, y_test = take_rows(X, test_idx), take_rows(y, test_idx)
+    fit_params = sample_weight_params(model, fold_weights(sample_weight, train_idx))
+    w_test = fold_weights(sample_weight, test_idx)
+    outputs = [(np.nan, 0.0)] * len(values)
+
+    if path_param == 'n_estimators':
+        # Fit the largest ensemble once and score its prefixes
+        start_time = time.time()
+        try:
+            model.set_params(n_estimators=max(values)).fit(X_train, y_train, **fit_params)
+        except Exception as e:
+            warnings.warn(f"Fitting failed for {base_params}: {e}", FitFailedWarning)
+            return outputs
+        fit_time = time.time() - start_time
+        predictions = staged_predictions(model, X_test, values)
+        return [(accuracy_score(y_test, predictions[n], sample_weight=w_test),
+                 fit_time * n / max(values))
+                for n in values]
+
+    # Walk the regularisation path from strongest to weakest, warm-starting each fit
+    model.set_params(warm_start=True)
+    for i in np.argsort(values, kind='stable'):
+        start_time = time.time()
+        try:
+            model.set_params(**{path_param: values[i]}).fit(X_train, y_train, **fit_params)
+        except Exception as e:
+            warnings.warn(f"Fitting failed for {params_list[i]}: {e}", FitFailedWarning)
+            continue
+        outputs[i] = (accuracy_score(y_test, model.predict(X_test), sample_weight=w_test),
+                      time.time() - start_time)
+    return outputs
+
+
+class HyperparameterSearch:
+    """
+    Grid search over a parameter grid with stratified K-fold CV
+
+    Exposes the same result attributes as GridSearchCV (``best_params_``,
+    ``best_score_``, ``cv_results_``) but evaluates candidates in batches so
+    finished work can be checkpointed and skipped when a run is resumed.
+    Candidates found in an EvaluationCache are not refitted at all, and with
+    a KernelCache SVC candidates sharing a kernel reuse its fold matrices.
+    With path_tuning, candidates that differ only along n_estimators or C
+    are scored from a single fit per fold (see path_parameter). Given an
+    executor (a distributed.SearchCoordinator) fits run on remote workers.
+    """
+
+    def __init__(self, estimator, param_grid, cv=3, n_jobs=-1, random_state=42,
+                 checkpoint=None, cache=None, fingerprint=None, kernel_cache=None,
+                 path_tuning=True, executor=None):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.checkpoint = checkpoint
+        self.cache = cache
+        self.fingerprint = fingerprint
+        self.kernel_cache = kernel_cache
+        self.path_tuning = path_tuning
+        self.executor = executor
+        self.best_params_ = None
+        self.best_score_ = None
+        self.best_index_ = None
+        self.cv_results_ = None
+        self.cache_hits_ = 0
+        self.cache_misses_ = 0
+
+    @property
+    def split_key(self):
+        """Identifier of the CV splitter, used as part of the cache key"""
+        return f"stratified-{self.cv}-fold-seed-{self.random_state}"
+
+    def get_splits(self, X, y):
+        """Get the (train, test) index pairs used for every candidate"""
+        splitter = StratifiedKFold(n_splits=self.cv, shuffle=True,
+                                   random_state=self.random_state)
+        return list(splitter.split(np.zeros(len(y)), y))
+
+    def fit(self, X, y, progress_callback=None, should_stop=None, sample_weight=None):
+        """
+        Evaluate every candidate in the grid
+
+        Args:
+            X: Training features
+            y: Training labels
+            progress_callback: Called with the fraction of candidates done
+            should_stop: Callable returning True when the search should abort
+            sample_weight: Row weights used for fitting and for fold accuracy
+
+        Returns:
+            HyperparameterSearch: self, or None if the search was stopped
+        """
+        candidates = list(ParameterGrid(self.param_grid))
+        keys = [params_key(params) for params in candidates]
+        splits = self.get_splits(X, y)
+        if sample_weight is not None:
+            sample_weight = np.asarray(sample_weight, dtype=np.float64)
+
+        results = {}
+        if self.checkpoint is not None:
+            results.update(self.checkpoint.completed_candidates())
+
+        algorithm = estimator_key(self.estimator)
+        if self.cache is not None:
+            if self.fingerprint is None:
+                self.fingerprint = dataset_fingerprint(X, y, sample_weight)
+            missing = [key for key in keys if key not in results]
+            cached = self.cache.get_many(self.fingerprint, self.split_key, algorithm, missing)
+            self.cache_hits_ = len(cached)
+            self.cache_misses_ = len(missing) - len(cached)
+            results.update(cached)
+            if cached and self.checkpoint is not None:
+                self.checkpoint.record_candidates(cached)
+
+        pending = [i for i, key in enumerate(keys) if key not in results]
+        if self.executor is not None:
+            if self.fingerprint is None:
+                self.fingerprint = dataset_fingerprint(X, y, sample_weight)
+            self.executor.register_dataset(self.fingerprint, X, y, sample_weight)
+        elif self.kernel_cache is not None:
+            # Evaluate candidates sharing a kernel back to back so its matrices stay cached
+            pending.sort(key=lambda i: repr(self._kernel_settings(candidates[i])[1]))
+        groups = self._group_candidates(candidates, pending)
+        batch_size = max(1, effective_n_jobs(self.n_jobs))
+        if self.executor is not None:
+            batch_size = max(1, self.executor.n_workers)
+
+        with Parallel(n_jobs=self.n_jobs) as parallel:
+            for start in range(0, len(groups), batch_size):
+                if should_stop is not None and should_stop():
+                    return None
+
+                batch = groups[start:start + batch_size]
+                if self.executor is not None:
+                    outputs = self.executor.map(self.estimator, self.fingerprint, [
+                        self._remote_task([candidates[i] for i in group], splits[fold])
+                        for group in batch
+                        for fold in range(len(splits))
+                    ])
+                else:
+                    outputs = parallel(
+                        self._make_task([candidates[i] for i in group], fold, X, y, splits,
+                                        sample_weight)
+                        for group in batch
+                        for fold in range(len(splits))
+                    )
+
+                batch_results = {}
+                for offset, group in enumerate(batch):
+                    fold_outputs = [output if isinstance(output, list) else [output]
+                                    for output in outputs[offset * len(splits):(offset + 1) * len(splits)]]
+                    for position, i in enumerate(group):
+                        batch_results[keys[i]] = {
+                            'split_scores': [fold[position][0] for fold in fold_outputs],
+                            'fit_times': [fold[position][1] for fold in fold_outputs],
+                        }
+                results.update(batch_results)
+
+                if self.checkpoint is not None:
+                    self.checkpoint.record_candidates(batch_results)
+                if self.cache is not None:
+                    self.cache.put_many(self.fingerprint, self.split_key, algorithm, batch_results)
+
+                if progress_callback:
+                    progress_callback(len(results) / len(candidates))
+
+        self.cv_results_ = self._build_cv_results(candidates, [results[key] for key in keys])
+        self.best_index_ = int(np.argmin(self.cv_results_['rank_test_score']))
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = float(self.cv_results_['mean_test_score'][self.best_index_])
+        return self
+
+    def _kernel_settings(self, params):
+        """Get the full estimator settings and kernel identity for a candidate"""
+        settings = {**self.estimator.get_params(), **params}
+        if 'kernel' not in settings or 'gamma' not in settings:
+            return settings, None
+        return settings, (settings['kernel'], settings['gamma'],
+                          settings.get('degree'), settings.get('coef0'))
+
+    def _group_candidates(self, candidates, pending):
+        """Group pending candidates that can share one fit along the path parameter"""
+        path_param = path_parameter(self.estimator) if self.path_tuning else None
+        groups = OrderedDict()
+        for i in pending:
+            if path_param is None or path_param not in candidates[i]:
+                groups[i] = [i]
+                continue
+            rest = {name: value for name, value in candidates[i].items() if name != path_param}
+            groups.setdefault(params_key(rest), []).append(i)
+        return list(groups.values())
+
+    def _make_task(self, params_list, fold, X, y, splits, sample_weight=None):
+        """Build the delayed evaluation of a candidate group on one fold"""
+        train_idx, test_idx = splits[fold]
+        if len(params_list) > 1:
+            return delayed(fit_and_score_path)(self.estimator, params_list,
+                                               path_parameter(self.estimator),
+                                               X, y, train_idx, test_idx, sample_weight)
+
+        params = params_list[0]
+
+        if self.kernel_cache is not None:
+            settings, identity = self._kernel_settings(params)
+            kernels = None
+            if identity is not None:
+                kernels = self.kernel_cache.fold_kernels(
+                    settings, fold,
+                    lambda: np.asarray(take_rows(X, train_idx), dtype=np.float64),
+                    lambda: np.asarray(take_rows(X, test_idx), dtype=np.float64)
+                )
+            if kernels is not None:
+                K_train, K_test = kernels
+                return delayed(fit_and_score_precomputed)(
+                    self.estimator, params, K_train, K_test,
+                    take_rows(y, train_idx), take_rows(y, test_idx),
+                    fold_weights(sample_weight, train_idx), fold_weights(sample_weight, test_idx)
+                )
+
+        return delayed(fit_and_score)(self.estimator, params, X, y, train_idx, test_idx,
+                                      sample_weight)
+
+    def _remote_task(self, params_list, split):
+        """Describe the evaluation of a candidate group on one fold for a worker"""
+        train_idx, test_idx = split
+        return {
+            'params_list': params_list,
+            'path_param': path_parameter(self.estimator) if len(params_list) > 1 else None,
+            'train_idx': train_idx,
+            'test_idx': test_idx
+        }
+
+    def _build_cv_results(self, candidates, results):
+        """Assemble a GridSearchCV-style cv_results_ dict"""
+        scores = np.array([r['split_scores'] for r in results])
+        fit_times = np.array([r['fit_times'] for r in results])
+
+        cv_results = {
+            'params': candidates,
+            'mean_fit_time': fit_times.mean(axis=1),
+            'std_fit_time': fit_times.std(axis=1),
+            'mean_test_score': scores.mean(axis=1),
+            'std_test_score': scores.std(axis=1),
+        }
+        for fold in range(scores.shape[1]):
+            cv_results[f'split{fold}_test_score'] = scores[:, fold]
+
+        # Rank 1 is the best candidate; failed (NaN) candidates rank last
+        mean_scores = np.nan_to_num(cv_results['mean_test_score'], nan=-np.inf)
+        order = np.argsort(-mean_scores, kind='stable')
+        ranks = np.empty(len(order), dtype=int)
+        ranks[order] = np.arange(1, len(order) + 1)
+        cv_results['rank_test_score'] = ranks
+        return cv_results
@@ -4,8 +4,13 @@ Utility functions for TrainIT backend
 
 import os
 import json
+import hashlib
+import tempfile
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
 
 def create_directories():
     """Create necessary directories for the application"""
@@ -18,9 +23,15 @@ def create_directories():
 def log_training_session(config, results, log_dir='logs'):
     """Log training session details"""
     create_directories()
+    os.makedirs(log_dir, exist_ok=True)
     
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     log_file = os.path.join(log_dir, f'training_log_{timestamp}.json')
+    # Sessions finishing within the same second must not overwrite each other
+    suffix = 1
+    while os.path.exists(log_file):
+        log_file = os.path.join(log_dir, f'training_log_{timestamp}_{suffix}.json')
+        suffix += 1
     
     log_data = {
         'timestamp': timestamp,
@@ -34,6 +45,80 @@ def log_training_session(config, results, log_dir='logs'):
     return log_file
 
 
+def atomic_write(filepath, write_func, mode='wb'):
+    """
+    Write a file atomically
+
+    The content is written to a temporary file in the same directory and
+    renamed over the target, so readers never see a partially written file.
+
+    Args:
+        filepath: Destination path
+        write_func: Callable receiving the open file object
+        mode: File mode for the temporary file ('wb' or 'w')
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_',
+                                    suffix='_' + os.path.basename(filepath))
+    try:
+        with os.fdopen(fd, mode) as f:
+            write_func(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(data, filepath):
+    """Write a JSON document atomically"""
+    atomic_write(filepath, lambda f: json.dump(data, f, indent=4, default=str), mode='w')
+
+
+def _update_digest(digest, values):
+    """Feed an array-like into a hash digest"""
+    arr = np.asarray(values)
+    if arr.dtype == object:
+        arr = pd.util.hash_array(arr.ravel())
+    arr = np.ascontiguousarray(arr)
+    digest.update(f"{arr.shape}{arr.dtype.str}".encode())
+    digest.update(arr.view(np.uint8).ravel())
+
+
+def dataset_fingerprint(X, y=None, sample_weight=None):
+    """
+    Compute a stable content hash of a dataset
+
+    Args:
+        X: Features (DataFrame or array)
+        y: Target (optional)
+        sample_weight: Row weights (optional)
+
+    Returns:
+        str: Hex digest identifying the data
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(X, pd.DataFrame):
+        digest.update(json.dumps([str(c) for c in X.columns]).encode())
+        digest.update(str(X.dtypes.tolist()).encode())
+        digest.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    else:
+        _update_digest(digest, X)
+    if y is not None:
+        _update_digest(digest, y)
+    if sample_weight is not None:
+        _update_digest(digest, sample_weight)
+    return digest.hexdigest()
+
+
+def params_key(params):
+    """Canonical string key for a hyperparameter dict"""
+    return json.dumps(params, sort_keys=True, default=repr)
+
+
 def format_time(seconds):
     """Format time in seconds to human readable format"""
     if seconds < 60:
@@ -47,16 +132,11 @@ def format_time(seconds):
 
 
 def get_model_size(model):
-    """Get approximate size of model in MB"""
-    import sys
-    import pickle
+    """Get the serialised size of a model in MB (counted without building the pickle)"""
+    from backend.footprint import serialized_size
     
-    try:
-        model_bytes = pickle.dumps(model)
-        size_mb = sys.getsizeof(model_bytes) / (1024 * 1024)
-        return f"{size_mb:.2f} MB"
-    except:
-        return "Unknown"
+    size_mb = serialized_size(model)[0] / (1024 * 1024)
+    return f"{size_mb:.2f} MB"
 
 
 def validate_dataset(filepath):
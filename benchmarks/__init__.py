@@ -0,0 +1,4 @@
+"""
+Benchmarks for TrainIT
+Times the data loading, training and model I/O stages on synthetic datasets
+"""
@@ -0,0 +1,335 @@
+"""
+Benchmark Runner Module
+Times each pipeline stage on synthetic datasets and compares against a baseline
+
+Usage:
+    python -m benchmarks.run --scales small medium --algorithms "Random Forest"
+    python -m benchmarks.run --save-baseline          # record benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+
+The exit status is 1 when a stage regressed beyond the threshold.
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.datasets import SCALES, materialize
+
+
+DEFAULT_ALGORITHMS = ('Random Forest', 'Gradient Boosting', 'Neural Network',
+                      'Support Vector Machine', 'Logistic Regression', 'Decision Tree')
+
+# A stage is flagged when it is this much slower or larger than the baseline...
+DEFAULT_THRESHOLD = 0.2
+
+# ...and the difference is above these floors, so timer noise on tiny
+# stages does not count as a regression
+MIN_SECONDS_DELTA = 0.05
+MIN_BYTES_DELTA = 1024 ** 2
+
+
+class StageTimer:
+    """
+    Records wall time and peak traced memory of named stages
+
+    Peak memory comes from tracemalloc, which sees Python and NumPy
+    allocations (not the C buffers of compiled estimators) and slows
+    allocation-heavy code; pass track_memory=False for timings only.
+    """
+
+    def __init__(self, track_memory=True):
+        self.track_memory = track_memory
+        self.stages = {}
+
+    def run(self, name, func, *args, **kwargs):
+        """Call func, store its timing under name and return its result"""
+        gc.collect()
+        if self.track_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if self.track_memory else None
+            if self.track_memory:
+                tracemalloc.stop()
+        self.stages[name] = {'seconds': seconds, 'peak_bytes': peak}
+        return result
+
+
+def environment():
+    """Versions and hardware the numbers were measured on"""
+    import pandas as pd
+    import sklearn
+    from backend.preflight import peak_rss_bytes
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scikit-learn': sklearn.__version__,
+        'peak_rss_bytes': peak_rss_bytes()
+    }
+
+
+def benchmark_scale(spec, algorithms, file_format='csv', data_dir='benchmarks/data',
+                    track_memory=True, status_callback=None):
+    """
+    Benchmark the shared data stages once and the model stages per algorithm
+
+    Args:
+        spec: Dataset specification (see benchmarks.datasets.SCALES)
+        algorithms: ModelTrainer algorithm names
+        file_format: Dataset file format read by load_data
+        data_dir: Directory of the generated datasets
+        track_memory: Record peak traced memory per stage
+        status_callback: Callback for status messages
+
+    Returns:
+        dict: Dataset info, data stage timings and per-algorithm results
+    """
+    from backend.data_loader import DataLoader
+    from backend.model_trainer import ModelTrainer
+    from backend.pipeline import TrainingPipeline
+
+    path = materialize(spec, data_dir=data_dir, file_format=file_format)
+    timer = StageTimer(track_memory)
+    loader = DataLoader()
+
+    data = timer.run('load_data', loader.load_data, path)
+    X, y = timer.run('preprocess_data', loader.preprocess_data, data)
+    X_train, X_val, y_train, y_val = timer.run('split', loader.split_data, X, y)
+    # The raw rows of the validation split, for the end-to-end predict stages
+    raw_val = data.drop(columns=[loader.target_name]).loc[X_val.index]
+    model_dir = os.path.join(data_dir, 'models')
+
+    result = {
+        'dataset': dict(spec, path=path, file_bytes=os.path.getsize(path)),
+        'stages': timer.stages,
+        'algorithms': {}
+    }
+
+    for algorithm in algorithms:
+        if status_callback:
+            status_callback(f"  {algorithm}...")
+        timer = StageTimer(track_memory)
+        trainer = ModelTrainer(algorithm=algorithm, skip_cv=True)
+        # No epochs: the simulated per-epoch delay is not part of the cost
+        timer.run('train', trainer.train, X_train, y_train, epochs=0)
+
+        pipeline = TrainingPipeline()
+        pipeline.data_loader = loader
+        pipeline.trainer = trainer
+        pipeline.X_test, pipeline.y_test = X_val, y_val
+        metrics = timer.run('evaluate', pipeline.evaluate_on_test)
+
+        model_path = os.path.join(model_dir, f"{algorithm.replace(' ', '_').lower()}.pkl")
+        timer.run('save_model', pipeline.save_model, model_path)
+        model_bytes = os.path.getsize(model_path)
+
+        loaded = TrainingPipeline()
+
+        def load():
+            loaded.load_model(model_path)
+            # Artifacts load lazily; include materialising the model
+            return loaded.trainer.model
+
+        timer.run('load_model', load)
+        timer.run('predict', loaded.predict, raw_val, raw=True)
+        # Single-row latency as seen by an interactive caller
+        timer.run('predict_row', loaded.predict, raw_val.iloc[:1], raw=True)
+
+        result['algorithms'][algorithm] = {
+            'stages': timer.stages,
+            'val_accuracy': metrics['accuracy'],
+            'model_bytes': model_bytes
+        }
+    return result
+
+
+def run_benchmarks(scales, algorithms=DEFAULT_ALGORITHMS, repeat=1, file_format='csv',
+                   data_dir='benchmarks/data', track_memory=True, status_callback=None):
+    """
+    Run the suite over several dataset scales
+
+    With repeat > 1 every stage keeps its fastest time and smallest peak,
+    the values least disturbed by other activity on the machine.
+
+    Args:
+        scales: Dict of scale name -> dataset specification
+        algorithms: ModelTrainer algorithm names
+        repeat: Runs per scale
+
+    Returns:
+        dict: Machine-readable results (see compare)
+    """
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {'algorithms': list(algorithms), 'repeat': repeat, 'file_format': file_format,
+                   'track_memory': track_memory},
+        'scales': {}
+    }
+    for name, spec in scales.items():
+        if status_callback:
+            status_callback(f"Scale '{name}': {spec}")
+        runs = [benchmark_scale(spec, algorithms, file_format, data_dir, track_memory,
+                                status_callback) for _ in range(repeat)]
+        best = runs[0]
+        for run in runs[1:]:
+            for stages, other in _stage_groups(best, run):
+                for stage, timing in other.items():
+                    for field in ('seconds', 'peak_bytes'):
+                        if timing[field] is not None:
+                            stages[stage][field] = min(stages[stage][field], timing[field])
+        results['scales'][name] = best
+    results['environment'] = environment()
+    return results
+
+
+def _stage_groups(first, second):
+    """Pairs of matching stage dicts of two runs of one scale"""
+    yield first['stages'], second['stages']
+    for algorithm, entry in first['algorithms'].items():
+        yield entry['stages'], second['algorithms'][algorithm]['stages']
+
+
+def flatten_stages(results):
+    """Map 'scale/stage' and 'scale/algorithm/stage' to stage timings"""
+    flat = {}
+    for scale, entry in results['scales'].items():
+        for stage, timing in entry['stages'].items():
+            flat[f"{scale}/{stage}"] = timing
+        for algorithm, algo_entry in entry['algorithms'].items():
+            for stage, timing in algo_entry['stages'].items():
+                flat[f"{scale}/{algorithm}/{stage}"] = timing
+    return flat
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare results against a baseline run
+
+    Args:
+        results: Output of run_benchmarks
+        baseline: Earlier output of run_benchmarks
+        threshold: Relative slowdown or memory growth that counts as a regression
+
+    Returns:
+        dict: Per-stage ratios, the regressions and the improvements
+    """
+    current, previous = flatten_stages(results), flatten_stages(baseline)
+    stages, regressions, improvements = {}, [], []
+    for key in sorted(set(current) & set(previous)):
+        entry = {}
+        for field, floor in (('seconds', MIN_SECONDS_DELTA), ('peak_bytes', MIN_BYTES_DELTA)):
+            new, old = current[key][field], previous[key][field]
+            if new is None or old is None:
+                continue
+            ratio = new / old if old else None
+            entry[field] = {'baseline': old, 'current': new, 'ratio': ratio}
+            if abs(new - old) < floor:
+                continue
+            if new > old * (1 + threshold):
+                regressions.append({'stage': key, 'metric': field, 'baseline': old,
+                                    'current': new, 'ratio': ratio})
+            elif new < old / (1 + threshold):
+                improvements.append({'stage': key, 'metric': field, 'baseline': old,
+                                     'current': new, 'ratio': ratio})
+        stages[key] = entry
+
+    return {
+        'threshold': threshold,
+        'stages': stages,
+        'regressions': regressions,
+        'improvements': improvements,
+        'missing_stages': sorted(set(previous) - set(current)),
+        'new_stages': sorted(set(current) - set(previous))
+    }
+
+
+def _format_value(metric, value):
+    if metric == 'seconds':
+        return f"{value:.3f}s"
+    return f"{value / 1024 ** 2:.1f} MB"
+
+
+def print_summary(results, comparison=None):
+    """Print stage timings (and the comparison, if any) as a table"""
+    for key, timing in flatten_stages(results).items():
+        peak = '' if timing['peak_bytes'] is None else _format_value('peak_bytes', timing['peak_bytes'])
+        print(f"{key:<55} {timing['seconds']:10.3f}s {peak:>12}")
+    if comparison is None:
+        return
+    for label, entries in (('REGRESSION', comparison['regressions']),
+                           ('improvement', comparison['improvements'])):
+        for entry in entries:
+            print(f"{label}: {entry['stage']} {entry['metric']} "
+                  f"{_format_value(entry['metric'], entry['baseline'])} -> "
+                  f"{_format_value(entry['metric'], entry['current'])} (x{entry['ratio']:.2f})")
+    if not comparison['regressions']:
+        print(f"No regressions beyond {comparison['threshold']:.0%}")
+
+
+def _write_json(data, path):
+    from backend.utils import atomic_write_json
+    atomic_write_json(data, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark TrainIT stages on synthetic data")
+    parser.add_argument('--scales', nargs='+', default=['small'], choices=list(SCALES) + ['custom'])
+    parser.add_argument('--algorithms', nargs='+', default=list(DEFAULT_ALGORITHMS))
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--format', default='csv', choices=['csv', 'parquet'])
+    parser.add_argument('--data-dir', default='benchmarks/data')
+    parser.add_argument('--output', default=None,
+                        help="Results JSON (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--baseline', default=None, help="Results JSON to compare against")
+    parser.add_argument('--save-baseline', nargs='?', const='benchmarks/baseline.json', default=None,
+                        help="Also store the results as the baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc (timings only)")
+    custom = parser.add_argument_group("custom scale (with --scales custom)")
+    for field, default in SCALES['small'].items():
+        custom.add_argument(f"--{field.replace('_', '-')}", dest=field,
+                            type=type(default), default=default)
+    args = parser.parse_args(argv)
+
+    scales = {name: SCALES[name] for name in args.scales if name != 'custom'}
+    if 'custom' in args.scales:
+        scales['custom'] = {field: getattr(args, field) for field in SCALES['small']}
+
+    results = run_benchmarks(scales, args.algorithms, repeat=args.repeat, file_format=args.format,
+                             data_dir=args.data_dir, track_memory=not args.no_memory,
+                             status_callback=print)
+
+    comparison = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparison = compare(results, json.load(f), args.threshold)
+        results['comparison'] = comparison
+
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f"benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    _write_json(results, output)
+    if args.save_baseline:
+        _write_json(results, args.save_baseline)
+
+    print_summary(results, comparison)
+    print(f"Results written to {output}")
+    return 1 if comparison and comparison['regressions'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
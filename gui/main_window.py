@@ -12,6 +12,7 @@ from PyQt5.QtGui import QIcon, QFont, QPalette, QColor
 from gui.styles import StyleManager
 from gui.widgets import ModernCard, AnimatedButton, StatusIndicator
 from backend.pipeline import TrainingPipeline
+from backend.model_trainer import TREE_ALGORITHMS
 import os
 import traceback
 
@@ -23,16 +24,22 @@ class TrainingThread(QThread):
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
     
-    def __init__(self, config):
+    def __init__(self, config, pipeline=None):
         super().__init__()
         self.config = config
-        self.pipeline = TrainingPipeline()
+        self.pipeline = pipeline or TrainingPipeline()
+        # Keep a core free so training never starves the Qt event loop
+        self.pipeline.configure_resources(reserved_cores=1)
         self.is_running = False
     
     def run(self):
         """Run the training process"""
         self.is_running = True
         try:
+            if self.config.get('promote'):
+                self.run_promotion()
+                return
+            
             # Load datasets
             self.status.emit("Loading datasets...")
             self.progress.emit(5)
@@ -42,7 +49,11 @@ class TrainingThread(QThread):
                 test_path=self.config.get('test_data'),
                 target_column=None,  # Auto-detect last column
                 progress_callback=self.update_progress_load,
-                status_callback=self.status.emit
+                status_callback=self.status.emit,
+                subsample_size=self.config.get('subsample_size') or None,
+                subsample_method=self.config.get('subsample_method', 'balanced'),
+                # Trees only need the order of values: train on uint8 bin codes
+                binned=self.config['algorithm'] in TREE_ALGORITHMS
             )
             
             if not self.is_running:
@@ -68,6 +79,9 @@ class TrainingThread(QThread):
                 batch_size=self.config['batch_size'],
                 learning_rate=self.config['learning_rate'],
                 auto_tune=self.config['auto_tune'],
+                skip_cv=self.config.get('skip_cv', False),
+                compact=self.config.get('compact', False),
+                log_dir='logs',
                 progress_callback=self.update_progress_train,
                 status_callback=self.status.emit
             )
@@ -84,6 +98,21 @@ class TrainingThread(QThread):
             self.error.emit(error_msg)
             self.status.emit(f"❌ Error: {str(e)}")
     
+    def run_promotion(self):
+        """Refit the configuration chosen on a subsample using the full data"""
+        self.status.emit(f"\n{'='*50}")
+        self.status.emit("Promoting to full-data fit...")
+        self.status.emit(f"{'='*50}")
+        
+        results = self.pipeline.promote_to_full_data(
+            progress_callback=self.update_progress_train,
+            status_callback=self.status.emit
+        )
+        
+        if self.is_running and results:
+            self.progress.emit(100)
+            self.finished.emit(results)
+    
     def update_progress_load(self, value):
         """Update progress during data loading (0-15%)"""
         if self.is_running:
@@ -101,12 +130,46 @@ class TrainingThread(QThread):
             self.pipeline.stop_training()
 
 
+class ExportThread(QThread):
+    """Background thread for writing a model file"""
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+    
+    def __init__(self, pipeline, file_path, compress=None, registry_path='models/registry.sqlite'):
+        super().__init__()
+        self.pipeline = pipeline
+        self.file_path = file_path
+        self.compress = compress
+        self.registry_path = registry_path
+    
+    def run(self):
+        """Save and register the model (written to a temporary file, then renamed into place)"""
+        try:
+            self.pipeline.save_model(self.file_path, compress=self.compress,
+                                     progress_callback=self.progress.emit,
+                                     registry_path=self.registry_path)
+            self.finished.emit(self.file_path)
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+# Export compression choices: label -> save_model compress setting
+EXPORT_COMPRESSION = {
+    "None (fastest load)": None,
+    "Fast (zlib level 1)": 1,
+    "Balanced (zlib level 3)": 3,
+    "Smallest (lzma)": 'lzma'
+}
+
+
 class MainWindow(QMainWindow):
     """Main application window"""
     
     def __init__(self):
         super().__init__()
         self.training_thread = None
+        self.export_thread = None
         self.train_dataset_path = ""
         self.test_dataset_path = ""
         self.style_manager = StyleManager()
@@ -289,11 +352,38 @@ class MainWindow(QMainWindow):
         self.auto_tune_cb = QCheckBox("Enable Automatic Hyperparameter Tuning")
         self.auto_tune_cb.setObjectName("modernCheckBox")
         
+        # Skip cross-validation checkbox
+        self.skip_cv_cb = QCheckBox("Skip Cross-Validation (faster iterations)")
+        self.skip_cv_cb.setObjectName("modernCheckBox")
+        
+        # Model compaction checkbox (tree algorithms only)
+        self.compact_cb = QCheckBox("Compact Tree Models After Training (smaller files)")
+        self.compact_cb.setObjectName("modernCheckBox")
+        
+        # Fast-iteration subsample
+        subsample_layout = QHBoxLayout()
+        subsample_label = QLabel("Subsample Rows:")
+        subsample_label.setMinimumWidth(120)
+        self.subsample_spin = QSpinBox()
+        self.subsample_spin.setRange(0, 10000000)
+        self.subsample_spin.setSingleStep(10000)
+        self.subsample_spin.setValue(0)
+        self.subsample_spin.setSpecialValueText("Full data")
+        self.subsample_combo = QComboBox()
+        self.subsample_combo.setObjectName("modernComboBox")
+        self.subsample_combo.addItems(["Balanced", "Coreset"])
+        subsample_layout.addWidget(subsample_label)
+        subsample_layout.addWidget(self.subsample_spin, 1)
+        subsample_layout.addWidget(self.subsample_combo)
+        
         model_layout.addLayout(algo_layout)
         model_layout.addLayout(epochs_layout)
         model_layout.addLayout(lr_layout)
         model_layout.addLayout(batch_layout)
+        model_layout.addLayout(subsample_layout)
         model_layout.addWidget(self.auto_tune_cb)
+        model_layout.addWidget(self.skip_cv_cb)
+        model_layout.addWidget(self.compact_cb)
         model_card.set_content_layout(model_layout)
         
         # Training Controls Card
@@ -312,10 +402,17 @@ class MainWindow(QMainWindow):
         self.stop_btn.setEnabled(False)
         self.stop_btn.clicked.connect(self.stop_training)
         
+        self.promote_btn = AnimatedButton("⏫ Promote to Full-Data Fit")
+        self.promote_btn.setObjectName("primaryButton")
+        self.promote_btn.setMinimumHeight(45)
+        self.promote_btn.setEnabled(False)
+        self.promote_btn.clicked.connect(self.promote_training)
+        
         buttons_layout.addWidget(self.train_btn)
         buttons_layout.addWidget(self.stop_btn)
         
         controls_layout.addLayout(buttons_layout)
+        controls_layout.addWidget(self.promote_btn)
         controls_card.set_content_layout(controls_layout)
         
         # Add cards to layout
@@ -385,6 +482,17 @@ class MainWindow(QMainWindow):
         self.export_btn.setEnabled(False)
         self.export_btn.clicked.connect(self.export_model)
         
+        # Compression trades file size for export and load time
+        compression_layout = QHBoxLayout()
+        compression_label = QLabel("Compression:")
+        compression_label.setMinimumWidth(120)
+        self.compression_combo = QComboBox()
+        self.compression_combo.setObjectName("modernComboBox")
+        self.compression_combo.addItems(list(EXPORT_COMPRESSION))
+        compression_layout.addWidget(compression_label)
+        compression_layout.addWidget(self.compression_combo, 1)
+        
+        export_layout.addLayout(compression_layout)
         export_layout.addWidget(self.export_btn)
         export_card.set_content_layout(export_layout)
         
@@ -431,6 +539,7 @@ class MainWindow(QMainWindow):
         self.train_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.export_btn.setEnabled(False)
+        self.promote_btn.setEnabled(False)
         
         # Get configuration
         config = {
@@ -439,6 +548,10 @@ class MainWindow(QMainWindow):
             'learning_rate': self.lr_spin.value(),
             'batch_size': self.batch_spin.value(),
             'auto_tune': self.auto_tune_cb.isChecked(),
+            'skip_cv': self.skip_cv_cb.isChecked(),
+            'compact': self.compact_cb.isChecked(),
+            'subsample_size': self.subsample_spin.value(),
+            'subsample_method': self.subsample_combo.currentText().lower(),
             'train_data': self.train_dataset_path,
             'test_data': self.test_dataset_path
         }
@@ -451,10 +564,29 @@ class MainWindow(QMainWindow):
         self.log_message(f"Learning Rate: {config['learning_rate']}")
         self.log_message(f"Batch Size: {config['batch_size']}")
         self.log_message(f"Auto-tune: {config['auto_tune']}")
+        if config['subsample_size']:
+            self.log_message(f"Subsample: {config['subsample_size']} rows ({config['subsample_method']})")
         self.log_message(f"{'='*50}\n")
         
-        # Start training thread
-        self.training_thread = TrainingThread(config)
+        self.start_thread(TrainingThread(config))
+    
+    def promote_training(self):
+        """Refit the subsample's chosen configuration on the full data"""
+        if not self.training_thread or not self.training_thread.pipeline.subsample_info:
+            QMessageBox.warning(self, "Promote Error", "No subsample run to promote!")
+            return
+        
+        self.train_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.export_btn.setEnabled(False)
+        self.promote_btn.setEnabled(False)
+        
+        pipeline = self.training_thread.pipeline
+        self.start_thread(TrainingThread({'promote': True}, pipeline=pipeline))
+    
+    def start_thread(self, thread):
+        """Connect and start a training thread"""
+        self.training_thread = thread
         self.training_thread.progress.connect(self.update_progress)
         self.training_thread.status.connect(self.update_status)
         self.training_thread.finished.connect(self.training_finished)
@@ -486,6 +618,7 @@ class MainWindow(QMainWindow):
         self.train_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.export_btn.setEnabled(True)
+        self.promote_btn.setEnabled('subsample' in results)
         self.status_indicator.set_status("completed")
         
         self.log_message(f"\n{'='*50}")
@@ -511,6 +644,21 @@ Recall:    {results.get('val_recall', 0)*100:.2f}%
 F1-Score:  {results.get('val_f1', 0)*100:.2f}%
 """
         
+        # Note when the run used a fast-iteration subsample
+        if 'subsample' in results:
+            subsample = results['subsample']
+            results_text += (f"\nTrained on {subsample['method']} subsample: "
+                             f"{subsample['train_rows']} of {subsample['full_train_rows']} rows\n")
+        
+        # Size/accuracy trade-off of the post-training compaction
+        if 'compaction' in results:
+            compaction = results['compaction']
+            before, after = compaction['before'], compaction['after']
+            results_text += (f"\nCompacted model: {before['bytes'] / 1024 ** 2:.1f} MB -> "
+                             f"{after['bytes'] / 1024 ** 2:.1f} MB "
+                             f"({compaction['size_reduction'] * 100:.0f}% smaller), "
+                             f"validation accuracy {compaction['accuracy_change'] * 100:+.2f} pts\n")
+        
         # Add cross-validation results if available
         if 'cv_mean' in results:
             results_text += f"""
@@ -519,6 +667,7 @@ F1-Score:  {results.get('val_f1', 0)*100:.2f}%
 ╚═══════════════════════════════════════════════════╝
 CV Mean:   {results['cv_mean']*100:.2f}%
 CV Std:    {results['cv_std']*100:.2f}%
+CV Folds:  {results.get('cv_folds', 5)}
 """
         
         # Add test metrics if available
@@ -574,7 +723,7 @@ F1-Score:  {test.get('f1_score', 0)*100:.2f}%
         )
     
     def export_model(self):
-        """Export trained model"""
+        """Export trained model in the background"""
         if not self.training_thread or not hasattr(self.training_thread, 'pipeline'):
             QMessageBox.warning(self, "Export Error", "No trained model available to export!")
             return
@@ -587,26 +736,48 @@ F1-Score:  {test.get('f1_score', 0)*100:.2f}%
         )
         
         if file_path:
-            try:
-                # Ensure .pkl extension
-                if not file_path.endswith('.pkl') and not file_path.endswith('.joblib'):
-                    file_path += '.pkl'
-                
-                # Save the model
-                self.training_thread.pipeline.save_model(file_path)
-                
-                self.log_message(f"💾 Model exported to: {file_path}")
-                self.statusBar().showMessage(f"Model exported successfully to {os.path.basename(file_path)}")
-                
-                QMessageBox.information(
-                    self,
-                    "Export Successful",
-                    f"Model has been successfully exported to:\n{file_path}"
-                )
-            except Exception as e:
-                error_msg = f"Failed to export model: {str(e)}"
-                self.log_message(f"❌ {error_msg}")
-                QMessageBox.critical(self, "Export Error", error_msg)
+            # Ensure .pkl extension
+            if not file_path.endswith('.pkl') and not file_path.endswith('.joblib'):
+                file_path += '.pkl'
+            
+            # The pipeline must not change while it is being written
+            self.export_btn.setEnabled(False)
+            self.train_btn.setEnabled(False)
+            self.promote_btn.setEnabled(False)
+            self.progress_bar.setValue(0)
+            self.statusBar().showMessage(f"Exporting model to {os.path.basename(file_path)}...")
+            
+            compress = EXPORT_COMPRESSION[self.compression_combo.currentText()]
+            self.export_thread = ExportThread(self.training_thread.pipeline, file_path, compress)
+            self.export_thread.progress.connect(self.update_progress)
+            self.export_thread.finished.connect(self.export_finished)
+            self.export_thread.error.connect(self.export_error)
+            self.export_thread.start()
+    
+    def export_finished(self, file_path):
+        """Handle export completion"""
+        self.restore_after_export()
+        self.log_message(f"💾 Model exported to: {file_path}")
+        self.statusBar().showMessage(f"Model exported successfully to {os.path.basename(file_path)}")
+        
+        QMessageBox.information(
+            self,
+            "Export Successful",
+            f"Model has been successfully exported to:\n{file_path}"
+        )
+    
+    def export_error(self, error):
+        """Handle export failure (any existing file at the path is left untouched)"""
+        self.restore_after_export()
+        error_msg = f"Failed to export model: {error}"
+        self.log_message(f"❌ {error_msg}")
+        QMessageBox.critical(self, "Export Error", error_msg)
+    
+    def restore_after_export(self):
+        """Re-enable the controls disabled during export"""
+        self.export_btn.setEnabled(True)
+        self.train_btn.setEnabled(True)
+        self.promote_btn.setEnabled(bool(self.training_thread.pipeline.subsample_info))
     
     def log_message(self, message):
         """Add message to console"""